@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'ufcmsdb.instrumentation.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -89,9 +90,13 @@ TEMPLATES = [
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'ufcmsdb.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'ufcmsdb.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
@@ -108,6 +113,11 @@ USE_TZ = True
 
 WSGI_APPLICATION = 'Unit_factor_cms.wsgi.application'
 # Database configuration
+# Connections are reused for DATABASE_CONN_MAX_AGE seconds (0 closes them after
+# every request) and health-checked before reuse. DATABASE_POOL=True switches to
+# psycopg 3's connection pool instead; install requirement-pool.txt for it. Django
+# uses psycopg 3 over psycopg2 whenever it is installed, so only do that with the pool on.
+DATABASE_POOL = config('DATABASE_POOL', default=False, cast=bool)
 DATABASES = {
    'default': {
        'ENGINE': 'django.db.backends.postgresql',
@@ -116,8 +126,47 @@ DATABASES = {
        'PASSWORD': config('DATABASE_PASSWORD', default=''),
        'HOST': config('DATABASE_HOST', default='127.0.0.1'),
        'PORT': config('DATABASE_PORT', default='5432'),
+       'CONN_MAX_AGE': 0 if DATABASE_POOL else config('DATABASE_CONN_MAX_AGE', default=60, cast=int),
+       'CONN_HEALTH_CHECKS': True,
    }
 }
+if DATABASE_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DATABASE_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DATABASE_POOL_TIMEOUT', default=10, cast=int),  # Seconds to wait for a free connection
+            'check': ConnectionPool.check_connection,  # Health check on checkout
+        }
+    }
+# Cache used for reference data (departments, designations, roles, permissions).
+# Local memory is per process; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# Memcached when running several workers so invalidation reaches all of them.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ufcms'),
+    }
+}
+REFERENCE_DATA_CACHE_TIMEOUT = config('REFERENCE_DATA_CACHE_TIMEOUT', default=300, cast=int)  # Seconds
+# Leave days granted by manage.py reset_leave_balances
+MONTHLY_LEAVE_ALLOWANCE = config('MONTHLY_LEAVE_ALLOWANCE', default=2, cast=int)
+YEARLY_LEAVE_ALLOWANCE = config('YEARLY_LEAVE_ALLOWANCE', default=24, cast=int)
+# API tokens stop working this many hours after login (0 keeps them forever)
+TOKEN_EXPIRY_HOURS = config('TOKEN_EXPIRY_HOURS', default=24 * 30, cast=int)
+# Authenticated tokens are cached in a per-process LRU for TOKEN_LOCAL_CACHE_TTL seconds;
+# the local copy is what other processes may keep serving after a logout, so keep it short.
+# With a shared CACHE_BACKEND (Redis, Memcached) they are also cached there for
+# TOKEN_CACHE_TIMEOUT seconds; with local memory that tier is skipped.
+TOKEN_CACHE_TIMEOUT = config('TOKEN_CACHE_TIMEOUT', default=300, cast=int)
+TOKEN_LOCAL_CACHE_TTL = config('TOKEN_LOCAL_CACHE_TTL', default=10, cast=int)
+TOKEN_LOCAL_CACHE_SIZE = config('TOKEN_LOCAL_CACHE_SIZE', default=10000, cast=int)
+# Share of requests whose per-view metrics are recorded (see ufcmsdb.instrumentation)
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE', default=0.05, cast=float)
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=200, cast=int)  # Logged with the view name
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token for /metrics/; unset serves it only with DEBUG on
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -125,5 +174,12 @@ USE_I18N = True
 USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = 'static/'
+# Uploaded files (profile pictures, expense slips)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+# Uploads above this many bytes are streamed to a temporary file instead of held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=1024 * 1024, cast=int)
+EXPENSE_SLIP_MAX_BYTES = config('EXPENSE_SLIP_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+EXPENSE_SLIP_THUMBNAIL_SIZE = config('EXPENSE_SLIP_THUMBNAIL_SIZE', default=320, cast=int)  # Longest side, pixels
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -1,7 +1,11 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
 
+from ufcmsdb.instrumentation import MetricsView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,4 +20,8 @@ urlpatterns = [
     path('leave/api/', include('leavesapis.urls')),
     path('task/api/', include('tasksapis.urls')),
     path('api-token-auth/', obtain_auth_token),
+    path('metrics/', MetricsView.as_view(), name='metrics'),  # Prometheus text format
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
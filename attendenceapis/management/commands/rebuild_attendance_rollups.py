@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from attendenceapis.stats import attendance_totals, rebuild_rollups, rollup_totals
+from ufcmsdb.models import Attendance, CustomUser
+
+
+class Command(BaseCommand):
+    help = "Rebuild AttendanceRollup rows from raw Attendance data, or check them for drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help="Limit to this user ID (repeatable).")
+        parser.add_argument('--check', action='store_true',
+                            help="Compare current-period rollups with raw totals without writing.")
+
+    def handle(self, *args, user_ids=None, check=False, **options):
+        if check:
+            self.check_rollups(user_ids)
+            return
+
+        created = rebuild_rollups(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} attendance rollup rows."))
+
+    def check_rollups(self, user_ids):
+        today = date.today()
+        users = CustomUser.objects.all()
+        if user_ids:
+            users = users.filter(id__in=user_ids)
+
+        drifted = 0
+        for user in users.only('id', 'username').iterator():
+            expected = attendance_totals(Attendance.objects.filter(user=user), today)
+            actual = rollup_totals(user, today)
+            if expected != actual:
+                drifted += 1
+                self.stdout.write(f"{user.username}: rollups {actual} != raw {expected}")
+
+        if drifted:
+            self.stdout.write(self.style.WARNING(f"{drifted} user(s) drifted; run without --check to rebuild."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Rollups match raw attendance."))
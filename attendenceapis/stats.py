@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+from ufcmsdb.models import Attendance, AttendanceRollup
+
+OVERTIME_THRESHOLD_HOURS = 160  # Assuming 160 working hours per month
+
+
+def period_bounds(today):
+    """Inclusive (start, end) dates of the ISO week, month and year containing ``today``."""
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return {
+        'week': (week_start, week_start + timedelta(days=6)),
+        'month': (month_start, next_month - timedelta(days=1)),
+        'year': (date(today.year, 1, 1), date(today.year, 12, 31)),
+    }
+
+
+def attendance_totals(queryset=None, today=None):
+    """
+    Sum ``total_hours_day`` for the current week, month and year in one query.
+
+    ``queryset`` narrows the rows (e.g. to one user). Only rows inside the
+    combined date range are read, so older history is never scanned.
+    """
+    today = today or date.today()
+    if queryset is None:
+        queryset = Attendance.objects.all()
+
+    bounds = period_bounds(today)
+    first_day = min(start for start, _ in bounds.values())
+    last_day = max(end for _, end in bounds.values())
+
+    totals = queryset.filter(date__range=(first_day, last_day)).aggregate(**{
+        f'total_hours_{period}': Sum('total_hours_day', filter=Q(date__range=period_range))
+        for period, period_range in bounds.items()
+    })
+    totals = {key: value or 0 for key, value in totals.items()}
+    totals['overtime_hours'] = max(0, totals['total_hours_month'] - OVERTIME_THRESHOLD_HOURS)
+    return totals
+
+
+def rollup_totals(user=None, today=None):
+    """
+    Same result as ``attendance_totals`` but read from ``AttendanceRollup``:
+    at most three rows per user, whatever the length of their history.
+    Without ``user`` the totals cover every user.
+    """
+    today = today or date.today()
+    bounds = period_bounds(today)
+
+    current = Q()
+    for period, (start, _) in bounds.items():
+        current |= Q(period=period, period_start=start)
+
+    queryset = AttendanceRollup.objects.filter(current)
+    if user is not None:
+        queryset = queryset.filter(user=user)
+
+    totals = queryset.aggregate(**{
+        f'total_hours_{period}': Sum('total_hours', filter=Q(period=period))
+        for period in bounds
+    })
+    totals = {key: value or 0 for key, value in totals.items()}
+    totals['overtime_hours'] = max(0, totals['total_hours_month'] - OVERTIME_THRESHOLD_HOURS)
+    return totals
+
+
+def record_hours(user_id, day, hours):
+    """
+    Add ``hours`` worked on ``day`` to the user's week, month and year rollups.
+    Rows are incremented with ``F()`` so concurrent punch-outs don't lose updates.
+    """
+    for period, (start, _) in period_bounds(day).items():
+        rollup = AttendanceRollup.objects.filter(user_id=user_id, period=period, period_start=start)
+        if rollup.update(total_hours=F('total_hours') + hours):
+            continue
+        try:
+            with transaction.atomic():
+                AttendanceRollup.objects.create(
+                    user_id=user_id, period=period, period_start=start, total_hours=hours
+                )
+        except IntegrityError:
+            # Another request created the row first
+            rollup.update(total_hours=F('total_hours') + hours)
+
+
+PERIOD_TRUNCATORS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'year': TruncYear,
+}
+
+
+@transaction.atomic
+def rebuild_rollups(user_ids=None):
+    """Recompute rollups from raw ``Attendance`` rows. Returns the number of rows written."""
+    rollups = AttendanceRollup.objects.all()
+    attendance = Attendance.objects.all()
+    if user_ids:
+        rollups = rollups.filter(user_id__in=user_ids)
+        attendance = attendance.filter(user_id__in=user_ids)
+    rollups.delete()
+
+    created = 0
+    for period, trunc in PERIOD_TRUNCATORS.items():
+        rows = (
+            attendance.annotate(period_start=trunc('date'))
+            .values('user_id', 'period_start')
+            .annotate(total=Sum('total_hours_day'))
+            .order_by()
+        )
+        created += len(AttendanceRollup.objects.bulk_create(
+            (
+                AttendanceRollup(
+                    user_id=row['user_id'], period=period,
+                    period_start=row['period_start'], total_hours=row['total'] or 0,
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        ))
+    return created
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import PunchInOutView, UserAttendanceStatsView , AllAttendanceStatsView
+from .views import PunchInOutView, UserAttendanceStatsView , AllAttendanceStatsView, AsyncUserAttendanceStatsView
 
 urlpatterns = [
     path('punch/', PunchInOutView.as_view(), name='punch-in-out'),
     path('stats/', UserAttendanceStatsView.as_view(), name='attendance-stats'),
+    path('stats/async/', AsyncUserAttendanceStatsView.as_view(), name='attendance-stats-async'),  # For ASGI servers
     path ('get-all/',AllAttendanceStatsView.as_view(), name='get-allattendance-stats' )
 ]
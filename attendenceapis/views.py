@@ -2,32 +2,31 @@ import json
 from datetime import datetime, date
 from decimal import Decimal
 
+from django.db import transaction
 from django.utils.timezone import localtime, now, activate
-from django.db.models import Sum
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.dateparse import parse_date
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
+from ufcmsdb.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 
+from ufcmsdb.asyncapi import AsyncAPIView, gather, json_response
 from ufcmsdb.models import Attendance, CustomUser
-
-
-# Function to check if a user has permission based on roles
-def user_has_permission(user, action, module):
-    """Check if a user has a given permission on a module."""
-    return user.role.filter(permissions__action=action, permissions__module=module).exists()
+from ufcmsdb.permissions import user_has_permission
+from ufcmsdb.pagination import InvalidPageRequest, keyset_page, page_size
+from ufcmsdb.streaming import EXPORT_FORMATS, streaming_export
+from attendenceapis.stats import record_hours, rollup_totals
 
 
 class PunchInOutView(APIView):
     """
     View for authenticated users to punch in and punch out.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -35,32 +34,42 @@ class PunchInOutView(APIView):
         user = request.user  # Get authenticated user
 
         today = date.today()
-        attendance, created = Attendance.objects.get_or_create(
-            user=user, date=today, defaults={'status': 'Present'}
-        )
-
-        if not attendance.punch_in_time:
-            # Punch In
-            attendance.punch_in_time = localtime(now()).time()
-            attendance.save()
-            return Response({
-                "message": "Punched in successfully.",
-                "punch_in_time": attendance.punch_in_time
-            }, status=status.HTTP_200_OK)
-
-        if not attendance.punch_out_time:
-            # Punch Out
-            attendance.punch_out_time = localtime(now()).time()
-            punch_in = datetime.combine(today, attendance.punch_in_time)
-            punch_out = datetime.combine(today, attendance.punch_out_time)
-            hours_worked = Decimal((punch_out - punch_in).seconds) / Decimal(3600)
-            attendance.total_hours_day += hours_worked
-            attendance.save()
-            return Response({
-                "message": "Punched out successfully.",
-                "punch_out_time": attendance.punch_out_time,
-                "hours_worked_today": hours_worked
-            }, status=status.HTTP_200_OK)
+        with transaction.atomic():
+            # Lock the row so two concurrent punches can't both pass the checks below
+            attendance = Attendance.objects.select_for_update().filter(user=user, date=today).first()
+            if attendance is None:
+                attendance, created = Attendance.objects.get_or_create(
+                    user=user, date=today, defaults={'status': 'Present'}
+                )
+                if not created:
+                    # Another request created it first
+                    attendance = Attendance.objects.select_for_update().get(pk=attendance.pk)
+
+            if not attendance.punch_in_time:
+                # Punch In
+                attendance.punch_in_time = localtime(now()).time()
+                attendance.save()
+                return Response({
+                    "message": "Punched in successfully.",
+                    "punch_in_time": attendance.punch_in_time
+                }, status=status.HTTP_200_OK)
+
+            if not attendance.punch_out_time:
+                # Punch Out
+                attendance.punch_out_time = localtime(now()).time()
+                punch_in = datetime.combine(today, attendance.punch_in_time)
+                punch_out = datetime.combine(today, attendance.punch_out_time)
+                hours_worked = Decimal((punch_out - punch_in).seconds) / Decimal(3600)
+                # Rounded once, so the daily total and the rollups add up the same hours
+                hours_worked = hours_worked.quantize(Decimal('0.01'))
+                attendance.total_hours_day += hours_worked
+                attendance.save()
+                record_hours(user.id, today, hours_worked)
+                return Response({
+                    "message": "Punched out successfully.",
+                    "punch_out_time": attendance.punch_out_time,
+                    "hours_worked_today": hours_worked
+                }, status=status.HTTP_200_OK)
 
         return Response({"message": "You have already punched out today."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -69,46 +78,66 @@ class UserAttendanceStatsView(APIView):
     """
     View to retrieve an authenticated user's own attendance stats.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
         today = date.today()
 
-        total_hours_month = Attendance.objects.filter(user=user, date__month=today.month).aggregate(
-            Sum('total_hours_day')
-        )['total_hours_day__sum'] or 0
-
-        total_hours_week = Attendance.objects.filter(user=user, date__week=today.isocalendar()[1]).aggregate(
-            Sum('total_hours_day')
-        )['total_hours_day__sum'] or 0
-
-        total_hours_year = Attendance.objects.filter(user=user, date__year=today.year).aggregate(
-            Sum('total_hours_day')
-        )['total_hours_day__sum'] or 0
-
-        overtime = max(0, total_hours_month - 160)  # Assuming 160 working hours per month
+        totals = rollup_totals(user, today)
 
         attendance_records = Attendance.objects.filter(user=user).values('date', 'punch_in_time', 'punch_out_time')
 
         return Response({
             "user_id": user.id,
             "username": user.username,
-            "total_hours_month": total_hours_month,
-            "total_hours_week": total_hours_week,
-            "total_hours_year": total_hours_year,
-            "overtime_hours": overtime,
+            "total_hours_month": totals['total_hours_month'],
+            "total_hours_week": totals['total_hours_week'],
+            "total_hours_year": totals['total_hours_year'],
+            "overtime_hours": totals['overtime_hours'],
             "attendance_records": list(attendance_records)
         }, status=status.HTTP_200_OK)
 
 
+class AsyncUserAttendanceStatsView(AsyncAPIView):
+    """
+    ``UserAttendanceStatsView`` for ASGI servers: the totals and the
+    record list are read concurrently.
+    """
+
+    async def get(self, request):
+        user = request.user
+        records = Attendance.objects.filter(user=user).values('date', 'punch_in_time', 'punch_out_time')
+
+        totals, attendance_records = await gather((rollup_totals, user, date.today()), (list, records))
+
+        return json_response({
+            "user_id": user.id,
+            "username": user.username,
+            "total_hours_month": totals['total_hours_month'],
+            "total_hours_week": totals['total_hours_week'],
+            "total_hours_year": totals['total_hours_year'],
+            "overtime_hours": totals['overtime_hours'],
+            "attendance_records": attendance_records
+        })
+
+
+ATTENDANCE_EXPORT_FIELDS = (
+    'id', 'user__id', 'user__username', 'date', 'punch_in_time', 'punch_out_time', 'total_hours_day'
+)
+
+
 class AllAttendanceStatsView(APIView):
     """
     View to retrieve all users' attendance records.
     Only users with "read" permission for "attendance" can access this.
+
+    Records are filtered by ``date_from``, ``date_to`` and ``user_id`` and
+    paginated by ``(date, id)`` using ``limit`` and the returned ``next_cursor``.
+    ``?export=csv`` or ``?export=ndjson`` streams every matching record instead.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -118,27 +147,50 @@ class AllAttendanceStatsView(APIView):
         if not user_has_permission(user, "read", "attendance"):
             raise PermissionDenied("You do not have permission to view all attendance records.")
 
-        today = date.today()
-
-        total_hours_month = Attendance.objects.filter(date__month=today.month).aggregate(
-            Sum('total_hours_day')
-        )['total_hours_day__sum'] or 0
-
-        total_hours_week = Attendance.objects.filter(date__week=today.isocalendar()[1]).aggregate(
-            Sum('total_hours_day')
-        )['total_hours_day__sum'] or 0
-
-        total_hours_year = Attendance.objects.filter(date__year=today.year).aggregate(
-            Sum('total_hours_day')
-        )['total_hours_day__sum'] or 0
-
-        attendance_records = Attendance.objects.select_related('user').values(
-            'user__id', 'user__username', 'date', 'punch_in_time', 'punch_out_time', 'total_hours_day'
-        )
+        attendance_records = Attendance.objects.all()
+
+        for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    parsed = parse_date(value)
+                except ValueError:  # Well formed but impossible, e.g. 2026-02-30
+                    parsed = None
+                if not parsed:
+                    return Response({"error": f"Invalid {param}. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+                attendance_records = attendance_records.filter(**{lookup: parsed})
+
+        user_id = request.query_params.get('user_id')
+        if user_id:
+            if not user_id.isdigit():
+                return Response({"error": "Invalid user_id."}, status=status.HTTP_400_BAD_REQUEST)
+            attendance_records = attendance_records.filter(user_id=user_id)
+
+        export_format = request.query_params.get('export')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response({"error": f"export must be one of: {', '.join(EXPORT_FORMATS)}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return streaming_export(
+                export_format, attendance_records.order_by('date', 'id'), ATTENDANCE_EXPORT_FIELDS, 'attendance'
+            )
+
+        try:
+            records, next_cursor = keyset_page(
+                attendance_records.values(*ATTENDANCE_EXPORT_FIELDS),
+                ('date', 'id'),
+                cursor=request.query_params.get('cursor'),
+                limit=page_size(request),
+            )
+        except InvalidPageRequest as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        totals = rollup_totals(today=date.today())
 
         return Response({
-            "total_hours_month": total_hours_month,
-            "total_hours_week": total_hours_week,
-            "total_hours_year": total_hours_year,
-            "attendance_records": list(attendance_records)
+            "total_hours_month": totals['total_hours_month'],
+            "total_hours_week": totals['total_hours_week'],
+            "total_hours_year": totals['total_hours_year'],
+            "attendance_records": records,
+            "next_cursor": next_cursor
         }, status=status.HTTP_200_OK)
@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import LoginView , ForgotPasswordView , ResetPasswordView
+from .views import LoginView , ForgotPasswordView , ResetPasswordView , CurrentUserView, LogoutView, AsyncLoginView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),  # Login endpoint
+    path('login/async/', AsyncLoginView.as_view(), name='login-async'),  # For ASGI servers
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot'),  # Login endpoint
     path('reset-password/', ResetPasswordView.as_view(), name='reset'),  # Login endpoint
+    path('logout/', LogoutView.as_view(), name='logout'),  # Deletes the caller's token
+    path('me/', CurrentUserView.as_view(), name='current-user'),  # Identity plus ?expand= sections
 ]
@@ -1,16 +1,20 @@
+import json
 import logging
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from ufcmsdb.authentication import CachedTokenAuthentication, issue_token
 from rest_framework import status
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils.timezone import now
 from django.contrib.auth.hashers import check_password
 from django.contrib.auth.hashers import make_password
-from ufcmsdb.models import CustomUser, Project, Attendance, Leave , PasswordResetOTP
+from ufcmsdb.models import CustomUser, Attendance, Leave , PasswordResetOTP, Permission
 from rest_framework.authtoken.models import Token
+from attendenceapis.stats import rollup_totals
+from ufcmsdb.asyncapi import AsyncAPIView, gather, in_thread, json_response
+from ufcmsdb.outbox import enqueue_email
 from datetime import date
-from django.db.models import Sum
 from django.contrib.auth.hashers import make_password
 from django.conf import settings  # Import settings to use email configuration
 import random  # Import random for OTP generation
@@ -18,10 +22,104 @@ import random  # Import random for OTP generation
 
 logger = logging.getLogger(__name__)
 
+LOGIN_SECTIONS = ('projects', 'attendance', 'leaves')
+
+
+def parse_expand(request):
+    """
+    Read the sections requested through ``?expand=`` (comma separated).
+    ``expand=all`` selects every section; unknown names are ignored.
+    """
+    requested = {part.strip() for part in request.GET.get('expand', '').split(',') if part.strip()}
+    if 'all' in requested:
+        return set(LOGIN_SECTIONS)
+    return requested & set(LOGIN_SECTIONS)
+
+
+def identity_data(user):
+    """Roles, designation, department and permissions of a user."""
+    roles = user.role.all()
+    permissions = Permission.objects.filter(roles__users=user).distinct()
+
+    return {
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "roles": [{"id": role.id, "name": role.name} for role in roles],
+        "designation": {"id": user.designation.id, "name": user.designation.name} if user.designation else None,
+        "department": {"id": user.department.id, "name": user.department.name} if user.department else None,
+        "permissions": [{"id": perm.id, "action": perm.action, "module": perm.module} for perm in permissions],
+    }
+
+
+def projects_data(user):
+    """Projects the user belongs to and projects the user leads."""
+    fields = ('id', 'name', 'deadline', 'total_tasks')
+    return {
+        "projects": list(user.projects.values(*fields)),
+        "led_projects": list(user.led_projects.values(*fields)),
+    }
+
+
+def attendance_data(user):
+    """Today's punches, running totals and the attendance history."""
+    today = date.today()
+    attendance_today = Attendance.objects.filter(user=user, date=today).first()
+
+    totals = rollup_totals(user, today)
+
+    attendance_records = Attendance.objects.filter(user=user).values('date', 'punch_in_time', 'punch_out_time')
+
+    return {
+        "punch_in_time": attendance_today.punch_in_time if attendance_today else None,
+        "punch_out_time": attendance_today.punch_out_time if attendance_today else None,
+        "attendance": {
+            "total_hours_month": totals['total_hours_month'],
+            "total_hours_week": totals['total_hours_week'],
+            "total_hours_year": totals['total_hours_year'],
+            "overtime_hours": totals['overtime_hours'],
+            "records": list(attendance_records)
+        },
+    }
+
+
+def leaves_data(user):
+    """Every leave the user has applied for."""
+    leaves = Leave.objects.filter(user=user).values('id', 'leave_type', 'status', 'leave_from')
+    return {
+        "leave_data": [
+            {"id": leave['id'], "type": leave['leave_type'], "status": leave['status'], "date": leave['leave_from']}
+            for leave in leaves
+        ]
+    }
+
+
+SECTION_BUILDERS = {
+    'projects': projects_data,
+    'attendance': attendance_data,
+    'leaves': leaves_data,
+}
+
+
+def user_payload(user, sections):
+    """Identity data merged with the requested heavy sections."""
+    data = identity_data(user)
+    for section in LOGIN_SECTIONS:
+        if section in sections:
+            data.update(SECTION_BUILDERS[section](user))
+    return data
+
+
 class LoginView(APIView):
     """
     Handle user login and generate token along with user details.
     No token is required to log in.
+
+    ``?compact=1`` returns only the token and identity; heavy sections can
+    be added with ``?expand=projects,attendance,leaves`` or fetched later
+    from ``CurrentUserView``. Without ``compact`` every section is included.
     """
     permission_classes = [AllowAny]
 
@@ -37,7 +135,7 @@ class LoginView(APIView):
             )
 
         try:
-            user = CustomUser.objects.get(email=email)
+            user = CustomUser.objects.select_related('designation', 'department').get(email=email)
         except CustomUser.DoesNotExist:
             return Response(
                 {"error": "Invalid credentials"}, 
@@ -45,91 +143,17 @@ class LoginView(APIView):
             )
 
         if check_password(raw_password, user.password):
-            # Create or get token for user
-            token, created = Token.objects.get_or_create(user=user)
-
-            # Get user-related data
-            roles = user.role.all()
-            designation = user.designation
-            department = user.department
-            projects = user.projects.all()
-            led_projects = user.led_projects.all()
-
-            # Attendance Data
-            today = date.today()
-            attendance_today = Attendance.objects.filter(user=user, date=today).first()
-            punch_in_time = attendance_today.punch_in_time if attendance_today else None
-            punch_out_time = attendance_today.punch_out_time if attendance_today else None
-
-            # Attendance Statistics
-            total_hours_month = Attendance.objects.filter(user=user, date__month=today.month).aggregate(
-                Sum('total_hours_day')
-            )['total_hours_day__sum'] or 0
-
-            total_hours_week = Attendance.objects.filter(user=user, date__week=today.isocalendar()[1]).aggregate(
-                Sum('total_hours_day')
-            )['total_hours_day__sum'] or 0
-
-            total_hours_year = Attendance.objects.filter(user=user, date__year=today.year).aggregate(
-                Sum('total_hours_day')
-            )['total_hours_day__sum'] or 0
-
-            overtime_hours = max(0, total_hours_month - 160)  # Assuming 160 working hours per month
-
-            attendance_records = Attendance.objects.filter(user=user).values('date', 'punch_in_time', 'punch_out_time')
-
-            # Leave Data
-            leaves = Leave.objects.filter(user=user)
-            leave_data = [
-                {"id": leave.id, "type": leave.leave_type, "status": leave.status, "date": leave.leave_from}
-                for leave in leaves
-            ]
-
-            # Get permissions assigned to the roles
-            permissions = set()
-            for role in roles:
-                role_permissions = role.permissions.all()
-                permissions.update(role_permissions)
-
-            permissions_data = [{"id": perm.id, "action": perm.action, "module": perm.module} for perm in permissions]
-
-            # Preparing roles, designation, department, and projects data
-            roles_data = [{"id": role.id, "name": role.name} for role in roles]
-            designation_data = {"id": designation.id, "name": designation.name} if designation else None
-            department_data = {"id": department.id, "name": department.name} if department else None
-
-            projects_data = [
-                {"id": project.id, "name": project.name, "deadline": project.deadline, "total_tasks": project.total_tasks}
-                for project in projects
-            ]
-
-            led_projects_data = [
-                {"id": project.id, "name": project.name, "deadline": project.deadline, "total_tasks": project.total_tasks}
-                for project in led_projects
-            ]
+            # Reuse the user's token, or issue a new one if it has expired
+            token = issue_token(user)
+
+            if request.query_params.get('compact') in ('1', 'true'):
+                sections = parse_expand(request)
+            else:
+                sections = set(LOGIN_SECTIONS)
 
             response_data = {
                 "token": token.key,
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "roles": roles_data,
-                    "designation": designation_data,
-                    "department": department_data,
-                    "projects": projects_data,
-                    "led_projects": led_projects_data,
-                    "punch_in_time": punch_in_time,
-                    "punch_out_time": punch_out_time,
-                    "attendance": {
-                        "total_hours_month": total_hours_month,
-                        "total_hours_week": total_hours_week,
-                        "total_hours_year": total_hours_year,
-                        "overtime_hours": overtime_hours,
-                        "records": list(attendance_records)
-                    },
-                    "leave_data": leave_data,
-                    "permissions": permissions_data
-                }
+                "user": user_payload(user, sections)
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
@@ -140,6 +164,74 @@ class LoginView(APIView):
             )
 
 
+class AsyncLoginView(AsyncAPIView):
+    """
+    ``LoginView`` for ASGI servers. After the password check the token,
+    the identity and each requested section are loaded concurrently.
+    Accepts the same JSON or form body and query parameters.
+    """
+    authenticated = False
+
+    async def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                credentials = json.loads(request.body or b'{}')
+            except ValueError:
+                return json_response({"error": "Invalid JSON format"}, status=400)
+        else:
+            credentials = request.POST
+        email = credentials.get('email')
+        raw_password = credentials.get('password')
+
+        if not email or not raw_password:
+            return json_response({"error": "Both email and password are required."}, status=400)
+
+        user = await in_thread(
+            CustomUser.objects.select_related('designation', 'department').filter(email=email).first
+        )
+        # The hash check is deliberately slow, so keep it off the event loop too
+        if user is None or not await in_thread(check_password, raw_password, user.password):
+            return json_response({"error": "Invalid credentials"}, status=403)
+
+        if request.GET.get('compact') in ('1', 'true'):
+            sections = parse_expand(request)
+        else:
+            sections = set(LOGIN_SECTIONS)
+
+        builders = [identity_data] + [SECTION_BUILDERS[section] for section in LOGIN_SECTIONS if section in sections]
+        token, *parts = await gather((issue_token, user), *((builder, user) for builder in builders))
+
+        data = {}
+        for part in parts:
+            data.update(part)
+        return json_response({"token": token.key, "user": data})
+
+
+class CurrentUserView(APIView):
+    """
+    Return the authenticated user's identity plus the sections requested
+    through ``?expand=``. Used after a compact login to load heavy data on demand.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = CustomUser.objects.select_related('designation', 'department').get(id=request.user.id)
+        return Response({"user": user_payload(user, parse_expand(request))}, status=status.HTTP_200_OK)
+
+
+class LogoutView(APIView):
+    """
+    Delete the caller's token. Every client using it has to log in again.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        Token.objects.filter(key=request.auth).delete()
+        return Response({"message": "Logged out successfully."}, status=status.HTTP_200_OK)
+
+
 
 class ForgotPasswordView(APIView):
     """
@@ -159,19 +251,19 @@ class ForgotPasswordView(APIView):
 
         # Generate OTP
         otp = random.randint(100000, 999999)
-        PasswordResetOTP.objects.update_or_create(
-        email=user.email,  # Use email instead of user
-        defaults={"otp": otp, "created_at": now()}
-)
-
-        # Send OTP via email
-        send_mail(
-            "Password Reset OTP",
-            f"Your OTP for password reset is {otp}. This OTP is valid for 10 minutes.",
-            settings.DEFAULT_FROM_EMAIL,
-            [email],
-            fail_silently=False,
-        )
+        with transaction.atomic():
+            PasswordResetOTP.objects.update_or_create(
+                email=user.email,  # Use email instead of user
+                defaults={"otp": otp, "created_at": now()}
+            )
+
+            # Queue the OTP email; the outbox worker delivers it outside the request
+            enqueue_email(
+                "Password Reset OTP",
+                f"Your OTP for password reset is {otp}. This OTP is valid for 10 minutes.",
+                [email],
+                settings.DEFAULT_FROM_EMAIL,
+            )
 
         return Response({"message": "OTP has been sent to your email."}, status=status.HTTP_200_OK)
 
@@ -195,9 +287,11 @@ class ResetPasswordView(APIView):
         except (CustomUser.DoesNotExist, PasswordResetOTP.DoesNotExist):
             return Response({"error": "Invalid OTP or email."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Reset password
+        # Reset password and sign the user out everywhere
         user.password = make_password(new_password)
-        user.save()
+        with transaction.atomic():
+            user.save(update_fields=['password'])
+            Token.objects.filter(user=user).delete()
 
         # Delete OTP record after successful password reset
         otp_record.delete()
@@ -1,6 +1,7 @@
 from django.http import JsonResponse
 from django.views import View
-from ufcmsdb.models import Department , Designation
+from ufcmsdb.models import Department
+from ufcmsdb.reference_cache import reference_response
 import json
 
 
@@ -27,26 +28,26 @@ class DepartmentCreateView(View):
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
+def departments_with_designations():
+    """Every department with its designations, loaded in two queries."""
+    departments = Department.objects.prefetch_related('designation_set')
+    return {
+        "departments": [
+            {
+                "id": dept.id,
+                "name": dept.name,
+                "designations": [{"id": desig.id, "name": desig.name} for desig in dept.designation_set.all()]
+            }
+            for dept in departments
+        ]
+    }
+
+
 class AllDepartmentView(View):
     def get(self, request):
         try:
-            # Fetch all departments and their designations
-            departments = Department.objects.all()
-
-            # Serialize data
-            departments_data = []
-            for dept in departments:
-                # Get designations for each department
-                designations = Designation.objects.filter(department=dept)
-                designations_data = [{"id": desig.id, "name": desig.name} for desig in designations]
-
-                departments_data.append({
-                    "id": dept.id,
-                    "name": dept.name,
-                    "designations": designations_data  # Include designations
-                })
-
-            return JsonResponse({"departments": departments_data}, status=200)
+            # Served from the reference-data cache; conditional requests get a 304
+            return reference_response(request, 'departments', 'all', departments_with_designations)
 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
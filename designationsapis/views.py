@@ -3,6 +3,7 @@ from django.http import JsonResponse
 from django.views import View
 from django.core.exceptions import ObjectDoesNotExist
 from ufcmsdb.models import Designation, Department
+from ufcmsdb.reference_cache import reference_response
 import json
 
 # View for creating a new Designation
@@ -45,17 +46,24 @@ class AllDesignationView(View):
             # Get department_id from the query parameters (default to None if not provided)
             department_id = request.GET.get("department_id", None)
 
-            if department_id:
-                # If department_id is provided, filter designations by department
-                designations = Designation.objects.filter(department_id=department_id)
-            else:
-                # If no department_id is provided, return all designations
-                designations = Designation.objects.all()
+            if department_id and not department_id.isdigit():
+                return JsonResponse({"error": "Invalid department_id."}, status=400)
 
-            # Serialize the data
-            designations_data = [{"id": desig.id, "name": desig.name, "department": desig.department_name} for desig in designations]
+            def build():
+                if department_id:
+                    # If department_id is provided, filter designations by department
+                    designations = Designation.objects.filter(department_id=department_id)
+                else:
+                    # If no department_id is provided, return all designations
+                    designations = Designation.objects.all()
 
-            return JsonResponse({"designations": designations_data}, status=200)
+                # Serialize the data
+                return {"designations": [
+                    {"id": desig.id, "name": desig.name, "department": desig.department_name} for desig in designations
+                ]}
+
+            # Served from the reference-data cache; conditional requests get a 304
+            return reference_response(request, 'designations', department_id or 'all', build)
 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
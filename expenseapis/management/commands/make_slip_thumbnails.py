@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from expenseapis.slips import make_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails for newly uploaded expense slips in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when the queue is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls when idle.")
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        try:
+            while True:
+                counts = make_thumbnails(batch_size=batch_size)
+                if any(counts.values()):
+                    self.stdout.write(f"Thumbnails ready {counts['ready']}, failed {counts['failed']}.")
+                if counts['ready'] + counts['failed'] == batch_size:
+                    continue  # Full batch: more may be waiting
+                if not loop:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
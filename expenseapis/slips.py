@@ -0,0 +1,125 @@
+"""
+Expense slip ingestion.
+
+``SlipUploadHandler`` enforces the size limit while the upload streams in,
+Django spools anything over ``FILE_UPLOAD_MAX_MEMORY_SIZE`` to a temporary
+file, and storage copies it in chunks. Thumbnails are made afterwards by
+``manage.py make_slip_thumbnails`` so no request ever decodes an image.
+"""
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from ufcmsdb.models import Expense
+
+logger = logging.getLogger(__name__)
+
+SLIP_TYPES = ('JPEG', 'PNG', 'WebP')
+
+
+class SlipUploadHandler(FileUploadHandler):
+    """
+    Drops an uploaded file as soon as it grows past ``EXPENSE_SLIP_MAX_BYTES``.
+    Install it first in ``request.upload_handlers``; the rest of the body is
+    read and discarded, and ``too_large`` tells the view what happened.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.too_large = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.EXPENSE_SLIP_MAX_BYTES:
+            self.too_large = True
+            raise SkipFile
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None  # Let the next handler build the file
+
+
+def sniff_slip_type(upload):
+    """Return the image type from the file's first bytes, or None if it isn't an accepted one."""
+    head = upload.read(12)
+    upload.seek(0)
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'JPEG'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'PNG'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WebP'
+    return None
+
+
+def render_thumbnail(field_file):
+    """JPEG bytes of a slip scaled to fit ``EXPENSE_SLIP_THUMBNAIL_SIZE``."""
+    size = (settings.EXPENSE_SLIP_THUMBNAIL_SIZE,) * 2
+    with field_file.open('rb'), Image.open(field_file) as image:
+        image.draft('RGB', size)  # JPEG only: decode at a reduced scale instead of full size
+        image = ImageOps.exif_transpose(image)  # Phone photos are often stored sideways
+        image.thumbnail(size)
+        out = BytesIO()
+        image.convert('RGB').save(out, 'JPEG', quality=75, optimize=True)
+    return out.getvalue()
+
+
+def make_thumbnails(batch_size=20):
+    """
+    Generate thumbnails for one batch of pending slips.
+    Returns a dict with ``ready`` and ``failed`` counts.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    workers can share the queue. Thumbnails are written to storage before
+    the rows are updated; if the transaction fails they are deleted again,
+    so the retry doesn't leave orphans under collision-renamed names.
+    """
+    counts = {'ready': 0, 'failed': 0}
+    stored = []
+
+    try:
+        with transaction.atomic():
+            batch = list(
+                Expense.objects.select_for_update(skip_locked=True)
+                .filter(slip_status='Pending')
+                .order_by('id')[:batch_size]
+            )
+            for expense in batch:
+                try:
+                    expense.slip_thumbnail.save(
+                        f'{expense.id}.jpg', ContentFile(render_thumbnail(expense.expense_slip)), save=False
+                    )
+                except Exception:
+                    logger.warning("Thumbnail failed for expense %s", expense.id, exc_info=True)
+                    expense.slip_status = 'Failed'
+                    counts['failed'] += 1
+                else:
+                    stored.append(expense.slip_thumbnail.name)
+                    expense.slip_status = 'Ready'
+                    counts['ready'] += 1
+
+            Expense.objects.bulk_update(batch, ['slip_thumbnail', 'slip_status'])
+    except Exception:
+        storage = Expense._meta.get_field('slip_thumbnail').storage
+        for name in stored:
+            storage.delete(name)
+        raise
+
+    return counts
+
+
+def slip_urls(expense):
+    """
+    ``expense_slip`` for listings: the thumbnail, or the original until the
+    thumbnail exists. ``expense_slip_original`` always links the full image.
+    """
+    original = expense.expense_slip.url if expense.expense_slip else None
+    thumbnail = expense.slip_thumbnail.url if expense.slip_thumbnail else None
+    return {
+        "expense_slip": thumbnail or original,
+        "expense_slip_original": original,
+    }
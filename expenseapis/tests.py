@@ -0,0 +1,250 @@
+import csv
+import io
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from expenseapis.slips import make_thumbnails, slip_urls, sniff_slip_type
+from expenseapis.views import EXPENSE_EXPORT_FIELDS
+from ufcmsdb.models import CustomUser, Department, Expense, Permission, Role
+
+
+def finance_user(username, *actions):
+    """A user whose role grants ``actions`` on finance_management."""
+    user = CustomUser.objects.create(username=username, email=f'{username}@example.com', first_name='Fin', last_name='Ance')
+    role = Role.objects.create(name=f'{username} role')
+    role.permissions.set([Permission.objects.get_or_create(module='finance_management', action=action)[0]
+                          for action in actions])
+    user.role.add(role)
+    return user
+
+
+class ExpenseLedgerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.finance = finance_user('finance', 'read')
+        cls.sales = Department.objects.create(name='Sales')
+        cls.support = Department.objects.create(name='Support')
+        cls.ali = CustomUser.objects.create(username='ali', email='ali@example.com', first_name='Ali', last_name='Khan')
+        cls.sara = CustomUser.objects.create(username='sara', email='sara@example.com', first_name='Sara', last_name='Ahmed')
+
+        rows = [
+            (date(2026, 1, 5), '10.00', cls.ali, cls.sales),
+            (date(2026, 1, 20), '15.50', cls.sara, cls.sales),
+            (date(2026, 1, 20), '7.25', cls.ali, cls.support),
+            (date(2026, 2, 1), '100.00', cls.sara, cls.support),
+            (date(2026, 2, 28), '4.75', cls.ali, cls.sales),
+        ]
+        cls.expenses = [
+            Expense.objects.create(date=day, amount=Decimal(amount), description=f'Expense {i}', user=user,
+                                   department=department)
+            for i, (day, amount, user, department) in enumerate(rows)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.finance)
+
+    def ledger_ids(self, **params):
+        response = self.client.get('/expense/api/get-all/', params)
+        self.assertEqual(response.status_code, 200)
+        return [expense['id'] for expense in response.json()['expenses']]
+
+    def ids(self, *indexes):
+        return [self.expenses[i].id for i in indexes]
+
+    def test_newest_first_by_date_then_id(self):
+        self.assertEqual(self.ledger_ids(), self.ids(4, 3, 2, 1, 0))
+
+    def test_filters(self):
+        self.assertEqual(self.ledger_ids(date_from='2026-01-20'), self.ids(4, 3, 2, 1))
+        self.assertEqual(self.ledger_ids(date_to='2026-01-20'), self.ids(2, 1, 0))
+        self.assertEqual(self.ledger_ids(date_from='2026-01-20', date_to='2026-01-20'), self.ids(2, 1))
+        self.assertEqual(self.ledger_ids(department_id=self.support.id), self.ids(3, 2))
+        self.assertEqual(self.ledger_ids(user_id=self.ali.id), self.ids(4, 2, 0))
+        self.assertEqual(self.ledger_ids(user_id=self.ali.id, department_id=self.sales.id), self.ids(4, 0))
+
+    def test_invalid_filters(self):
+        for params in ({'date_from': '2026-13-01'}, {'date_to': 'yesterday'}, {'department_id': 'sales'},
+                       {'user_id': '-1'}, {'limit': '0'}, {'cursor': 'not-a-cursor'}, {'export': 'xml'}):
+            for path in ('/expense/api/get-all/', '/expense/api/summary/'):
+                if path.endswith('summary/') and set(params) & {'limit', 'cursor', 'export'}:
+                    continue
+                with self.subTest(path=path, params=params):
+                    response = self.client.get(path, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('error', response.json())
+
+    def test_cursor_pages_follow_the_sort_order(self):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get('/expense/api/get-all/', {'limit': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page['expenses']), 2)
+            seen += [expense['id'] for expense in page['expenses']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        # The two 2026-01-20 expenses straddle a page boundary and are ordered by id
+        self.assertEqual(seen, self.ids(4, 3, 2, 1, 0))
+
+    def test_csv_export(self):
+        response = self.client.get('/expense/api/get-all/', {'export': 'csv', 'department_id': self.sales.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="expenses.csv"', response['Content-Disposition'])
+
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], list(EXPENSE_EXPORT_FIELDS))
+        self.assertEqual(rows[0], ['id', 'date', 'amount', 'description', 'user_id', 'user__first_name',
+                                   'user__last_name', 'department_id', 'department__name', 'expense_slip'])
+        latest = self.expenses[4]
+        self.assertEqual(rows[1], [str(latest.id), '2026-02-28', '4.75', 'Expense 4', str(self.ali.id), 'Ali', 'Khan',
+                                   str(self.sales.id), 'Sales', ''])
+        self.assertEqual([int(row[0]) for row in rows[1:]], self.ids(4, 1, 0))
+
+    def test_summary_per_department_per_month(self):
+        response = self.client.get('/expense/api/summary/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [(row['month'], row['department_name'], Decimal(str(row['total'])), row['count']) for row in data['totals']],
+            [
+                ('2026-01', 'Sales', Decimal('25.50'), 2),
+                ('2026-01', 'Support', Decimal('7.25'), 1),
+                ('2026-02', 'Sales', Decimal('4.75'), 1),
+                ('2026-02', 'Support', Decimal('100.00'), 1),
+            ],
+        )
+        self.assertEqual(Decimal(str(data['grand_total'])), Decimal('137.50'))
+
+        filtered = self.client.get('/expense/api/summary/', {'department_id': self.sales.id, 'date_to': '2026-01-31'}).json()
+        self.assertEqual([(row['month'], row['count']) for row in filtered['totals']], [('2026-01', 2)])
+        self.assertEqual(Decimal(str(filtered['grand_total'])), Decimal('25.50'))
+
+    def test_requires_finance_read(self):
+        self.client.force_authenticate(self.ali)
+        self.assertEqual(self.client.get('/expense/api/get-all/').status_code, 403)
+        self.assertEqual(self.client.get('/expense/api/summary/').status_code, 403)
+
+
+def image_bytes(image_format, size=(800, 600)):
+    out = io.BytesIO()
+    Image.new('RGB', size, 'teal').save(out, image_format)
+    return out.getvalue()
+
+
+class ExpenseSlipTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clerk = finance_user('clerk', 'create')
+        cls.department = Department.objects.create(name='Sales')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, EXPENSE_SLIP_THUMBNAIL_SIZE=64)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.clerk)
+
+    def add_expense(self, slip):
+        return self.client.post('/expense/api/create/', {
+            'date': '2026-01-05', 'amount': '12.50', 'description': 'Taxi', 'user': self.clerk.id,
+            'department': self.department.id, 'expense_slip': slip,
+        }, format='multipart')
+
+    def expense_with_slip(self, content, name='slip.png'):
+        expense = Expense(date=date(2026, 1, 5), amount=Decimal('1.00'), description='Slip', user=self.clerk,
+                          department=self.department, slip_status='Pending')
+        expense.expense_slip.save(name, SimpleUploadedFile(name, content), save=False)
+        expense.save()
+        return expense
+
+    def test_sniff_slip_type(self):
+        for content, expected in (
+            (image_bytes('JPEG'), 'JPEG'),
+            (image_bytes('PNG'), 'PNG'),
+            (image_bytes('WEBP'), 'WebP'),
+            (image_bytes('GIF'), None),
+            (b'%PDF-1.7 not an image', None),
+        ):
+            with self.subTest(expected=expected):
+                upload = SimpleUploadedFile('slip', content)
+                self.assertEqual(sniff_slip_type(upload), expected)
+                self.assertEqual(upload.tell(), 0)  # Left at the start for storage
+
+    def test_upload_accepted_and_queued(self):
+        response = self.add_expense(SimpleUploadedFile('slip.png', image_bytes('PNG')))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['slip_status'], 'Pending')
+
+    def test_upload_of_another_type_is_rejected(self):
+        response = self.add_expense(SimpleUploadedFile('slip.gif', image_bytes('GIF')))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_upload_over_the_limit_is_413(self):
+        content = image_bytes('PNG')
+        with override_settings(EXPENSE_SLIP_MAX_BYTES=len(content) - 1):
+            response = self.add_expense(SimpleUploadedFile('slip.png', content))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_make_thumbnails_marks_ready_and_failed(self):
+        good = self.expense_with_slip(image_bytes('JPEG'), 'good.jpg')
+        broken = self.expense_with_slip(b'\x89PNG\r\n\x1a\n but truncated', 'broken.png')
+
+        self.assertEqual(make_thumbnails(), {'ready': 1, 'failed': 1})
+
+        good.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(good.slip_status, 'Ready')
+        with good.slip_thumbnail.open('rb'), Image.open(good.slip_thumbnail) as thumbnail:
+            self.assertEqual(thumbnail.format, 'JPEG')
+            self.assertLessEqual(max(thumbnail.size), 64)
+        self.assertEqual(broken.slip_status, 'Failed')
+        self.assertFalse(broken.slip_thumbnail)
+
+        self.assertEqual(make_thumbnails(), {'ready': 0, 'failed': 0})
+
+    def test_make_thumbnails_removes_files_when_the_update_fails(self):
+        expense = self.expense_with_slip(image_bytes('PNG'))
+        storage = expense.slip_thumbnail.storage
+
+        with mock.patch.object(Expense.objects, 'bulk_update', side_effect=RuntimeError('lost connection')):
+            with self.assertRaises(RuntimeError):
+                make_thumbnails()
+
+        expense.refresh_from_db()
+        self.assertEqual(expense.slip_status, 'Pending')
+        self.assertFalse(storage.exists(f'expense_slips/thumbnails/{expense.id}.jpg'))
+
+        self.assertEqual(make_thumbnails(), {'ready': 1, 'failed': 0})
+        expense.refresh_from_db()
+        self.assertEqual(expense.slip_thumbnail.name, f'expense_slips/thumbnails/{expense.id}.jpg')
+
+    def test_slip_urls_fall_back_to_the_original(self):
+        expense = self.expense_with_slip(image_bytes('PNG'))
+        original = expense.expense_slip.url
+        self.assertEqual(slip_urls(expense), {'expense_slip': original, 'expense_slip_original': original})
+
+        make_thumbnails()
+        expense.refresh_from_db()
+        self.assertEqual(slip_urls(expense), {
+            'expense_slip': expense.slip_thumbnail.url, 'expense_slip_original': original,
+        })
+
+        expense.expense_slip = expense.slip_thumbnail = None
+        self.assertEqual(slip_urls(expense), {'expense_slip': None, 'expense_slip_original': None})
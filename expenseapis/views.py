@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -5,41 +7,88 @@ from django.shortcuts import get_object_or_404
 from ufcmsdb.models import Expense, CustomUser, Department, Role
 from datetime import datetime
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from ufcmsdb.authentication import CachedTokenAuthentication
+from ufcmsdb.permissions import user_has_permission
+from ufcmsdb.pagination import InvalidPageRequest, keyset_page, page_size
+from ufcmsdb.streaming import EXPORT_FORMATS, streaming_export
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+from decimal import Decimal
+from .slips import SLIP_TYPES, SlipUploadHandler, slip_urls, sniff_slip_type
 
 
-# Helper function to check user permissions
-def has_permission(user, module, action):
+EXPENSE_EXPORT_FIELDS = (
+    'id', 'date', 'amount', 'description', 'user_id', 'user__first_name', 'user__last_name',
+    'department_id', 'department__name', 'expense_slip',
+)
+
+
+def filtered_expenses(request):
     """
-    Check if the user has permission for a specific module and action.
+    Expenses filtered by ``date_from``, ``date_to``, ``department_id`` and
+    ``user_id``. Returns ``(queryset, error_response)``.
     """
-    if not user or not user.role.exists():
-        return False  # No role assigned
-    
-    # Get all roles assigned to the user
-    user_roles = user.role.all()
+    expenses = Expense.objects.all()
+
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                parsed = parse_date(value)
+            except ValueError:  # Well formed but impossible, e.g. 2026-02-30
+                parsed = None
+            if not parsed:
+                return None, Response({"error": f"Invalid {param}. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+            expenses = expenses.filter(**{lookup: parsed})
 
-    # Check if any assigned role has the required permission
-    for role in user_roles:
-        for permission in role.permissions.all():
-            if permission.module == module and action in permission.action:
-                return True
-    return False
+    for param in ('department_id', 'user_id'):
+        value = request.query_params.get(param)
+        if value:
+            if not value.isdigit():
+                return None, Response({"error": f"Invalid {param}."}, status=status.HTTP_400_BAD_REQUEST)
+            expenses = expenses.filter(**{param: value})
+
+    return expenses, None
 
 
 class GetAllExpenseView(APIView):
     """
-    Retrieve all expenses.
-    Only users with 'read' permission for 'financial_management' can access this.
+    Retrieve the expense ledger, newest first.
+    Only users with 'read' permission for 'finance_management' can access this.
+
+    Filters: ``date_from``, ``date_to``, ``department_id``, ``user_id``.
+    Paginated by ``(date, id)`` using ``limit`` and the returned ``next_cursor``;
+    ``?export=csv`` or ``?export=ndjson`` streams every matching expense instead.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        if not has_permission(request.user, "finance_management", "read"):
+        if not user_has_permission(request.user, "read", "finance_management"):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        expenses = Expense.objects.all()
+        expenses, error = filtered_expenses(request)
+        if error:
+            return error
+
+        export_format = request.query_params.get('export')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response({"error": f"export must be one of: {', '.join(EXPORT_FORMATS)}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return streaming_export(export_format, expenses.order_by('-date', '-id'), EXPENSE_EXPORT_FIELDS, 'expenses')
+
+        try:
+            expenses, next_cursor = keyset_page(
+                expenses.select_related('user', 'department').prefetch_related('user__role'),
+                ('-date', '-id'),
+                cursor=request.query_params.get('cursor'),
+                limit=page_size(request),
+            )
+        except InvalidPageRequest as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         data = [
             {
                 "id": expense.id,
@@ -47,30 +96,81 @@ class GetAllExpenseView(APIView):
                 "amount": expense.amount,
                 "description": expense.description,
                 "user_id": expense.user.id,
-                "user_name": expense.user.name,
+                "user_name": f"{expense.user.first_name} {expense.user.last_name}",
                 "department_id": expense.department.id,
                 "department_name": expense.department.name,
                 "user_role": ", ".join([role.name for role in expense.user.role.all()]),
-                "expense_slip": expense.expense_slip.url if expense.expense_slip else None,
+                **slip_urls(expense),
             }
             for expense in expenses
         ]
-        return Response(data, status=status.HTTP_200_OK)
+        return Response({"expenses": data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
+class ExpenseSummaryView(APIView):
+    """
+    Expense totals per department per month, aggregated in the database.
+    Accepts the same filters as the ledger.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not user_has_permission(request.user, "read", "finance_management"):
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        expenses, error = filtered_expenses(request)
+        if error:
+            return error
+
+        totals = list(
+            expenses.annotate(month=TruncMonth('date'))
+            .values('department_id', 'department__name', 'month')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by('month', 'department__name')
+        )
+        data = [
+            {
+                "department_id": row['department_id'],
+                "department_name": row['department__name'],
+                "month": row['month'].strftime('%Y-%m'),
+                "total": row['total'],
+                "count": row['count'],
+            }
+            for row in totals
+        ]
+        return Response({
+            "totals": data,
+            "grand_total": sum((row['total'] for row in totals), Decimal('0')),
+        }, status=status.HTTP_200_OK)
 
 
 class AddExpenseView(APIView):
     """
     Create a new expense.
     Only users with 'create' permission for 'finance_management' can perform this action.
+
+    ``expense_slip`` is an optional multipart file (JPEG, PNG or WebP, at most
+    ``EXPENSE_SLIP_MAX_BYTES``); its thumbnail is generated in the background.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        if not has_permission(request.user, "finance_management", "create"):
+        if not user_has_permission(request.user, "create", "finance_management"):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
+        # Must be installed before request.data parses the body
+        slip_handler = SlipUploadHandler(request)
+        request.upload_handlers.insert(0, slip_handler)
+
         data = request.data
+        if slip_handler.too_large:
+            return Response(
+                {"error": f"Expense slip must be {filesizeformat(settings.EXPENSE_SLIP_MAX_BYTES)} or less."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
         required_fields = ['date', 'amount', 'description', 'user', 'department']
         missing_fields = [field for field in required_fields if field not in data]
 
@@ -105,8 +205,11 @@ class AddExpenseView(APIView):
             if len(data['description']) > 200:
                 return Response({"error": "Description must be 200 characters or less."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Handle optional expense_slip
-            expense_slip = data.get('expense_slip', None)
+            # Handle optional expense_slip; only the first bytes are read to check the type
+            expense_slip = request.FILES.get('expense_slip')
+            if expense_slip and not sniff_slip_type(expense_slip):
+                return Response({"error": f"Expense slip must be a {', '.join(SLIP_TYPES[:-1])} or {SLIP_TYPES[-1]} image."},
+                                status=status.HTTP_400_BAD_REQUEST)
 
             # Create the expense
             expense = Expense.objects.create(
@@ -116,6 +219,7 @@ class AddExpenseView(APIView):
                 user=user,
                 department=department,
                 expense_slip=expense_slip,
+                slip_status='Pending' if expense_slip else None,
             )
 
             response_data = {
@@ -128,6 +232,7 @@ class AddExpenseView(APIView):
                 "department_id": expense.department.id,
                 "department_name": expense.department.name,
                 "expense_slip": expense.expense_slip.url if expense.expense_slip else None,
+                "slip_status": expense.slip_status,
             }
             return Response(response_data, status=status.HTTP_201_CREATED)
 
@@ -140,11 +245,11 @@ class DeleteExpenseView(APIView):
     Delete an expense.
     Only users with 'delete' permission for 'finance_management' can perform this action.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, expense_id):
-        if not has_permission(request.user, "finance_management", "delete"):
+        if not user_has_permission(request.user, "delete", "finance_management"):
             return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         try:
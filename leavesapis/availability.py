@@ -0,0 +1,20 @@
+from django.db import connection
+from django.db.models import Value
+
+from ufcmsdb.expressions import DateRange, RangeOverlaps
+from ufcmsdb.models import Leave
+
+
+def leaves_overlapping(date_from, date_to):
+    """
+    Non-rejected leaves with at least one day between ``date_from`` and
+    ``date_to`` inclusive. On PostgreSQL the condition is written exactly
+    like ``leave_period_gist_idx`` so the planner can use it instead of
+    scanning the whole leave history.
+    """
+    leaves = Leave.objects.exclude(status='Rejected')
+    if connection.vendor == 'postgresql':
+        return leaves.filter(RangeOverlaps(
+            DateRange('leave_from', 'leave_to'), DateRange(Value(date_from), Value(date_to))
+        ))
+    return leaves.filter(leave_from__lte=date_to, leave_to__gte=date_from)
@@ -0,0 +1,105 @@
+"""
+Leave balance ledger.
+
+Balances change only through ``debit`` and ``credit``. Each runs a single
+conditional ``UPDATE ... SET balance = balance +/- n`` (the row lock it
+takes serialises concurrent requests for the same user), reads the new
+balances back under that lock and appends a ``LeaveLedgerEntry``.
+``leave_balance`` serves a cached projection that is dropped on commit;
+``invalidate_all_balances`` orphans every cached entry after a bulk reset.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from ufcmsdb.models import CustomUser, Leave, LeaveLedgerEntry
+
+# Seconds. Entries are dropped on every balance change; the timeout bounds how long a
+# read that raced a commit can keep serving the old value.
+BALANCE_CACHE_TIMEOUT = 60
+
+
+class InsufficientLeaveBalance(ValueError):
+    """Raised when a debit would take a balance below zero."""
+
+
+def _balance_key(user_id):
+    version = cache.get_or_set('leave-balance:version', lambda: now().timestamp(), None)
+    return f'leave-balance:{version}:{user_id}'
+
+
+def invalidate_all_balances():
+    """Drop every cached balance, e.g. after a set-based reset."""
+    cache.set('leave-balance:version', now().timestamp(), None)
+
+
+def _balances(user_id):
+    return CustomUser.objects.filter(id=user_id).values('monthly_leave_balance', 'yearly_leave_balance').get()
+
+
+def _record(user_id, leave, entry_type, days, note):
+    balances = _balances(user_id)
+    entry = LeaveLedgerEntry.objects.create(
+        user_id=user_id,
+        leave=leave,
+        entry_type=entry_type,
+        days=days,
+        monthly_balance=balances['monthly_leave_balance'],
+        yearly_balance=balances['yearly_leave_balance'],
+        note=note,
+    )
+    transaction.on_commit(lambda: cache.delete(_balance_key(user_id)))
+    return entry
+
+
+def debit(user_id, days, leave=None, note=''):
+    """
+    Take ``days`` from both balances, or raise ``InsufficientLeaveBalance``
+    without changing anything. Must run inside a transaction.
+    """
+    updated = CustomUser.objects.filter(
+        id=user_id, monthly_leave_balance__gte=days, yearly_leave_balance__gte=days
+    ).update(
+        monthly_leave_balance=F('monthly_leave_balance') - days,
+        yearly_leave_balance=F('yearly_leave_balance') - days,
+    )
+    if not updated:
+        balances = _balances(user_id)
+        period = 'monthly' if balances['monthly_leave_balance'] < days else 'yearly'
+        raise InsufficientLeaveBalance(f"Not enough {period} leave balance.")
+    return _record(user_id, leave, 'Debit', days, note)
+
+
+def credit(user_id, days, leave=None, note=''):
+    """Give ``days`` back to both balances. Must run inside a transaction."""
+    CustomUser.objects.filter(id=user_id).update(
+        monthly_leave_balance=F('monthly_leave_balance') + days,
+        yearly_leave_balance=F('yearly_leave_balance') + days,
+    )
+    return _record(user_id, leave, 'Credit', days, note)
+
+
+@transaction.atomic
+def apply_for_leave(user_id, leave_type, leave_from, leave_to, reason):
+    """
+    Create a pending leave and debit its days in one transaction.
+    Returns the leave and the ledger entry holding the new balances.
+    """
+    leave_days = (leave_to - leave_from).days + 1
+    leave = Leave.objects.create(
+        user_id=user_id,
+        leave_type=leave_type,
+        leave_from=leave_from,
+        leave_to=leave_to,
+        reason=reason,
+        status='Pending',  # Set initial status to Pending
+        leave_days=leave_days
+    )
+    entry = debit(user_id, leave_days, leave=leave, note='Leave applied')
+    return leave, entry
+
+
+def leave_balance(user_id):
+    """Current balances as ``{'monthly_leave_balance', 'yearly_leave_balance'}``, from the cache when possible."""
+    return cache.get_or_set(_balance_key(user_id), lambda: _balances(user_id), BALANCE_CACHE_TIMEOUT)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from leavesapis.resets import PERIODS, reset_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Refill leave balances for the current month or year in one UPDATE. "
+        "Safe to schedule daily: each period is only reset once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', action='append', dest='periods', choices=PERIODS,
+                            help="Period to reset (repeatable; default: both).")
+        parser.add_argument('--date', help="Reset the periods containing this YYYY-MM-DD date instead of today.")
+
+    def handle(self, *args, periods=None, date=None, **options):
+        today = None
+        if date:
+            today = parse_date(date)
+            if not today:
+                raise CommandError("Invalid --date. Use YYYY-MM-DD.")
+
+        # Yearly first, so a January 1st monthly reset sees the refilled yearly balance
+        for period in sorted(periods or PERIODS, key=lambda p: p != 'year'):
+            run = reset_balances(period, today)
+            if run:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{period.capitalize()} starting {run.period_start}: reset {run.users_updated} users."
+                ))
+            else:
+                self.stdout.write(f"{period.capitalize()} already reset; nothing to do.")
@@ -0,0 +1,57 @@
+"""
+Monthly and yearly leave balance resets.
+
+Each reset is one set-based UPDATE over every active user, committed
+together with a ``LeaveResetRun`` row. The unique (period, period_start)
+constraint on that row makes a second run for the same period a no-op,
+so the job can be scheduled as often as convenient.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils.timezone import now
+
+from ufcmsdb.models import CustomUser, LeaveResetRun
+from .ledger import invalidate_all_balances
+
+PERIODS = ('month', 'year')
+
+
+def period_start(period, today=None):
+    today = today or date.today()
+    return today.replace(day=1) if period == 'month' else today.replace(month=1, day=1)
+
+
+def reset_balances(period, today=None):
+    """
+    Reset balances for the period containing ``today``. Returns the
+    ``LeaveResetRun``, or None if that period has already been reset.
+
+    A yearly reset refills both balances. A monthly reset refills the
+    monthly balance but never above what is left of the yearly one.
+    """
+    started_at = now()
+    if period == 'year':
+        changes = {
+            'yearly_leave_balance': settings.YEARLY_LEAVE_ALLOWANCE,
+            'monthly_leave_balance': min(settings.MONTHLY_LEAVE_ALLOWANCE, settings.YEARLY_LEAVE_ALLOWANCE),
+        }
+    else:
+        changes = {'monthly_leave_balance': Least(Value(settings.MONTHLY_LEAVE_ALLOWANCE), F('yearly_leave_balance'))}
+
+    try:
+        with transaction.atomic():
+            # Claim the period first: a concurrent run blocks here, then fails on the constraint
+            run = LeaveResetRun.objects.create(
+                period=period, period_start=period_start(period, today), started_at=started_at
+            )
+            run.users_updated = CustomUser.objects.filter(is_active=True).update(**changes)
+            run.save(update_fields=['users_updated'])
+    except IntegrityError:
+        return None
+
+    invalidate_all_balances()
+    return run
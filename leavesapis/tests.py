@@ -0,0 +1,174 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from leavesapis.ledger import InsufficientLeaveBalance, apply_for_leave
+from ufcmsdb.models import CustomUser, Department, Leave, LeaveLedgerEntry, Permission, Role
+
+THREADS = 8
+
+
+def run_together(fn, count):
+    """Call ``fn(i)`` from ``count`` threads released at the same moment; returns the results in order."""
+    barrier = threading.Barrier(count)
+
+    def call(i):
+        try:
+            barrier.wait(10)
+            return fn(i)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(call, range(count)))
+
+
+class LeaveLedgerConcurrencyTests(TransactionTestCase):
+    """Threads need committed rows, so these run outside a test transaction."""
+
+    def setUp(self):
+        self.employee = CustomUser.objects.create(
+            username='employee', email='employee@example.com', monthly_leave_balance=3, yearly_leave_balance=3,
+        )
+
+    def assertBalances(self, monthly, yearly):
+        self.employee.refresh_from_db()
+        self.assertEqual((self.employee.monthly_leave_balance, self.employee.yearly_leave_balance), (monthly, yearly))
+        # Every balance the ledger recorded along the way stayed at or above zero
+        self.assertFalse(LeaveLedgerEntry.objects.filter(user=self.employee, monthly_balance__lt=0).exists())
+        self.assertFalse(LeaveLedgerEntry.objects.filter(user=self.employee, yearly_balance__lt=0).exists())
+
+    def test_concurrent_debits_never_overdraw(self):
+        def apply(i):
+            try:
+                apply_for_leave(self.employee.id, 'Casual', date.today(), date.today(), f'Request {i}')
+                return 'applied'
+            except InsufficientLeaveBalance:
+                return 'refused'
+
+        results = run_together(apply, THREADS)
+
+        self.assertEqual(results.count('applied'), 3)
+        self.assertEqual(results.count('refused'), THREADS - 3)
+        self.assertBalances(0, 0)
+        self.assertEqual(Leave.objects.filter(user=self.employee).count(), 3)
+        self.assertEqual(LeaveLedgerEntry.objects.filter(user=self.employee, entry_type='Debit').count(), 3)
+
+    def test_concurrent_decisions_act_once(self):
+        approver = CustomUser.objects.create(username='approver', email='approver@example.com')
+        role = Role.objects.create(name='Approver')
+        role.permissions.add(Permission.objects.create(module='leave', action='update'))
+        approver.role.add(role)
+        leave, _ = apply_for_leave(self.employee.id, 'Casual', date.today(), date.today(), 'Day off')
+        self.assertBalances(2, 2)
+
+        def decide(i):
+            client = APIClient()
+            client.force_authenticate(approver)
+            action = 'reject' if i % 2 else 'approve'
+            response = client.post('/leave/api/update-status/', {
+                'leave_id': leave.id, 'action': action, 'approved_by': approver.id,
+            }, format='json')
+            return response.status_code, action
+
+        results = run_together(decide, THREADS)
+
+        decided = [action for status, action in results if status == 200]
+        self.assertEqual(len(decided), 1)
+        self.assertEqual([status for status, _ in results].count(400), THREADS - 1)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, 'Rejected' if decided[0] == 'reject' else 'Approved')
+        # Only a rejection gives the day back, and only once
+        credits = LeaveLedgerEntry.objects.filter(user=self.employee, entry_type='Credit').count()
+        if decided[0] == 'reject':
+            self.assertEqual(credits, 1)
+            self.assertBalances(3, 3)
+        else:
+            self.assertEqual(credits, 0)
+            self.assertBalances(2, 2)
+
+
+class TeamAvailabilityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = Department.objects.create(name='Sales')
+        cls.support = Department.objects.create(name='Support')
+        cls.manager = CustomUser.objects.create(username='manager', email='manager@example.com')
+        role = Role.objects.create(name='Manager')
+        role.permissions.add(Permission.objects.create(module='leave', action='read'))
+        cls.manager.role.add(role)
+        cls.ali = CustomUser.objects.create(username='ali', email='ali@example.com', department=cls.sales)
+        cls.sara = CustomUser.objects.create(username='sara', email='sara@example.com', department=cls.support)
+
+        def leave(user, leave_from, leave_to, status):
+            return Leave.objects.create(user=user, leave_type='Other', leave_from=leave_from, leave_to=leave_to,
+                                        status=status, reason='Away')
+
+        cls.approved = leave(cls.ali, date(2026, 3, 10), date(2026, 3, 12), 'Approved')
+        cls.pending = leave(cls.sara, date(2026, 3, 11), date(2026, 3, 11), 'Pending')
+        cls.rejected = leave(cls.sara, date(2026, 3, 10), date(2026, 3, 12), 'Rejected')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def leave_ids(self, date_from, date_to, **params):
+        response = self.client.get('/leave/api/availability/', {'date_from': date_from, 'date_to': date_to, **params})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['users_off'], len({leave['user_id'] for leave in data['leaves']}))
+        return [leave['id'] for leave in data['leaves']]
+
+    def test_window_touching_either_end_of_a_leave(self):
+        for date_from, date_to, expected in (
+            ('2026-03-01', '2026-03-10', [self.approved.id]),  # Ends on leave_from
+            ('2026-03-12', '2026-03-20', [self.approved.id]),  # Starts on leave_to
+            ('2026-03-10', '2026-03-10', [self.approved.id]),
+            ('2026-03-12', '2026-03-12', [self.approved.id]),
+            ('2026-03-01', '2026-03-09', []),
+            ('2026-03-13', '2026-03-20', []),
+        ):
+            with self.subTest(date_from=date_from, date_to=date_to):
+                self.assertEqual(self.leave_ids(date_from, date_to), expected)
+
+    def test_include_pending(self):
+        for value, expected in (('1', [self.approved.id, self.pending.id]),
+                                ('true', [self.approved.id, self.pending.id]),
+                                ('0', [self.approved.id])):
+            with self.subTest(include_pending=value):
+                self.assertEqual(self.leave_ids('2026-03-11', '2026-03-11', include_pending=value), expected)
+
+    def test_rejected_leaves_are_never_listed(self):
+        self.assertNotIn(self.rejected.id, self.leave_ids('2026-03-01', '2026-03-31', include_pending='1'))
+
+    def test_department_filter(self):
+        self.assertEqual(self.leave_ids('2026-03-01', '2026-03-31', include_pending='1', department_id=self.sales.id),
+                         [self.approved.id])
+        self.assertEqual(self.leave_ids('2026-03-01', '2026-03-31', include_pending='1', department_id=self.support.id),
+                         [self.pending.id])
+
+    def test_invalid_requests(self):
+        for params in ({'date_to': '2026-03-10'}, {'date_from': '2026-03-10'},
+                       {'date_from': '2026-02-30', 'date_to': '2026-03-10'},
+                       {'date_from': '2026-03-10', 'date_to': 'tomorrow'},
+                       {'date_from': '2026-03-10', 'date_to': '2026-03-09'},
+                       {'date_from': '2026-03-10', 'date_to': '2026-03-10', 'department_id': 'sales'}):
+            with self.subTest(params=params):
+                response = self.client.get('/leave/api/availability/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('message', response.json())
+
+    def test_requires_leave_read(self):
+        self.client.force_authenticate(self.ali)
+        response = self.client.get('/leave/api/availability/', {'date_from': '2026-03-10', 'date_to': '2026-03-10'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_reversed_period_cannot_be_stored(self):
+        with self.assertRaises(IntegrityError):
+            Leave.objects.create(user=self.ali, leave_type='Other', leave_from=date(2026, 3, 12),
+                                 leave_to=date(2026, 3, 10), reason='Backwards')
@@ -1,11 +1,14 @@
 from django.urls import path
-from .views import ApplyLeaveView , ApproveRejectLeaveView , UserLeaveRecordsView , GetAllLeavesView
+from .views import ApplyLeaveView , ApproveRejectLeaveView , UserLeaveRecordsView , GetAllLeavesView , LeaveBalanceView , TeamAvailabilityView
 
 urlpatterns = [
     path('apply/', ApplyLeaveView.as_view(), name='apply-leave'),
     path('update-status/', ApproveRejectLeaveView.as_view(), name='approve-leave'),
     path('<int:user_id>/', UserLeaveRecordsView.as_view(), name='user-leaves'),
     path('get-all/', GetAllLeavesView.as_view(), name='list-leaves'),
+    path('availability/', TeamAvailabilityView.as_view(), name='team-availability'),
+    path('balance/', LeaveBalanceView.as_view(), name='my-leave-balance'),
+    path('balance/<int:user_id>/', LeaveBalanceView.as_view(), name='user-leave-balance'),
 
 
 
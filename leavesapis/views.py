@@ -5,15 +5,20 @@ from django.utils.timezone import now, activate
 from datetime import datetime
 from datetime import timedelta, date 
 from rest_framework.exceptions import NotFound
-from rest_framework.authentication import TokenAuthentication
+from ufcmsdb.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from ufcmsdb.models import Leave, CustomUser  # Adjust the import to match your project structure
+from ufcmsdb.permissions import user_has_permission
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from .availability import leaves_overlapping
+from .ledger import InsufficientLeaveBalance, apply_for_leave, credit, leave_balance
 
 class ApplyLeaveView(APIView):
     """
     View for applying for a leave.
     """
-    authentication_classes = [TokenAuthentication]  # Use token authentication
+    authentication_classes = [CachedTokenAuthentication]  # Use token authentication
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
 
     def post(self, request):
@@ -21,7 +26,7 @@ class ApplyLeaveView(APIView):
         user = request.user  # Get the authenticated user from the token
 
         # Check if the user has permission to apply for leave
-        has_permission = user.role.filter(permissions__action="create", permissions__module="leave").exists()
+        has_permission = user_has_permission(user, "create", "leave")
         if not has_permission:
             return Response({"message": "You do not have permission to apply for leave."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -42,40 +47,21 @@ class ApplyLeaveView(APIView):
         except ValueError:
             return Response({"message": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate leave days
-        leave_days = (leave_to_date - leave_from_date).days + 1
+        if leave_to_date < leave_from_date:
+            return Response({"message": "leave_to must not be before leave_from."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check leave balances
-        if leave_days > user.monthly_leave_balance:
-            return Response({"message": "Not enough monthly leave balance."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if leave_days > user.yearly_leave_balance:
-            return Response({"message": "Not enough yearly leave balance."}, status=status.HTTP_400_BAD_REQUEST)
-
-
-        # Create leave record
-        leave = Leave(
-            user=user,
-            leave_type=leave_type,
-            leave_from=leave_from_date,
-            leave_to=leave_to_date,
-            reason=reason,
-            status='Pending',  # Set initial status to Pending
-            leave_days=leave_days
-        )
-        leave.save()
-
-        # Deduct leave days from balances
-        user.monthly_leave_balance -= leave_days
-        user.yearly_leave_balance -= leave_days
-        user.save()
+        # Create the leave and deduct its days from both balances atomically
+        try:
+            leave, entry = apply_for_leave(user.id, leave_type, leave_from_date, leave_to_date, reason)
+        except InsufficientLeaveBalance as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             "message": "Leave applied successfully.",
             "leave_id": leave.id,
-            "leave_days": leave_days,
-            "monthly_leave_balance": user.monthly_leave_balance,
-            "yearly_leave_balance": user.yearly_leave_balance
+            "leave_days": leave.leave_days,
+            "monthly_leave_balance": entry.monthly_balance,
+            "yearly_leave_balance": entry.yearly_balance
         }, status=status.HTTP_201_CREATED)
 
 
@@ -83,7 +69,7 @@ class ApproveRejectLeaveView(APIView):
     """
     View for approving or rejecting leave requests.
     """
-    authentication_classes = [TokenAuthentication]  # Use token authentication
+    authentication_classes = [CachedTokenAuthentication]  # Use token authentication
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
 
     def post(self, request):
@@ -91,7 +77,7 @@ class ApproveRejectLeaveView(APIView):
         user = request.user  # Get the authenticated user from the token
 
         # Check if the user has permission to approve/reject leave
-        has_permission = user.role.filter(permissions__action="update", permissions__module="leave").exists()
+        has_permission = user_has_permission(user, "update", "leave")
         if not has_permission:
             return Response({"message": "You do not have permission to approve or reject leave requests."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -102,11 +88,6 @@ class ApproveRejectLeaveView(APIView):
         if not leave_id or not action or not approved_by_id:
             return Response({"message": "Leave ID, action, and approver's user ID are required."}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            leave = Leave.objects.get(id=leave_id)  # Retrieve the leave object
-        except Leave.DoesNotExist:
-            return Response({"message": "Invalid Leave ID."}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
             approver = CustomUser.objects.get(id=approved_by_id)  # Retrieve the approver user object
         except CustomUser.DoesNotExist:
@@ -116,32 +97,25 @@ class ApproveRejectLeaveView(APIView):
         if action not in ['approve', 'reject']:
             return Response({"message": "Action must be 'approve' or 'reject'."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update leave status and balances based on action
-        if action == 'approve':
-            leave.status = 'Approved'
-            leave.approved_by = approver.username  # Store approver's username
-            leave.approved_date = date.today()
-            leave.approved_time = datetime.now().time()
-            
-            # Deduct leave days from balances if not already deducted
-            if leave.leave_days <= leave.user.monthly_leave_balance:
-                leave.user.monthly_leave_balance -= leave.leave_days
-            else:
-                return Response({"message": "Not enough monthly leave balance."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            if leave.leave_days <= leave.user.yearly_leave_balance:
-                leave.user.yearly_leave_balance -= leave.leave_days
-            else:
-                return Response({"message": "Not enough yearly leave balance."}, status=status.HTTP_400_BAD_REQUEST)
-
-            leave.user.save()
-        else:
-            leave.status = 'Rejected'
+        with transaction.atomic():
+            # Lock the leave so two decisions can't both act on it
+            try:
+                leave = Leave.objects.select_for_update().get(id=leave_id)  # Retrieve the leave object
+            except Leave.DoesNotExist:
+                return Response({"message": "Invalid Leave ID."}, status=status.HTTP_400_BAD_REQUEST)
+
+            if leave.status != 'Pending':
+                return Response({"message": f"Leave has already been {leave.status.lower()}."}, status=status.HTTP_400_BAD_REQUEST)
+
+            # The days were deducted when the leave was applied for; a rejection gives them back
+            leave.status = 'Approved' if action == 'approve' else 'Rejected'
             leave.approved_by = approver.username  # Store approver's username
             leave.approved_date = date.today()
             leave.approved_time = datetime.now().time()
+            if action == 'reject':
+                credit(leave.user_id, leave.leave_days, leave=leave, note='Leave rejected')
 
-        leave.save()
+            leave.save(update_fields=['status', 'approved_by', 'approved_date', 'approved_time'])
 
         return Response({
             "message": f"Leave {leave.status.lower()} successfully.",
@@ -156,14 +130,14 @@ class GetAllLeavesView(APIView):
     """
     View to get all leave records.
     """
-    authentication_classes = [TokenAuthentication]  # Use token authentication
+    authentication_classes = [CachedTokenAuthentication]  # Use token authentication
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
 
     def get(self, request):
         user = request.user  # Get the authenticated user from the token
 
         # Check if the user has permission to view all leaves
-        has_permission = user.role.filter(permissions__action="read", permissions__module="leave").exists()
+        has_permission = user_has_permission(user, "read", "leave")
         if not has_permission:
             return Response({"message": "You do not have permission to view all leave records."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -177,14 +151,14 @@ class UserLeaveRecordsView(APIView):
     """
     View to get leave records by user ID.
     """
-    authentication_classes = [TokenAuthentication]  # Use token authentication
+    authentication_classes = [CachedTokenAuthentication]  # Use token authentication
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
 
     def get(self, request, user_id):
         user = request.user  # Get the authenticated user from the token
 
         # Check if the user has permission to view leave records
-        has_permission = user.role.filter(permissions__action="read", permissions__module="leave").exists()
+        has_permission = user_has_permission(user, "read", "leave")
         if not has_permission:
             return Response({"message": "You do not have permission to view leave records."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -195,7 +169,7 @@ class UserLeaveRecordsView(APIView):
             raise NotFound({"message": "User not found."})
 
         # Ensure the user is viewing their own records or has permission to view others' records
-        if user.id != target_user.id and not user.role.filter(permissions__action="read", permissions__module="leave").exists():
+        if user.id != target_user.id and not user_has_permission(user, "read", "leave"):
             return Response({"message": "You do not have permission to view this user's leave records."}, status=status.HTTP_403_FORBIDDEN)
 
         leaves = Leave.objects.filter(user=target_user).values(
@@ -203,4 +177,77 @@ class UserLeaveRecordsView(APIView):
             'approved_by', 'approved_date', 'approved_time', 'leave_days'
         )
 
-        return Response({"user": target_user.username, "leaves": list(leaves)}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({"user": target_user.username, "leaves": list(leaves)}, status=status.HTTP_200_OK)
+
+
+class LeaveBalanceView(APIView):
+    """
+    Current leave balances of the caller, or of ``user_id`` for users with
+    'read' permission for 'leave'. Served from a cached projection.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id=None):
+        user = request.user
+
+        if user_id is None or user_id == user.id:
+            user_id = user.id
+        elif not user_has_permission(user, "read", "leave"):
+            return Response({"message": "You do not have permission to view this user's leave balance."}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            balances = leave_balance(user_id)
+        except CustomUser.DoesNotExist:
+            raise NotFound({"message": "User not found."})
+
+        return Response({"user_id": user_id, **balances}, status=status.HTTP_200_OK)
+
+
+class TeamAvailabilityView(APIView):
+    """
+    Who is off between ``date_from`` and ``date_to`` (inclusive), optionally
+    within ``department_id``. Approved leaves only, unless ``include_pending=1``.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+
+        if not user_has_permission(user, "read", "leave"):
+            return Response({"message": "You do not have permission to view team availability."}, status=status.HTTP_403_FORBIDDEN)
+
+        dates = {}
+        for param in ('date_from', 'date_to'):
+            try:
+                dates[param] = parse_date(request.query_params.get(param) or '')
+            except ValueError:  # Well formed but impossible, e.g. 2026-02-30
+                dates[param] = None
+            if not dates[param]:
+                return Response({"message": f"{param} is required. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if dates['date_to'] < dates['date_from']:
+            return Response({"message": "date_to must not be before date_from."}, status=status.HTTP_400_BAD_REQUEST)
+
+        leaves = leaves_overlapping(dates['date_from'], dates['date_to'])
+
+        department_id = request.query_params.get('department_id')
+        if department_id:
+            if not department_id.isdigit():
+                return Response({"message": "Invalid department_id."}, status=status.HTTP_400_BAD_REQUEST)
+            leaves = leaves.filter(user__department_id=department_id)
+
+        if request.query_params.get('include_pending') not in ('1', 'true'):
+            leaves = leaves.filter(status='Approved')
+
+        leaves = list(leaves.values(
+            'id', 'user_id', 'user__username', 'user__first_name', 'user__last_name', 'user__department_id',
+            'leave_type', 'leave_from', 'leave_to', 'status'
+        ).order_by('leave_from', 'user_id'))
+
+        return Response({
+            "date_from": dates['date_from'],
+            "date_to": dates['date_to'],
+            "users_off": len({leave['user_id'] for leave in leaves}),
+            "leaves": leaves,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projectsapi.summaries import refresh_summaries
+from tasksapis.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild ProjectSummary rows from their projects, e.g. after a bulk import that bypassed signals."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='project_ids',
+                            help="Limit to this project ID (repeatable).")
+
+    def handle(self, *args, project_ids=None, **options):
+        with transaction.atomic():
+            refreshed = refresh_summaries(project_ids)
+            reconcile_counters(project_ids)  # Counters are only copied on insert; fix any drift too
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} project summaries."))
@@ -0,0 +1,110 @@
+"""
+Maintenance of the ``ProjectSummary`` read model.
+
+Signals in ``ufcmsdb.signals`` call ``refresh_summaries`` when a project,
+its team, or a user shown in it changes. Task counters are not rebuilt
+here: ``tasksapis.counters`` moves them on both tables with the same
+``F()`` deltas, so a refresh racing a task write can't overwrite them.
+"""
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast
+
+from tasksapis.counters import COUNTER_FIELDS, project_progress
+from ufcmsdb.fastjson import Fragment
+from ufcmsdb.models import Project, ProjectSummary
+
+# Refreshed from the project on every change; the counters only on insert
+SUMMARY_FIELDS = (
+    'name', 'deadline', 'description', 'leader', 'created_by', 'team_members', 'team_size',
+    'created_at', 'updated_at',
+)
+# JSON columns that listings can pass through without decoding
+SUMMARY_JSON_FIELDS = ('leader', 'created_by', 'team_members')
+# CustomUser fields rendered into summaries
+USER_DISPLAY_FIELDS = {'first_name', 'last_name', 'profile_pic'}
+
+
+def member_data(user):
+    return {
+        'id': user.id,
+        'name': f"{user.first_name} {user.last_name}",
+        'profile_pic': user.profile_pic.url if user.profile_pic else None
+    }
+
+
+def build_summary(project):
+    """Unsaved ``ProjectSummary`` for a project with leader, creator and team loaded."""
+    team = [member_data(member) for member in project.team_members.all()]
+    return ProjectSummary(
+        project=project,
+        name=project.name,
+        deadline=project.deadline,
+        description=project.description,
+        leader=member_data(project.leader) if project.leader else None,
+        created_by={
+            'id': project.created_by.id,
+            'name': f"{project.created_by.first_name} {project.created_by.last_name}"
+        } if project.created_by else None,
+        team_members=team,
+        team_size=len(team),
+        created_at=project.created_at,
+        updated_at=project.updated_at,
+        **{field: getattr(project, field) for field in COUNTER_FIELDS},
+    )
+
+
+def refresh_summaries(project_ids=None):
+    """Upsert summaries for the given projects (all projects if None). Returns the row count."""
+    projects = Project.objects.select_related('leader', 'created_by').prefetch_related('team_members')
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+
+    summaries = [build_summary(project) for project in projects]
+    ProjectSummary.objects.bulk_create(
+        summaries, batch_size=500,
+        update_conflicts=True, unique_fields=['project'], update_fields=SUMMARY_FIELDS,
+    )
+    return len(summaries)
+
+
+def projects_showing_user(user_id):
+    """IDs of projects whose summary mentions the user."""
+    return set(
+        Project.objects.filter(Q(leader_id=user_id) | Q(created_by_id=user_id) | Q(team_members=user_id))
+        .values_list('id', flat=True)
+    )
+
+
+def with_encoded_json(summaries):
+    """
+    Read the JSON columns as text (``<field>_json``) instead of decoded
+    objects; ``summary_payload`` splices them into the response as is.
+    """
+    return summaries.defer(*SUMMARY_JSON_FIELDS).annotate(**{
+        f'{field}_json': Cast(field, TextField()) for field in SUMMARY_JSON_FIELDS
+    })
+
+
+def _json_column(summary, field):
+    if field in summary.get_deferred_fields() and hasattr(summary, f'{field}_json'):
+        encoded = getattr(summary, f'{field}_json')
+        return None if encoded is None else Fragment(encoded)
+    return getattr(summary, field)
+
+
+def summary_payload(summary):
+    """Project list entry, built from the summary row alone."""
+    return {
+        'id': summary.project_id,
+        'name': summary.name,
+        'deadline': summary.deadline,
+        'description': summary.description,
+        'total_tasks': summary.total_tasks,
+        'progress': project_progress(summary),
+        'team_size': summary.team_size,
+        'created_at': summary.created_at,
+        'updated_at': summary.updated_at,
+        'leader': _json_column(summary, 'leader'),
+        'team_members': _json_column(summary, 'team_members'),
+        'created_by': _json_column(summary, 'created_by'),
+    }
@@ -1,25 +1,29 @@
 import json
 from django.views import View
-from rest_framework.authentication import TokenAuthentication
+from ufcmsdb.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from django.http import JsonResponse
 from rest_framework.response import Response
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.dateparse import parse_date
-from ufcmsdb.models import Project, CustomUser
+from ufcmsdb.models import Project, ProjectSummary, CustomUser
 from rest_framework.views import APIView
-def user_has_permission(user, action):
-    return user.role.filter(permissions__action=action, permissions__module="project_management").exists()
+from ufcmsdb.permissions import user_has_permission
+from tasksapis.counters import project_progress
+from .summaries import member_data, summary_payload, with_encoded_json
+from django.db.models import Prefetch, prefetch_related_objects
+from ufcmsdb.pagination import InvalidPageRequest, decode_cursor, encode_cursor, page_size
+
 
 class CreateProjectView(APIView):
-    authentication_classes = [TokenAuthentication]  
+    authentication_classes = [CachedTokenAuthentication]  
     permission_classes = [IsAuthenticated]  
 
     def post(self, request):
         user = request.user  # Get the authenticated user
 
         # **Check if the user has permission to create a project**
-        has_permission = user.role.filter(permissions__action="create", permissions__module="project_management").exists()
+        has_permission = user_has_permission(user, "create", "project_management")
 
         if not has_permission:
             return JsonResponse({'error': 'You do not have permission to create a project.'}, status=403)
@@ -102,7 +106,7 @@ class CreateProjectView(APIView):
 
 
 class GetProjectDetailsView(APIView):
-    authentication_classes = [TokenAuthentication]  # Ensures authentication
+    authentication_classes = [CachedTokenAuthentication]  # Ensures authentication
     permission_classes = [IsAuthenticated]  # Restricts access to authenticated users
 
     def get(self, request, project_id=None):
@@ -111,7 +115,7 @@ class GetProjectDetailsView(APIView):
                 return JsonResponse({'error': 'Project ID is required.'}, status=400)
 
             user = request.user
-            if not user_has_permission(user, "read"):
+            if not user_has_permission(user, "read", "project_management"):
                 return JsonResponse({'error': 'You do not have permission to view project details.'}, status=403)
 
             project = Project.objects.prefetch_related('team_members', 'leader').get(id=project_id)
@@ -122,6 +126,7 @@ class GetProjectDetailsView(APIView):
                 'deadline': project.deadline,
                 'description': project.description,
                 'total_tasks': project.total_tasks,
+                'progress': project_progress(project),
                 'created_at': project.created_at,
                 'updated_at': project.updated_at,
                 'leader': {
@@ -146,52 +151,78 @@ class GetProjectDetailsView(APIView):
             return JsonResponse({'error': f'An unexpected error occurred: {str(e)}'}, status=500)
 
 class GetAllProjectsView(APIView):
-    authentication_classes = [TokenAuthentication]  
+    """
+    List every project from the ``ProjectSummary`` read model: one scan of
+    one table, with leader, creator, team and progress already rendered.
+    The JSON columns are read as text and spliced into the response undecoded.
+    """
+    authentication_classes = [CachedTokenAuthentication]  
     permission_classes = [IsAuthenticated]  
 
     def get(self, request):
         try:
             user = request.user
-            if not user_has_permission(user, "read"):
+            if not user_has_permission(user, "read", "project_management"):
                 return Response({'error': 'You do not have permission to view projects.'}, status=403)
 
-            projects = Project.objects.prefetch_related('team_members', 'leader').all()
-            response_data = []
-
-            for project in projects:
-                project_data = {
-                    'id': project.id,
-                    'name': project.name,
-                    'deadline': project.deadline,
-                    'description': project.description,
-                    'total_tasks': project.total_tasks,
-                    'created_at': project.created_at,
-                    'updated_at': project.updated_at,
-                    'leader': {
-                        'id': project.leader.id,
-                        'name': f"{project.leader.first_name} {project.leader.last_name}",
-                        'profile_pic': project.leader.profile_pic.url if project.leader.profile_pic else None
-                    },
-                    'team_members': [
-                        {
-                            'id': member.id,
-                            'name': f"{member.first_name} {member.last_name}",
-                            'profile_pic': member.profile_pic.url if member.profile_pic else None
-                        }
-                        for member in project.team_members.all()
-                    ],
-                    'created_by': {
-                        'id': project.created_by.id,
-                        'name': f"{project.created_by.first_name} {project.created_by.last_name}"
-                    } if project.created_by else None
-                }
-                response_data.append(project_data)
+            summaries = with_encoded_json(ProjectSummary.objects.order_by('project_id'))
+            response_data = [summary_payload(summary) for summary in summaries]
 
             return Response({'projects': response_data}, status=200)
 
         except Exception as e:
             return Response({'error': f'An unexpected error occurred: {str(e)}'}, status=500)
 
+class MyProjectsView(APIView):
+    """
+    Projects the caller leads or belongs to, ordered by ID and paginated
+    with ``limit`` and the returned ``next_cursor``.
+    Each page is one UNION query plus one query for the team members.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        try:
+            limit = page_size(request)
+            cursor = request.query_params.get('cursor')
+            after_id = decode_cursor(cursor, 1, [Project._meta.pk])[0] if cursor else 0
+        except InvalidPageRequest as e:
+            return Response({'error': str(e)}, status=400)
+
+        # The cursor bound goes into both halves: a UNION can't be filtered afterwards
+        led = user.led_projects.filter(id__gt=after_id).select_related('leader')
+        joined = user.projects.filter(id__gt=after_id).select_related('leader')
+        projects = list(led.union(joined).order_by('id')[:limit + 1])
+
+        next_cursor = None
+        if len(projects) > limit:
+            projects = projects[:limit]
+            next_cursor = encode_cursor([projects[-1].id])
+
+        prefetch_related_objects(projects, Prefetch(
+            'team_members', queryset=CustomUser.objects.only('id', 'first_name', 'last_name', 'profile_pic')
+        ))
+
+        response_data = [
+            {
+                'id': project.id,
+                'name': project.name,
+                'deadline': project.deadline,
+                'description': project.description,
+                'total_tasks': project.total_tasks,
+                'progress': project_progress(project),
+                'role': 'leader' if project.leader_id == user.id else 'member',
+                'created_at': project.created_at,
+                'updated_at': project.updated_at,
+                'leader': member_data(project.leader) if project.leader else None,
+                'team_members': [member_data(member) for member in project.team_members.all()]
+            }
+            for project in projects
+        ]
+        return Response({'projects': response_data, 'next_cursor': next_cursor}, status=200)
+
 class DeleteProjectView(APIView):
     def delete(self, request, project_id=None):
         try:
@@ -199,7 +230,7 @@ class DeleteProjectView(APIView):
                 return JsonResponse({'error': 'Project ID is required.'}, status=400)
 
             user = request.user
-            if not user_has_permission(user, "delete"):
+            if not user_has_permission(user, "delete", "project_management"):
                 return JsonResponse({'error': 'You do not have permission to delete projects.'}, status=403)
 
             try:
@@ -219,7 +250,7 @@ class UpdateProjectView(APIView):
                 return JsonResponse({'error': 'Project ID is required.'}, status=400)
 
             user = request.user
-            if not user_has_permission(user, "update"):
+            if not user_has_permission(user, "update", "project_management"):
                 return JsonResponse({'error': 'You do not have permission to update projects.'}, status=403)
 
             try:
@@ -255,13 +286,15 @@ class UpdateProjectView(APIView):
                     if len(team_members) != len(team_members_ids):
                         return JsonResponse({'error': 'One or more team member IDs are invalid.'}, status=400)
                     project.team_members.set(team_members)
-            project.save()
+            # Leave the task counters to their F() updates; a full save could write back stale values
+            project.save(update_fields=['name', 'deadline', 'leader', 'description', 'updated_at'])
             response_data = {
                 'id': project.id,
                 'name': project.name,
                 'deadline': project.deadline,
                 'description': project.description,
                 'total_tasks': project.total_tasks,
+                'progress': project_progress(project),
                 'created_at': project.created_at,
                 'updated_at': project.updated_at,
                 'leader': {
@@ -1,10 +1,10 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from ufcmsdb.models import Role, Permission
+from ufcmsdb.reference_cache import reference_response
 from django.http import JsonResponse
 
 import json
@@ -14,7 +14,6 @@ logger = logging.getLogger(__name__)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class AddRoleView(APIView):
-    # authentication_classes = [TokenAuthentication]
     # permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -179,55 +178,33 @@ class DeleteRoleView(APIView):
             return JsonResponse({"error": str(e)}, status=500)
 
 
+def roles_with_permissions():
+    """Every role with its permissions grouped by module, loaded in two queries."""
+    roles_data = []
+    for role in Role.objects.prefetch_related('permissions'):
+        # Group permissions by module
+        permissions_by_module = {}
+        for perm in role.permissions.all():
+            permissions_by_module.setdefault(perm.module, []).append({
+                "id": perm.id,
+                "action": perm.action.capitalize()
+            })
+
+        roles_data.append({
+            "id": role.id,
+            "name": role.name,
+            "permissions": permissions_by_module  # Grouped by module
+        })
+    return {"roles": roles_data}
+
+
 class GetAllRolesView(APIView):
     
     
     def get(self, request, *args, **kwargs):
         try:
-            # Fetch all roles
-            roles = Role.objects.all()
-
-            # Serialize roles and their associated permissions grouped by module
-            roles_data = []
-            for role in roles:
-                # Group permissions by module
-                permissions_by_module = {}
-                for perm in role.permissions.all():
-                    module = perm.module
-                    if module not in permissions_by_module:
-                        permissions_by_module[module] = []
-                    permissions_by_module[module].append({
-                        "id": perm.id,
-                        "action": perm.action.capitalize()
-                    })
-
-                roles_data.append({
-                    "id": role.id,
-                    "name": role.name,
-                    "permissions": permissions_by_module  # Grouped by module
-                })
-
-            # Return the serialized data
-            return JsonResponse({"roles": roles_data}, status=200)
+            # Served from the reference-data cache; conditional requests get a 304
+            return reference_response(request, 'roles', 'all', roles_with_permissions)
 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
-        try:
-            # Fetch all roles
-            roles = Role.objects.all()
-
-            # Serialize roles data
-            roles_data = []
-            for role in roles:
-                roles_data.append({
-                    "id": role.id,
-                    "name": role.name,
-                    "permissions": [
-                        {"id": perm.id, "name": perm.module  } for perm in role.permissions.all()
-                    ]
-                })
-
-            return JsonResponse({"roles": roles_data}, status=200)
-
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Denormalised task counters on ``Project``.
+
+Every task write calls one of the ``record_*`` helpers inside the same
+transaction. Counters move with ``F()`` expressions in one UPDATE on
+``Project`` and one on ``ProjectSummary``, however many projects are
+affected, so concurrent writers never lose increments.
+``reconcile_counters`` recomputes them from the task table.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from ufcmsdb.models import Project, ProjectSummary, Task
+
+STATUS_COUNTERS = {
+    'Pending': 'pending_tasks',
+    'In Progress': 'in_progress_tasks',
+    'Completed': 'completed_tasks',
+}
+COUNTER_FIELDS = ('total_tasks',) + tuple(STATUS_COUNTERS.values())
+
+
+def _apply(deltas):
+    project_ids = sorted(project_id for project_id, changes in deltas.items() if any(changes.values()))
+    if not project_ids:
+        return
+    if len(project_ids) > 1:
+        # Lock in ID order so concurrent writers touching overlapping projects can't deadlock
+        list(Project.objects.select_for_update().filter(id__in=project_ids).order_by('id').values_list('id'))
+
+    changes = {}
+    for field in COUNTER_FIELDS:
+        amounts = [When(pk=project_id, then=Value(deltas[project_id][field]))
+                   for project_id in project_ids if deltas[project_id][field]]
+        if amounts:
+            changes[field] = F(field) + Case(*amounts, default=Value(0), output_field=IntegerField())
+    Project.objects.filter(id__in=project_ids).update(**changes)
+    ProjectSummary.objects.filter(project_id__in=project_ids).update(**changes)
+
+
+def record_created(tasks):
+    """Count newly created tasks."""
+    deltas = defaultdict(Counter)
+    for task in tasks:
+        deltas[task.project_id]['total_tasks'] += 1
+        deltas[task.project_id][STATUS_COUNTERS[task.status]] += 1
+    _apply(deltas)
+
+
+def record_deleted(tasks):
+    """Uncount deleted tasks (call with the tasks as they were before deletion)."""
+    deltas = defaultdict(Counter)
+    for task in tasks:
+        deltas[task.project_id]['total_tasks'] -= 1
+        deltas[task.project_id][STATUS_COUNTERS[task.status]] -= 1
+    _apply(deltas)
+
+
+def record_status_changes(changes):
+    """Move tasks between status counters; ``changes`` yields (project_id, old_status, new_status)."""
+    deltas = defaultdict(Counter)
+    for project_id, old_status, new_status in changes:
+        if old_status != new_status:
+            deltas[project_id][STATUS_COUNTERS[old_status]] -= 1
+            deltas[project_id][STATUS_COUNTERS[new_status]] += 1
+    _apply(deltas)
+
+
+def project_progress(project):
+    """Progress block for project responses, read from the counters."""
+    return {
+        'total': project.total_tasks,
+        'pending': project.pending_tasks,
+        'in_progress': project.in_progress_tasks,
+        'completed': project.completed_tasks,
+        'percent_complete': round(100 * project.completed_tasks / project.total_tasks) if project.total_tasks else 0,
+    }
+
+
+@transaction.atomic
+def reconcile_counters(project_ids=None):
+    """
+    Recompute counters on projects and their summaries from the task table.
+    Returns the projects that had drifted.
+    """
+    # Lock first: Postgres doesn't allow FOR UPDATE on the grouped query itself
+    projects = Project.objects.select_for_update().only('name', *COUNTER_FIELDS)
+    tasks = Task.objects.all()
+    if project_ids:
+        projects = projects.filter(id__in=project_ids)
+        tasks = tasks.filter(project_id__in=project_ids)
+    projects = list(projects)
+
+    actual = defaultdict(Counter)
+    for row in tasks.values('project_id', 'status').annotate(count=Count('id')).order_by():
+        actual[row['project_id']]['total_tasks'] += row['count']
+        actual[row['project_id']][STATUS_COUNTERS[row['status']]] += row['count']
+
+    drifted = []
+    for project in projects:
+        counts = actual[project.id]
+        if any(getattr(project, field) != counts[field] for field in COUNTER_FIELDS):
+            for field in COUNTER_FIELDS:
+                setattr(project, field, counts[field])
+            drifted.append(project)
+
+    Project.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=500)
+
+    summaries = ProjectSummary.objects.only(*COUNTER_FIELDS)
+    if project_ids:
+        summaries = summaries.filter(project_id__in=project_ids)
+    stale = []
+    for summary in summaries:
+        counts = actual[summary.project_id]
+        if any(getattr(summary, field) != counts[field] for field in COUNTER_FIELDS):
+            for field in COUNTER_FIELDS:
+                setattr(summary, field, counts[field])
+            stale.append(summary)
+    ProjectSummary.objects.bulk_update(stale, COUNTER_FIELDS, batch_size=500)
+    return drifted
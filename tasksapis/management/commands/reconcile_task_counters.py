@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from tasksapis.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Project task counters from the task table and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='project_ids',
+                            help="Limit to this project ID (repeatable).")
+
+    def handle(self, *args, project_ids=None, **options):
+        drifted = reconcile_counters(project_ids)
+        for project in drifted:
+            self.stdout.write(
+                f"{project.name}: total {project.total_tasks}, pending {project.pending_tasks}, "
+                f"in progress {project.in_progress_tasks}, completed {project.completed_tasks}"
+            )
+        if drifted:
+            self.stdout.write(self.style.WARNING(f"Corrected counters on {len(drifted)} project(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Task counters match the task table."))
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tasksapis.counters import COUNTER_FIELDS, record_created, record_deleted, record_status_changes
+from ufcmsdb.models import CustomUser, Permission, Project, ProjectSummary, Role, Task
+
+
+class TaskCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.projects = [
+            Project.objects.create(name=f'Project {i}', deadline=date.today() + timedelta(days=30))
+            for i in range(10)
+        ]
+
+    def counters(self, model, **filters):
+        return list(model.objects.filter(**filters).order_by('pk').values_list(*COUNTER_FIELDS))
+
+    def assertCounters(self, expected):
+        ids = [project.id for project in self.projects]
+        self.assertEqual(self.counters(Project, id__in=ids), expected)
+        self.assertEqual(self.counters(ProjectSummary, project_id__in=ids), expected)
+
+    def test_counters_across_projects_in_fixed_queries(self):
+        tasks = [Task(project=project, name=f'Task {i}', status='Pending') for i, project in enumerate(self.projects)]
+        tasks.append(Task(project=self.projects[0], name='Done', status='Completed'))
+
+        # Lock in ID order, then one UPDATE per table
+        with self.assertNumQueries(3):
+            record_created(tasks)
+        self.assertCounters([(2, 1, 0, 1)] + [(1, 1, 0, 0)] * 9)
+
+        with self.assertNumQueries(2):
+            record_status_changes([(self.projects[1].id, 'Pending', 'In Progress')])
+        with self.assertNumQueries(0):
+            record_status_changes([(self.projects[2].id, 'Pending', 'Pending')])
+        with self.assertNumQueries(3):
+            record_deleted([tasks[0], tasks[2]])
+        self.assertCounters([(1, 0, 0, 1), (1, 0, 1, 0), (0, 0, 0, 0)] + [(1, 1, 0, 0)] * 7)
+
+
+class BulkTaskStatusUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='lead', email='lead@example.com')
+        role = Role.objects.create(name='Lead')
+        role.permissions.add(Permission.objects.create(module='task_management', action='update'))
+        cls.user.role.add(role)
+        project = Project.objects.create(name='Project', deadline=date.today() + timedelta(days=30))
+        cls.tasks = Task.objects.bulk_create([Task(project=project, name=f'Task {i}') for i in range(3)])
+        record_created(cls.tasks)
+
+    def test_tasks_are_locked_in_id_order(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        updates = [{'task_id': task.id, 'status': 'Completed'} for task in reversed(self.tasks)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/task/api/bulk-update-status/', {'updates': updates}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        locks = [query['sql'] for query in queries if 'FOR UPDATE' in query['sql'] and 'ufcmsdb_task' in query['sql']]
+        self.assertEqual(len(locks), 1)
+        self.assertIn('ORDER BY "ufcmsdb_task"."id" ASC', locks[0])
+        self.assertEqual(set(Task.objects.values_list('status', flat=True)), {'Completed'})
+        self.assertEqual(Project.objects.values_list('completed_tasks', 'pending_tasks').get(), (3, 0))
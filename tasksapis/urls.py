@@ -1,11 +1,13 @@
 from django.urls import path
-from .views import TaskCreateView , GetTaskByIdView , GetAllTasksView ,UpdateTaskStatusView , DeleteTaskView
+from .views import TaskCreateView , GetTaskByIdView , GetAllTasksView ,UpdateTaskStatusView , DeleteTaskView , BulkTaskCreateView , BulkTaskStatusUpdateView
 
 urlpatterns = [
     path('create/', TaskCreateView.as_view(), name='task-create'),  
     path('<int:task_id>/', GetTaskByIdView.as_view(), name='get-task'),  
     path('get-all/', GetAllTasksView.as_view(), name='all-task'),  
     path('update-status/', UpdateTaskStatusView.as_view(), name='update-task'), 
+    path('bulk-create/', BulkTaskCreateView.as_view(), name='bulk-create-tasks'),
+    path('bulk-update-status/', BulkTaskStatusUpdateView.as_view(), name='bulk-update-tasks'),
     path('<int:task_id>/delete/',DeleteTaskView.as_view(), name = 'delete-task' ) # Endpoint to fetch all roles
  
 
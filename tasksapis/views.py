@@ -2,21 +2,27 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from ufcmsdb.models import Task, Project, CustomUser
+from ufcmsdb.permissions import user_has_permission
 from rest_framework.exceptions import NotFound
 from datetime import datetime
+from django.db import transaction
+from django.utils.timezone import now
 from django.http import JsonResponse
-from rest_framework.authentication import TokenAuthentication
+from ufcmsdb.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from django.utils.dateparse import parse_date
+from ufcmsdb.pagination import InvalidPageRequest, keyset_page, page_size
+from .counters import record_created, record_deleted, record_status_changes
 
 class TaskCreateView(APIView):
-    authentication_classes = [TokenAuthentication]  
+    authentication_classes = [CachedTokenAuthentication]  
     permission_classes = [IsAuthenticated]  
 
     def post(self, request):
         user = request.user  # Get the authenticated user
 
         # Check if the user has permission to create a task
-        has_permission = user.role.filter(permissions__action="create", permissions__module="task_management").exists()
+        has_permission = user_has_permission(user, "create", "task_management")
         
         if not has_permission:
             return JsonResponse({'error': 'You do not have permission to create a task.'}, status=403)
@@ -33,6 +39,9 @@ class TaskCreateView(APIView):
         if not project_id or not name or not assigned_to_id:
             return Response({"message": "Project ID, task name, and assigned user ID are required."}, status=status.HTTP_400_BAD_REQUEST)
 
+        if task_status not in TASK_STATUSES:
+            return Response({"message": f"Invalid status. Use one of: {', '.join(sorted(TASK_STATUSES))}."}, status=status.HTTP_400_BAD_REQUEST)
+
         # Validate existence of related project and user
         try:
             project = Project.objects.get(id=project_id)
@@ -60,7 +69,9 @@ class TaskCreateView(APIView):
             priority=priority,
             due_date=due_date
         )
-        task.save()
+        with transaction.atomic():
+            task.save()
+            record_created([task])
         return Response({
             "message": "Task created successfully.",
             "task_id": task.id,
@@ -81,7 +92,7 @@ class GetTaskByIdView(APIView):
         user = request.user  # Get the authenticated user
 
         # Check if the user has permission to read a task
-        has_permission = user.role.filter(permissions__action="read", permissions__module="task_management").exists()
+        has_permission = user_has_permission(user, "read", "task_management")
         
         if not has_permission:
             return JsonResponse({'error': 'You do not have permission to view this task.'}, status=403)
@@ -107,56 +118,118 @@ class GetTaskByIdView(APIView):
         return Response({"task": task_data}, status=status.HTTP_200_OK)
 
 class GetAllTasksView(APIView):
-    authentication_classes = [TokenAuthentication]
+    """
+    Query tasks.
+
+    Filters: ``project_id``, ``assigned_to`` (a user ID or ``me``), ``status``
+    and ``priority`` (comma-separated), ``due_from``/``due_to`` and ``open=1``
+    (anything not completed). ``sort`` is one of ``TASK_SORTS``; sorting by
+    due date skips tasks without one. Results are keyset-paginated with
+    ``limit`` and the returned ``next_cursor``.
+    """
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user  # Get the authenticated user
 
         # Check if the user has permission to read tasks
-        has_permission = user.role.filter(permissions__action="read", permissions__module="task_management").exists()
+        has_permission = user_has_permission(user, "read", "task_management")
         
         if not has_permission:
             return JsonResponse({'error': 'You do not have permission to view tasks.'}, status=403)
-        
-        tasks = Task.objects.all().values(
-            'id', 'project__name', 'name', 'description', 'assigned_to__username', 
-            'status', 'priority', 'due_date', 'created_at', 'updated_at'
-        )
-        return Response({"tasks": list(tasks)}, status=status.HTTP_200_OK)
+
+        params = request.query_params
+        tasks = Task.objects.all()
+
+        for param, field in (('project_id', 'project_id'), ('assigned_to', 'assigned_to_id')):
+            value = params.get(param)
+            if not value:
+                continue
+            value = user.id if param == 'assigned_to' and value == 'me' else parse_id(value)
+            if not value:
+                return Response({"error": f"Invalid {param}."}, status=status.HTTP_400_BAD_REQUEST)
+            tasks = tasks.filter(**{field: value})
+
+        for param, choices in (('status', TASK_STATUSES), ('priority', TASK_PRIORITIES)):
+            value = params.get(param)
+            if not value:
+                continue
+            values = value.split(',')
+            if not set(values) <= choices:
+                return Response({"error": f"Invalid {param}. Use one of: {', '.join(sorted(choices))}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            tasks = tasks.filter(**{f'{param}__in': values})
+
+        if params.get('open') in ('1', 'true'):
+            # Written as an exclusion so it matches the partial index's predicate
+            tasks = tasks.exclude(status='Completed')
+
+        for param, lookup in (('due_from', 'due_date__gte'), ('due_to', 'due_date__lte')):
+            value = params.get(param)
+            if value:
+                try:
+                    parsed = parse_date(value)
+                except ValueError:  # Well formed but impossible, e.g. 2026-02-30
+                    parsed = None
+                if not parsed:
+                    return Response({"error": f"Invalid {param}. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+                tasks = tasks.filter(**{lookup: parsed})
+
+        sort = params.get('sort', '-id')
+        if sort not in TASK_SORTS:
+            return Response({"error": f"sort must be one of: {', '.join(TASK_SORTS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if 'due_date' in sort:
+            tasks = tasks.filter(due_date__isnull=False)  # NULLs can't be compared in a keyset cursor
+
+        try:
+            tasks, next_cursor = keyset_page(
+                tasks.values(*TASK_LIST_FIELDS),
+                TASK_SORTS[sort],
+                cursor=params.get('cursor'),
+                limit=page_size(request),
+            )
+        except InvalidPageRequest as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"tasks": tasks, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
 class DeleteTaskView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, task_id):
         user = request.user  # Get the authenticated user
 
         # Check if the user has permission to delete a task
-        has_permission = user.role.filter(permissions__action="delete", permissions__module="task_management").exists()
+        has_permission = user_has_permission(user, "delete", "task_management")
         
         if not has_permission:
             return JsonResponse({'error': 'You do not have permission to delete this task.'}, status=403)
 
-        try:
-            task = Task.objects.get(id=task_id)
-        except Task.DoesNotExist:
-            raise NotFound({"message": "Task not found."})
+        with transaction.atomic():
+            try:
+                task = Task.objects.select_for_update().get(id=task_id)
+            except Task.DoesNotExist:
+                raise NotFound({"message": "Task not found."})
 
-        task.delete()
+            record_deleted([task])
+            task.delete()
         return Response({"message": "Task deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
 class UpdateTaskStatusView(APIView):
     """
     View to update the status of a task.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         user = request.user  # Get the authenticated user
 
         # Check if the user has permission to update a task
-        has_permission = user.role.filter(permissions__action="update", permissions__module="task_management").exists()
+        has_permission = user_has_permission(user, "update", "task_management")
         
         if not has_permission:
             return JsonResponse({'error': 'You do not have permission to update this task.'}, status=403)
@@ -168,19 +241,225 @@ class UpdateTaskStatusView(APIView):
         if not task_id or not new_status or not updated_by_id:
             return Response({"message": "Task ID, status, and updated by ID are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            task = Task.objects.get(id=task_id)
-        except Task.DoesNotExist:
-            raise NotFound({"message": "Task not found."})
+        if new_status not in TASK_STATUSES:
+            return Response({"message": f"Invalid status. Use one of: {', '.join(sorted(TASK_STATUSES))}."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             updated_by = CustomUser.objects.get(id=updated_by_id)
         except CustomUser.DoesNotExist:
             return Response({"message": "Invalid Updated By ID."}, status=status.HTTP_400_BAD_REQUEST)
 
-        task.status = new_status
-        task.updated_by = updated_by
-        task.save()
+        with transaction.atomic():
+            # Lock the row so the old status used for the counters can't go stale
+            try:
+                task = Task.objects.select_for_update().get(id=task_id)
+            except Task.DoesNotExist:
+                raise NotFound({"message": "Task not found."})
+
+            record_status_changes([(task.project_id, task.status, new_status)])
+            task.status = new_status
+            task.updated_by = updated_by
+            task.save()
 
         return Response({"message": "Task status updated successfully, updated by {}.".format(updated_by.username)}, status=status.HTTP_200_OK)
 
+
+
+MAX_BULK_ITEMS = 1000
+TASK_STATUSES = {choice for choice, _ in Task.STATUS_CHOICES}
+TASK_PRIORITIES = {choice for choice, _ in Task.PRIORITY_CHOICES}
+TASK_LIST_FIELDS = (
+    'id', 'project_id', 'project__name', 'name', 'description', 'assigned_to_id', 'assigned_to__username',
+    'status', 'priority', 'due_date', 'created_at', 'updated_at',
+)
+# Sort keys for GetAllTasksView, each backed by an index and ending in the unique id
+TASK_SORTS = {
+    '-id': ('-id',),
+    'id': ('id',),
+    'due_date': ('due_date', 'id'),
+    '-due_date': ('-due_date', '-id'),
+}
+
+
+def parse_id(value):
+    """Return ``value`` as a positive int ID, or None if it isn't one."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def bulk_items(request, key):
+    """Return the list under ``key`` in the request body, or an error Response."""
+    items = request.data.get(key)
+    if not isinstance(items, list) or not items:
+        return None, Response({"message": f"'{key}' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_ITEMS:
+        return None, Response({"message": f"At most {MAX_BULK_ITEMS} items per request."}, status=status.HTTP_400_BAD_REQUEST)
+    return items, None
+
+
+class BulkTaskCreateView(APIView):
+    """
+    Create many tasks in one transaction.
+    All referenced projects and users are validated with one query each;
+    if any item is invalid nothing is created and every item's errors are returned.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+
+        if not user_has_permission(user, "create", "task_management"):
+            return JsonResponse({'error': 'You do not have permission to create tasks.'}, status=403)
+
+        items, error = bulk_items(request, 'tasks')
+        if error:
+            return error
+
+        project_ids = {parse_id(item.get('project_id')) for item in items if isinstance(item, dict)}
+        user_ids = {parse_id(item.get('assigned_to')) for item in items if isinstance(item, dict)}
+        projects = Project.objects.in_bulk(project_ids - {None})
+        users = CustomUser.objects.in_bulk(user_ids - {None})
+
+        tasks, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "errors": ["Each task must be an object."]})
+                continue
+
+            item_errors = []
+            project = projects.get(parse_id(item.get('project_id')))
+            assigned_to = users.get(parse_id(item.get('assigned_to')))
+            task_status = item.get('status', 'Pending')
+            priority = item.get('priority', 'Medium')
+            due_date = item.get('due_date')
+
+            if not item.get('name'):
+                item_errors.append("Task name is required.")
+            if not project:
+                item_errors.append("Invalid Project ID.")
+            if not assigned_to:
+                item_errors.append("Invalid User ID for assignee.")
+            if task_status not in TASK_STATUSES:
+                item_errors.append(f"Invalid status. Use one of: {', '.join(sorted(TASK_STATUSES))}.")
+            if priority not in TASK_PRIORITIES:
+                item_errors.append(f"Invalid priority. Use one of: {', '.join(sorted(TASK_PRIORITIES))}.")
+            try:
+                due_date = datetime.strptime(due_date, '%Y-%m-%d').date() if due_date else None
+            except (TypeError, ValueError):
+                item_errors.append("Invalid due date format. Use YYYY-MM-DD.")
+
+            if item_errors:
+                errors.append({"index": index, "errors": item_errors})
+                continue
+
+            tasks.append(Task(
+                project=project,
+                name=item['name'],
+                description=item.get('description', ''),
+                assigned_to=assigned_to,
+                status=task_status,
+                priority=priority,
+                due_date=due_date
+            ))
+
+        if errors:
+            return Response({"message": "No tasks were created.", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            record_created(tasks)
+
+        return Response({
+            "message": f"{len(tasks)} tasks created successfully.",
+            "tasks": [
+                {
+                    "task_id": task.id,
+                    "task_name": task.name,
+                    "project_id": task.project_id,
+                    "assigned_to": task.assigned_to.username,
+                    "status": task.status,
+                    "priority": task.priority,
+                    "due_date": task.due_date
+                }
+                for task in tasks
+            ]
+        }, status=status.HTTP_201_CREATED)
+
+
+class BulkTaskStatusUpdateView(APIView):
+    """
+    Update the status of many tasks in one transaction.
+    Body: ``{"updates": [{"task_id": 1, "status": "Completed"}, ...], "updated_by": 7}``;
+    ``updated_by`` defaults to the authenticated user.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+
+        if not user_has_permission(user, "update", "task_management"):
+            return JsonResponse({'error': 'You do not have permission to update tasks.'}, status=403)
+
+        items, error = bulk_items(request, 'updates')
+        if error:
+            return error
+
+        updated_by = user
+        if request.data.get('updated_by') is not None:
+            updated_by = CustomUser.objects.filter(id=parse_id(request.data['updated_by'])).first()
+            if not updated_by:
+                return Response({"message": "Invalid Updated By ID."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            task_ids = {parse_id(item.get('task_id')) for item in items if isinstance(item, dict)}
+            # Lock in ID order so bulk updates over overlapping tasks can't deadlock
+            tasks = {
+                task.id: task
+                for task in Task.objects.select_for_update().filter(id__in=task_ids - {None}).order_by('id')
+            }
+
+            changed, status_changes, errors, seen = [], [], [], set()
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    errors.append({"index": index, "errors": ["Each update must be an object."]})
+                    continue
+
+                item_errors = []
+                task_id = parse_id(item.get('task_id'))
+                task = tasks.get(task_id)
+                new_status = item.get('status')
+
+                if not task:
+                    item_errors.append("Task not found.")
+                elif task_id in seen:
+                    item_errors.append("Task listed more than once.")
+                if new_status not in TASK_STATUSES:
+                    item_errors.append(f"Invalid status. Use one of: {', '.join(sorted(TASK_STATUSES))}.")
+
+                if item_errors:
+                    errors.append({"index": index, "errors": item_errors})
+                    continue
+
+                seen.add(task_id)
+                status_changes.append((task.project_id, task.status, new_status))
+                task.status = new_status
+                task.updated_by = updated_by
+                task.updated_at = now()  # bulk_update bypasses auto_now
+                changed.append(task)
+
+            if errors:
+                transaction.set_rollback(True)
+                return Response({"message": "No tasks were updated.", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            Task.objects.bulk_update(changed, ['status', 'updated_by', 'updated_at'])
+            record_status_changes(status_changes)
+
+        return Response({
+            "message": "{} task statuses updated successfully, updated by {}.".format(len(changed), updated_by.username),
+            "task_ids": [task.id for task in changed]
+        }, status=status.HTTP_200_OK)
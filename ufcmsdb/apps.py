@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UfcmsdbConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ufcmsdb'
+
+    def ready(self):
+        from ufcmsdb import instrumentation, signals  # noqa: F401  Register signal handlers
@@ -0,0 +1,86 @@
+"""
+Async variants of read-heavy endpoints, for ASGI servers.
+
+DRF's ``APIView`` can't run async handlers, and under ASGI Django runs
+every sync view through one shared thread. Views built on ``AsyncAPIView``
+stay on the event loop and hand each independent piece of ORM work to
+``gather``, which runs it with ``sync_to_async(thread_sensitive=False)``:
+its own worker thread and its own database connection, so the queries
+overlap instead of running one after another.
+
+Served under WSGI these views still work, but each request then runs the
+event loop in the request thread and gains nothing.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+
+from ufcmsdb.authentication import CachedTokenAuthentication
+from ufcmsdb.fastjson import dumps
+
+_request_thread = ContextVar('async_views_on_request_thread', default=False)
+
+
+def _in_worker(fn, *args):
+    # Worker threads outlive requests, so apply CONN_MAX_AGE and health checks like a request would
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+async def in_thread(fn, *args):
+    """Run ``fn(*args)`` in a worker thread with its own database connection."""
+    if _request_thread.get():
+        return await sync_to_async(fn, thread_sensitive=True)(*args)
+    return await sync_to_async(_in_worker, thread_sensitive=False)(fn, *args)
+
+
+@contextmanager
+def on_request_thread():
+    """
+    Make ``in_thread`` use the calling thread and its connection instead,
+    e.g. so views called inside an open transaction can see its rows.
+    """
+    token = _request_thread.set(True)
+    try:
+        yield
+    finally:
+        _request_thread.reset(token)
+
+
+async def gather(*calls):
+    """Run ``(fn, *args)`` tuples concurrently with ``in_thread``; results come back in order."""
+    return await asyncio.gather(*(in_thread(*call) for call in calls))
+
+
+def json_response(data, status=200):
+    """JSON encoded like DRF's ``Response`` (decimals as numbers)."""
+    return HttpResponse(dumps(data, decimal_as_float=True), status=status, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Base for async views. Authenticates with ``CachedTokenAuthentication``
+    unless ``authenticated`` is False, answering 401 like DRF does.
+    Subclasses define ``async def get``/``post``.
+    """
+    authenticated = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authenticated:
+            try:
+                credentials = await in_thread(CachedTokenAuthentication().authenticate, request)
+            except AuthenticationFailed as e:
+                return json_response({'detail': str(e.detail)}, status=401)
+            if credentials is None:
+                return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user, request.auth = credentials
+        return await super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,188 @@
+"""
+Token authentication served from memory.
+
+``CachedTokenAuthentication`` keeps what a request needs from the
+``Token``/``CustomUser`` join (the user row minus the password, plus the
+user's permission set) in two tiers:
+
+* a bounded LRU in each process, trusted for ``TOKEN_LOCAL_CACHE_TTL``
+  seconds, which answers most requests without any I/O;
+* the shared cache, for ``TOKEN_CACHE_TIMEOUT`` seconds, which other
+  processes fall back to before the database. This tier is skipped when
+  ``CACHES['default']`` is private to the process (local memory or
+  dummy): a logout could not evict the other workers' copies, so they go
+  to the database once their local entry ages out.
+
+Logout, password resets and user saves go through ``invalidate_token`` /
+``invalidate_user_tokens`` (see ``ufcmsdb.signals``). Other processes may
+serve their local copy until it ages out, so keep the local TTL short.
+Cached permission sets are tagged with the ``roles`` reference-data version
+and rebuilt when roles change.
+
+Tokens older than ``TOKEN_EXPIRY_HOURS`` are rejected and deleted; the
+next login issues a fresh one.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.fields.files import FieldFile
+from django.utils.timezone import now
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from ufcmsdb import permissions
+from ufcmsdb.models import CustomUser, Permission
+from ufcmsdb.reference_cache import namespace_version
+
+# Cached copies of the user leave the password out; it stays deferred and
+# is loaded from the database only if something reads it.
+_USER_FIELDS = [field for field in CustomUser._meta.concrete_fields if field.attname != 'password']
+
+
+class _LRU:
+    """Thread-safe mapping of at most ``maxsize`` entries, each kept for ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = _LRU(settings.TOKEN_LOCAL_CACHE_SIZE, settings.TOKEN_LOCAL_CACHE_TTL)
+
+# Backends whose entries other processes can't see or invalidate
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def shared_cache_enabled():
+    """Whether ``CACHES['default']`` is shared by every process."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def _cache_key(key):
+    return f'auth-token:{key}'
+
+
+def token_expires_at(token_created):
+    """When a token created at ``token_created`` stops working, or None if tokens don't expire."""
+    if not settings.TOKEN_EXPIRY_HOURS:
+        return None
+    return token_created + timedelta(hours=settings.TOKEN_EXPIRY_HOURS)
+
+
+def issue_token(user):
+    """The user's token, replacing it first if it has expired."""
+    token, created = Token.objects.get_or_create(user=user)
+    expires_at = token_expires_at(token.created)
+    if not created and expires_at is not None and expires_at <= now():
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+def invalidate_token(key):
+    _local.pop(key)
+    cache.delete(_cache_key(key))
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+def _permission_set(user_id):
+    return frozenset(
+        Permission.objects.filter(roles__users=user_id).values_list('module', 'action').distinct()
+    )
+
+
+def _build_entry(token):
+    user = token.user
+    values = {}
+    for field in _USER_FIELDS:
+        value = getattr(user, field.attname)
+        values[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return {
+        'user': values,
+        'expires_at': token_expires_at(token.created),
+        'roles_version': namespace_version('roles')['version'],
+        'permissions': _permission_set(user.pk),
+    }
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for DRF's ``TokenAuthentication`` that reads tokens
+    from memory and enforces ``TOKEN_EXPIRY_HOURS``.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = _local.get(key)
+        if entry is None or entry['generation'] != permissions._generation:
+            entry = self._shared_entry(key)
+
+        if entry['expires_at'] is not None and entry['expires_at'] <= now():
+            Token.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if not entry['user']['is_active']:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        user = CustomUser.from_db('default', list(entry['user']), list(entry['user'].values()))
+        user._permission_set = (permissions._generation, entry['permissions'])
+        return user, key
+
+    def _shared_entry(self, key):
+        generation = permissions._generation
+        shared = shared_cache_enabled()
+        entry = cache.get(_cache_key(key)) if shared else None
+        if entry is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            entry = _build_entry(token)
+            if shared:
+                cache.set(_cache_key(key), entry, settings.TOKEN_CACHE_TIMEOUT)
+        elif entry['roles_version'] != namespace_version('roles')['version']:
+            entry['roles_version'] = namespace_version('roles')['version']
+            entry['permissions'] = _permission_set(entry['user']['id'])
+            cache.set(_cache_key(key), entry, settings.TOKEN_CACHE_TIMEOUT)
+
+        _local.set(key, {**entry, 'generation': generation})
+        return entry
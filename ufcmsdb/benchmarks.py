@@ -0,0 +1,439 @@
+"""
+Performance scenarios run with ``manage.py benchmark <scenario>``.
+
+Each scenario seeds its own dataset, measures, and rolls the data back (or,
+when worker threads need committed rows, deletes it), so it can be pointed
+at a development database without leaving rows behind.
+"""
+import json
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, time as clock, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import request_finished, request_started
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from ufcmsdb.models import (
+    Attendance, CustomUser, Department, Designation, Expense, Leave, LeaveLedgerEntry, LeaveResetRun, PasswordResetOTP,
+    Permission, Project, Role, Task,
+)
+from leavesapis.ledger import InsufficientLeaveBalance, apply_for_leave
+from leavesapis.availability import leaves_overlapping
+from leavesapis.resets import reset_balances
+from projectsapi.summaries import refresh_summaries
+from tasksapis.counters import reconcile_counters
+from ufcmsdb import fastjson, reference_cache
+
+SCENARIOS = {}
+
+PERMISSION_MODULES = ('task_management', 'project_management', 'finance_management', 'attendance', 'leave')
+PERMISSION_ACTIONS = ('create', 'read', 'update', 'delete')
+BATCH_SIZE = 2000
+
+
+def scenario(name):
+    """Register a function ``fn(out, options)`` as a benchmark scenario."""
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def api_client(user):
+    """
+    A test ``Client`` authenticated as ``user`` whose requests run on the
+    current connection, so they see (and don't commit) the seeded rows.
+    """
+    # The request signals would close the connection in the middle of the transaction
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        with override_settings(ALLOWED_HOSTS=['*']):
+            token, _ = Token.objects.get_or_create(user=user)
+            yield Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+
+
+def median_ms(fn, repeat=5):
+    """Median wall-clock time of ``fn()`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def analyze(*models):
+    """Refresh planner statistics after bulk loads (PostgreSQL only)."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+
+def seed_dataset(users=200, days=90, projects=20, tasks=2000, leaves_per_user=4,
+                 expenses_per_user=4, seed=42):
+    """
+    Bulk-load a realistic dataset: departments, an all-permissions admin
+    role, ``users`` employees with ``days`` working days of attendance,
+    projects with teams, tasks, leaves and expenses.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    password = make_password('benchmark')
+
+    permissions = [
+        Permission.objects.get_or_create(module=module, action=action)[0]
+        for module in PERMISSION_MODULES for action in PERMISSION_ACTIONS
+    ]
+    admin_role = Role.objects.create(name='Benchmark admin')
+    admin_role.permissions.set(permissions)
+
+    departments = Department.objects.bulk_create([Department(name=f'Benchmark dept {i}') for i in range(5)])
+    designations = Designation.objects.bulk_create([
+        Designation(department=department, department_name=department.name, name=f'{department.name} engineer')
+        for department in departments
+    ])
+
+    people = CustomUser.objects.bulk_create([
+        CustomUser(
+            username=f'benchmark{i}', email=f'benchmark{i}@example.com', first_name='Bench', last_name=str(i),
+            password=password, department=designations[i % 5].department, designation=designations[i % 5],
+        )
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    CustomUser.role.through.objects.bulk_create(
+        [CustomUser.role.through(customuser_id=person.id, role_id=admin_role.id) for person in people],
+        batch_size=BATCH_SIZE,
+    )
+
+    working_days = [today - timedelta(days=offset) for offset in range(days * 7 // 5 + 1)]
+    working_days = [day for day in working_days if day.weekday() < 5][:days]
+    Attendance.objects.bulk_create((
+        Attendance(
+            user=person, date=day, status='Present', punch_in_time=clock(9, rng.randint(0, 30)),
+            punch_out_time=clock(17, rng.randint(0, 59)), total_hours_day=rng.choice((7.5, 8, 8.5, 9)),
+        )
+        for person in people for day in working_days
+    ), batch_size=BATCH_SIZE)
+
+    project_rows = Project.objects.bulk_create([
+        Project(name=f'Benchmark project {i}', deadline=today + timedelta(days=rng.randint(10, 300)),
+                leader=rng.choice(people), created_by=people[0], description='Generated for benchmarks')
+        for i in range(projects)
+    ])
+    Project.team_members.through.objects.bulk_create([
+        Project.team_members.through(project_id=project.id, customuser_id=member.id)
+        for project in project_rows for member in rng.sample(people, min(len(people), 10))
+    ], batch_size=BATCH_SIZE)
+
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+    Task.objects.bulk_create((
+        Task(project=rng.choice(project_rows), name=f'Benchmark task {i}', assigned_to=rng.choice(people),
+             status=rng.choice(statuses), priority=rng.choice(priorities),
+             due_date=today + timedelta(days=rng.randint(-60, 120)))
+        for i in range(tasks)
+    ), batch_size=BATCH_SIZE)
+    if tasks:
+        reconcile_counters([project.id for project in project_rows])
+    refresh_summaries([project.id for project in project_rows])  # Bulk inserts send no signals
+
+    leave_statuses = [choice for choice, _ in Leave.STATUS_CHOICES]
+    leaves = []
+    for person in people:
+        for _ in range(leaves_per_user):
+            start = today - timedelta(days=rng.randint(-30, 365))
+            leaves.append(Leave(user=person, leave_type='Sick', leave_from=start,
+                                leave_to=start + timedelta(days=rng.randint(0, 3)),
+                                status=rng.choice(leave_statuses), reason='Benchmark', leave_days=1))
+    Leave.objects.bulk_create(leaves, batch_size=BATCH_SIZE)
+
+    Expense.objects.bulk_create((
+        Expense(date=today - timedelta(days=rng.randint(0, 365)), amount=rng.randint(100, 50000) / 100,
+                description='Benchmark expense', user=person, department=person.department)
+        for person in people for _ in range(expenses_per_user)
+    ), batch_size=BATCH_SIZE)
+
+    analyze(CustomUser, Attendance, Project, Task, Leave, Expense)
+    return SimpleNamespace(
+        admin=people[0], users=people, projects=project_rows, departments=departments,
+        role=admin_role, days=working_days,
+    )
+
+
+# Indexes and constraints added for the hot lookup paths, by model
+HOT_PATH_INDEXES = {
+    Attendance: ('unique_attendance_user_date', 'attendance_date_id_idx'),
+    CustomUser: ('customuser_email_idx',),
+    Leave: ('leave_user_status_idx', 'leave_pending_idx', 'leave_period_gist_idx'),
+    Task: ('task_project_status_idx', 'task_assignee_status_idx', 'task_due_date_id_idx', 'task_open_assignee_due_idx'),
+    Expense: ('expense_department_date_idx',),
+}
+
+
+def drop_hot_path_indexes():
+    """Drop the hot-path indexes inside the current transaction (PostgreSQL)."""
+    with connection.schema_editor() as editor:
+        for model, names in HOT_PATH_INDEXES.items():
+            for index in model._meta.indexes:
+                if index.name in names:
+                    editor.remove_index(model, index)
+            for constraint in model._meta.constraints:
+                if constraint.name in names:
+                    editor.remove_constraint(model, constraint)
+
+
+def hot_queries(data):
+    """The lookups the indexes are meant to serve, as (label, queryset) pairs."""
+    person = data.users[len(data.users) // 2]
+    day = data.days[len(data.days) // 2]
+    project = data.projects[0]
+    PasswordResetOTP.objects.update_or_create(email=person.email, defaults={'otp': '123456'})
+    return [
+        ('attendance by (user, date)', Attendance.objects.filter(user=person, date=day)),
+        ('attendance by user and month', Attendance.objects.filter(user=person, date__range=(day.replace(day=1), day))),
+        ('attendance page by (date, id)', Attendance.objects.filter(date__gte=day).order_by('date', 'id')[:100]),
+        ('pending leaves of a user', Leave.objects.filter(user=person, status='Pending')),
+        ('all pending leaves', Leave.objects.filter(status='Pending')),
+        ('leaves overlapping a week', leaves_overlapping(day, day + timedelta(days=6))),
+        ('tasks by project, status, assignee', Task.objects.filter(project=project, status='Pending', assigned_to=person)),
+        ('my open tasks by due date', Task.objects.filter(assigned_to=person, due_date__isnull=False)
+         .exclude(status='Completed').order_by('due_date', 'id')[:100]),
+        ('task page by (due_date, id)', Task.objects.filter(due_date__gte=day).order_by('due_date', 'id')[:100]),
+        ('expenses by department and date', Expense.objects.filter(department=data.departments[0], date__gte=day)),
+        ('user by email', CustomUser.objects.filter(email=person.email)),
+        ('reset OTP by email and code', PasswordResetOTP.objects.filter(email=person.email, otp='123456')),
+    ]
+
+
+def _measure(queries, repeat, show_plans, out):
+    results = {}
+    for label, queryset in queries:
+        results[label] = median_ms(lambda: list(queryset.all()), repeat)
+        if show_plans:
+            plan = queryset.explain(analyze=True) if connection.vendor == 'postgresql' else queryset.explain()
+            out(f'-- {label}\n{plan}\n')
+    return results
+
+
+@scenario('hot-queries')
+def hot_queries_scenario(out, options):
+    """Time the hot lookups with and without their indexes."""
+    with rolled_back():
+        data = seed_dataset(users=options['users'], days=options['days'], tasks=options['tasks'])
+        queries = hot_queries(data)
+
+        if options['plans']:
+            out('Plans with indexes:')
+        with_indexes = _measure(queries, options['repeat'], options['plans'], out)
+
+        without_indexes = {}
+        if connection.vendor == 'postgresql':
+            drop_hot_path_indexes()
+            analyze(*HOT_PATH_INDEXES)
+            if options['plans']:
+                out('Plans without indexes:')
+            without_indexes = _measure(queries, options['repeat'], options['plans'], out)
+        else:
+            out('Index-free comparison needs PostgreSQL; reporting indexed timings only.')
+
+    out(f"{'query':<40}{'indexed ms':>12}{'unindexed ms':>14}")
+    for label, indexed in with_indexes.items():
+        unindexed = without_indexes.get(label)
+        unindexed = '-' if unindexed is None else f'{unindexed:.2f}'
+        out(f"{label:<40}{indexed:>12.2f}{unindexed:>14}")
+
+
+@scenario('leave-concurrency')
+def leave_concurrency_scenario(out, options):
+    """
+    Fire parallel one-day leave applications at a single user whose balance
+    covers only some of them, then check that no update was lost: exactly
+    ``balance`` applications succeed, the balance ends at zero and the
+    ledger agrees. Threads need committed rows, so this scenario commits
+    its user and deletes it (with its leaves and ledger) afterwards.
+    """
+    balance = 10
+    attempts = max(options['workers'] * 2, balance + 1)
+    user = CustomUser.objects.create(
+        username=f'leave-concurrency-{uuid.uuid4().hex[:8]}',
+        monthly_leave_balance=balance, yearly_leave_balance=balance,
+    )
+    day = date.today()
+
+    def apply(_):
+        try:
+            apply_for_leave(user.id, 'Other', day, day, 'Concurrency check')
+            return 'applied'
+        except InsufficientLeaveBalance:
+            return 'refused'
+        except DatabaseError:
+            return 'error'  # e.g. "database is locked" on SQLite
+        finally:
+            connection.close()
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(apply, range(attempts)))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        user.refresh_from_db()
+        debits = LeaveLedgerEntry.objects.filter(user=user, entry_type='Debit').count()
+        leaves = Leave.objects.filter(user=user).count()
+        applied = results.count('applied')
+
+        out(f"{attempts} applications from {options['workers']} threads in {elapsed_ms:.0f} ms: "
+            f"{applied} applied, {results.count('refused')} refused, {results.count('error')} errors")
+        out(f"balances monthly={user.monthly_leave_balance} yearly={user.yearly_leave_balance}, "
+            f"{leaves} leaves, {debits} ledger debits")
+
+        consistent = (
+            user.monthly_leave_balance == user.yearly_leave_balance == balance - applied >= 0
+            and leaves == debits == applied
+        )
+        out('OK: no lost updates.' if consistent else 'FAIL: balances and ledger disagree.')
+    finally:
+        user.delete()
+
+
+@scenario('leave-reset')
+def leave_reset_scenario(out, options):
+    """Time the set-based leave reset against saving each user in turn."""
+    with rolled_back():
+        seed_dataset(users=options['users'], days=0, projects=0, tasks=0, leaves_per_user=0, expenses_per_user=0)
+        CustomUser.objects.update(monthly_leave_balance=0, yearly_leave_balance=0)
+        LeaveResetRun.objects.all().delete()  # So this period's reset isn't skipped as already done
+        users = CustomUser.objects.count()
+
+        start = time.perf_counter()
+        reset_balances('year')
+        reset_balances('month')
+        set_based_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for user in CustomUser.objects.all():
+            user.monthly_leave_balance = 2
+            user.yearly_leave_balance = 24
+            user.save()
+        per_user_ms = (time.perf_counter() - start) * 1000
+
+    out(f"{users} users")
+    out(f"{'set-based reset (2 UPDATEs)':<32}{set_based_ms:>10.1f} ms")
+    out(f"{'per-user save()':<32}{per_user_ms:>10.1f} ms")
+
+
+# List endpoints whose payloads the JSON scenario encodes
+GET_ALL_ENDPOINTS = (
+    '/users/api/get-all/?limit=1000',
+    '/project/api/get-all/',
+    '/task/api/get-all/?limit=1000',
+    '/expense/api/get-all/?limit=1000',
+    '/leave/api/get-all/',
+    '/attendence/api/get-all/?limit=1000',
+    '/roles/api/get-all/',
+    '/departments/api/get-all/',
+)
+
+
+def _decoded(obj):
+    """``obj`` with fragments decoded, i.e. the payload the views built before fragments."""
+    if isinstance(obj, fastjson.Fragment):
+        return json.loads(obj.json)
+    if isinstance(obj, dict):
+        return {key: _decoded(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_decoded(value) for value in obj]
+    return obj
+
+
+def _captured_payloads(client, path):
+    """Request ``path`` once and return the ``(data, decimal_as_float)`` pairs handed to ``fastjson.dumps``."""
+    captured = []
+    encode = fastjson.dumps
+
+    def capture(data, decimal_as_float=False):
+        captured.append((data, decimal_as_float))
+        return encode(data, decimal_as_float)
+
+    for namespace in ('roles', 'departments', 'designations'):
+        reference_cache.bump(namespace)  # So cached reference bodies are encoded again
+    with mock.patch.object(fastjson, 'dumps', capture), mock.patch.object(reference_cache, 'dumps', capture):
+        response = client.get(path)
+    return response, captured
+
+
+@scenario('json-render')
+def json_render_scenario(out, options):
+    """
+    Encode the payloads of the get-all endpoints with the standard library
+    encoders the views used before (DRF's for ``Response``, Django's for
+    ``JsonResponse``) and with ``fastjson.dumps``, and time the full requests.
+    """
+    rows = []
+    with rolled_back():
+        data = seed_dataset(users=options['users'], days=min(options['days'], 20), tasks=options['tasks'])
+        with api_client(data.admin) as client:
+            for path in GET_ALL_ENDPOINTS:
+                response, captured = _captured_payloads(client, path)
+                if response.status_code != 200 or not captured:
+                    out(f'{path}: HTTP {response.status_code}, skipped')
+                    continue
+                payload, decimal_as_float = captured[-1]
+                baseline = _decoded(payload)
+                if decimal_as_float:
+                    stdlib = lambda: JSONRenderer().render(baseline)
+                else:
+                    stdlib = lambda: json.dumps(baseline, cls=DjangoJSONEncoder).encode()
+                rows.append((
+                    path.split('?')[0],
+                    len(response.content),
+                    median_ms(stdlib, options['repeat']),
+                    median_ms(lambda: fastjson.dumps(payload, decimal_as_float), options['repeat']),
+                    median_ms(lambda: client.get(path), options['repeat']),
+                ))
+
+    out(f"encoder: {'orjson' if fastjson.orjson else 'standard library'}")
+    out(f"{'endpoint':<30}{'bytes':>10}{'stdlib ms':>11}{'fast ms':>10}{'speedup':>9}{'request ms':>12}")
+    for path, size, stdlib_ms, fast_ms, request_ms in rows:
+        out(f"{path:<30}{size:>10}{stdlib_ms:>11.2f}{fast_ms:>10.2f}{stdlib_ms / fast_ms:>8.1f}x{request_ms:>12.1f}")
@@ -0,0 +1,19 @@
+"""
+PostgreSQL range expressions usable without ``django.contrib.postgres``
+range fields (and so without importing psycopg on other backends).
+"""
+from django.db import models
+
+
+class DateRange(models.Func):
+    """``daterange(start, end, '[]')``: every day from ``start`` to ``end`` inclusive."""
+    function = 'daterange'
+    template = "%(function)s(%(expressions)s, '[]')"
+    output_field = models.Field()
+
+
+class RangeOverlaps(models.Func):
+    """``left && right``, for use directly in ``filter()``."""
+    arg_joiner = ' && '
+    template = '(%(expressions)s)'
+    output_field = models.BooleanField()
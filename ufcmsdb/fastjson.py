@@ -0,0 +1,104 @@
+"""
+JSON encoding for API responses.
+
+``dumps`` uses orjson when it is installed and the standard library
+otherwise; both produce compact UTF-8 bytes. Dates, times and UUIDs are
+encoded natively by orjson (datetimes keep their microseconds and UTC is
+written as ``Z``). Decimals follow the response type they replace:
+strings for ``FastJSONResponse`` like ``JsonResponse``, numbers for
+``FastJSONRenderer`` like DRF's ``JSONRenderer``.
+
+A ``Fragment`` wraps JSON that is already encoded (a cached card, a JSON
+column read as text) and is written into the output as is, skipping the
+decode/encode round trip.
+"""
+import json
+import re
+import secrets
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder as DRFJSONEncoder
+
+from ufcmsdb.instrumentation import serialization_timer
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used instead
+    orjson = None
+
+
+class Fragment:
+    """Pre-encoded JSON (``str`` or ``bytes``) to splice into an encoded document."""
+
+    __slots__ = ('json',)
+
+    def __init__(self, encoded):
+        self.json = encoded.encode() if isinstance(encoded, str) else encoded
+
+
+class _Splicer:
+    """
+    Stands in for each ``Fragment`` with a unique placeholder string while
+    encoding, then swaps the encoded placeholders for the fragments.
+    """
+
+    def __init__(self):
+        self.prefix = f'\x00{secrets.token_hex(8)}:'
+        self.fragments = []
+
+    def placeholder(self, fragment):
+        self.fragments.append(fragment.json)
+        return f'{self.prefix}{len(self.fragments) - 1}'
+
+    def splice(self, encoded):
+        # Both encoders escape NUL as \u0000, so the placeholder can't occur in real data
+        prefix = re.escape(self.prefix.replace('\x00', '\\u0000').encode())
+        return re.sub(b'"' + prefix + rb'(\d+)"', lambda match: self.fragments[int(match[1])], encoded)
+
+
+def dumps(data, decimal_as_float=False):
+    """Encode ``data`` to compact JSON bytes."""
+    with serialization_timer():
+        return _dumps(data, decimal_as_float)
+
+
+def _dumps(data, decimal_as_float):
+    splicer = _Splicer()
+    fallback = DRFJSONEncoder() if decimal_as_float else DjangoJSONEncoder()
+
+    def default(obj):
+        if isinstance(obj, Fragment):
+            return splicer.placeholder(obj)
+        if isinstance(obj, Decimal):
+            return float(obj) if decimal_as_float else str(obj)
+        return fallback.default(obj)
+
+    if orjson is not None:
+        encoded = orjson.dumps(data, default=default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    else:
+        encoded = json.dumps(data, default=default, separators=(',', ':'), ensure_ascii=False).encode()
+    return splicer.splice(encoded) if splicer.fragments else encoded
+
+
+class FastJSONResponse(HttpResponse):
+    """``JsonResponse`` encoded with ``dumps``; ``data`` may contain ``Fragment`` objects."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF renderer using ``dumps``."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        encoded = dumps(data, decimal_as_float=True)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent:  # The browsable API; re-indenting is fine off the hot path
+            encoded = json.dumps(json.loads(encoded), indent=indent, ensure_ascii=False).encode()
+        return encoded
@@ -0,0 +1,235 @@
+"""
+Per-view request metrics.
+
+``RequestMetricsMiddleware`` opens a ``RequestStats`` for every request.
+A query wrapper installed on each database connection times every query
+run on the request's behalf, including those run in worker threads by the
+async views (the stats travel in a context variable), and logs queries
+slower than ``SLOW_QUERY_MS`` with the view name.
+
+A ``REQUEST_METRICS_SAMPLE_RATE`` share of requests is also recorded per
+view: query count, SQL time, serialisation time (``fastjson.dumps``),
+response size and latency. Sampled responses carry a ``Server-Timing``
+header. ``MetricsView`` serves the totals in the Prometheus text format;
+they are per process, so each worker is scraped separately.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views import View
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """What one request spent; updated from any thread serving it."""
+
+    def __init__(self, request, sampled):
+        self.request = request
+        self.sampled = sampled
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def view(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match._func_path if match else 'unresolved'
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.queries += 1
+            self.sql_seconds += seconds
+
+    def add_serialization(self, seconds):
+        with self._lock:
+            self.serialization_seconds += seconds
+
+
+@contextmanager
+def serialization_timer():
+    """Count the block as serialisation time of the current sampled request."""
+    stats = _current.get()
+    if stats is None or not stats.sampled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_serialization(time.perf_counter() - start)
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        if stats.sampled:
+            stats.add_query(elapsed)
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning("Slow query (%.0f ms) in %s: %s", elapsed * 1000, stats.view, sql[:1000])
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class _ViewMetrics:
+    __slots__ = ('sampled', 'seconds', 'queries', 'max_queries', 'sql_seconds', 'serialization_seconds',
+                 'response_bytes')
+
+    def __init__(self):
+        self.sampled = self.queries = self.max_queries = self.response_bytes = 0
+        self.seconds = self.sql_seconds = self.serialization_seconds = 0.0
+
+
+_lock = threading.Lock()
+_requests = defaultdict(int)  # (view, method, status) -> count, for every request
+_views = defaultdict(_ViewMetrics)  # view -> totals over sampled requests
+
+
+def _record(stats, response, seconds):
+    view = stats.view
+    with _lock:
+        _requests[(view, stats.request.method, response.status_code)] += 1
+        if not stats.sampled:
+            return
+        metrics = _views[view]
+        metrics.sampled += 1
+        metrics.seconds += seconds
+        metrics.queries += stats.queries
+        metrics.max_queries = max(metrics.max_queries, stats.queries)
+        metrics.sql_seconds += stats.sql_seconds
+        metrics.serialization_seconds += stats.serialization_seconds
+        if not response.streaming:
+            metrics.response_bytes += len(response.content)
+
+    response['Server-Timing'] = (
+        f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries", '
+        f'serialize;dur={stats.serialization_seconds * 1000:.1f}, '
+        f'total;dur={seconds * 1000:.1f}'
+    )
+
+
+def reset_metrics():
+    """Forget everything collected so far in this process."""
+    with _lock:
+        _requests.clear()
+        _views.clear()
+
+
+class RequestMetricsMiddleware:
+    """Put it first in ``MIDDLEWARE`` so the timings cover the other middleware too."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        stats = RequestStats(request, random.random() < settings.REQUEST_METRICS_SAMPLE_RATE)
+        return stats, _current.set(stats), time.perf_counter()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, start = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(stats, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(stats, response, time.perf_counter() - start)
+        return response
+
+
+def _as_dict(metrics):
+    return {field: getattr(metrics, field) for field in _ViewMetrics.__slots__}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """The collected metrics in the Prometheus text exposition format."""
+    with _lock:
+        requests = sorted(_requests.items())
+        views = sorted((view, _as_dict(metrics)) for view, metrics in _views.items())
+
+    lines = [
+        '# HELP ufcms_requests_total Requests served, by view, method and status.',
+        '# TYPE ufcms_requests_total counter',
+    ]
+    for (view, method, status), count in requests:
+        lines.append(f'ufcms_requests_total{{view="{_label(view)}",method="{_label(method)}",status="{status}"}} {count}')
+
+    summaries = (
+        ('ufcms_request_seconds', 'Latency of sampled requests.', 'seconds'),
+        ('ufcms_request_queries', 'Database queries per sampled request.', 'queries'),
+        ('ufcms_request_sql_seconds', 'Time spent in SQL per sampled request.', 'sql_seconds'),
+        ('ufcms_request_serialization_seconds', 'Time spent encoding JSON per sampled request.',
+         'serialization_seconds'),
+        ('ufcms_response_bytes', 'Response body size of sampled requests (streamed bodies count as 0).',
+         'response_bytes'),
+    )
+    for name, help_text, field in summaries:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} summary']
+        for view, metrics in views:
+            lines.append(f'{name}_sum{{view="{_label(view)}"}} {metrics[field]}')
+            lines.append(f'{name}_count{{view="{_label(view)}"}} {metrics["sampled"]}')
+
+    lines += [
+        '# HELP ufcms_request_queries_max Most database queries seen in one sampled request.',
+        '# TYPE ufcms_request_queries_max gauge',
+    ]
+    for view, metrics in views:
+        lines.append(f'ufcms_request_queries_max{{view="{_label(view)}"}} {metrics["max_queries"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. Requires ``Authorization: Bearer <METRICS_TOKEN>``
+    when ``METRICS_TOKEN`` is set; without a token it is only served with DEBUG on.
+    """
+
+    def get(self, request):
+        if settings.METRICS_TOKEN:
+            if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'):
+                return HttpResponseForbidden()
+        elif not settings.DEBUG:
+            return HttpResponseForbidden()
+        return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
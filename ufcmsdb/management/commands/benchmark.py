@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ufcmsdb.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = "Run a performance scenario against a generated dataset that is rolled back afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument('--users', type=int, default=500, help="Employees to generate.")
+        parser.add_argument('--days', type=int, default=250, help="Working days of attendance per employee.")
+        parser.add_argument('--tasks', type=int, default=20000, help="Tasks to generate.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement; the median is reported.")
+        parser.add_argument('--plans', action='store_true', help="Print query plans.")
+        parser.add_argument('--workers', type=int, default=16, help="Threads for the concurrency scenarios.")
+
+    def handle(self, *args, scenario, **options):
+        SCENARIOS[scenario](self.stdout.write, options)
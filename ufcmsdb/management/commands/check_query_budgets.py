@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ufcmsdb.benchmarks import rolled_back, seed_dataset
+from ufcmsdb.query_budgets import ENDPOINTS, UNCHECKED_ROUTES, check_endpoints, url_routes
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every endpoint against a generated dataset (rolled back afterwards) and fail if one "
+        "exceeds its query budget, returns an unexpected status, has no budget, or a GET is slower "
+        "than the recorded baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help="Employees to generate.")
+        parser.add_argument('--days', type=int, default=250, help="Working days of attendance per employee.")
+        parser.add_argument('--tasks', type=int, default=5000, help="Tasks to generate.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per GET; the median is used.")
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'query_budget_baseline.json'),
+                            help="JSON file of GET timings in milliseconds, keyed by route.")
+        parser.add_argument('--update-baseline', action='store_true', help="Write this run's timings as the baseline.")
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help="Allowed slowdown against the baseline, as a fraction (0.5 = 50%%).")
+        parser.add_argument('--min-ms', type=float, default=5.0,
+                            help="Slowdowns smaller than this many milliseconds are treated as noise.")
+
+    def handle(self, *args, users, days, tasks, repeat, baseline, update_baseline, tolerance, min_ms, **options):
+        failures = []
+
+        budgeted = {spec.route for spec in ENDPOINTS}
+        for route in url_routes():
+            if route not in budgeted and route not in UNCHECKED_ROUTES:
+                failures.append(f"{route}: no entry in ufcmsdb.query_budgets.ENDPOINTS")
+
+        with rolled_back():
+            data = seed_dataset(users=users, days=days, tasks=tasks)
+            results = check_endpoints(data, repeat)
+
+        baseline_path = Path(baseline)
+        recorded = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+
+        self.stdout.write(f"{'endpoint':<52}{'status':>7}{'queries':>9}{'budget':>8}{'ms':>9}{'baseline':>10}")
+        for result in results:
+            name = f"{result['method']} /{result['route']}"
+            previous = recorded.get(name)
+            ms = '-' if result['ms'] is None else f"{result['ms']:.1f}"
+            self.stdout.write(
+                f"{name:<52}{result['status']:>7}{result['queries']:>9}{result['budget']:>8}{ms:>9}"
+                f"{'-' if previous is None else f'{previous:.1f}':>10}"
+            )
+
+            if result['status'] != result['expect']:
+                failures.append(f"{name}: HTTP {result['status']}, expected {result['expect']}")
+            if result['queries'] > result['budget']:
+                failures.append(f"{name}: {result['queries']} queries, budget {result['budget']}")
+            if result['ms'] is not None and previous is not None and not update_baseline:
+                if result['ms'] > previous * (1 + tolerance) and result['ms'] - previous > min_ms:
+                    failures.append(f"{name}: {result['ms']:.1f} ms, baseline {previous:.1f} ms")
+
+        if update_baseline:
+            timings = {f"{r['method']} /{r['route']}": round(r['ms'], 2) for r in results if r['ms'] is not None}
+            baseline_path.write_text(json.dumps(timings, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Wrote {len(timings)} timings to {baseline_path}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} problem(s):\n" + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} endpoints within budget."))
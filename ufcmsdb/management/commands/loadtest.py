@@ -0,0 +1,120 @@
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from ufcmsdb.benchmarks import percentile
+from ufcmsdb.models import CustomUser
+
+# Login variants: compact, and with every section (sync and async)
+LOGIN_PATHS = {
+    'login': '/auth/api/login/?compact=1',
+    'login-full': '/auth/api/login/',
+    'login-async': '/auth/api/login/async/',
+}
+PUNCH_USER_PREFIX = 'loadtest-punch-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at a running server and report p50/p99 latency. "
+        "Run it once per server configuration (e.g. DATABASE_POOL off and on) to compare. "
+        "For WSGI against ASGI, serve the project with `gunicorn Unit_factor_cms.wsgi` and with "
+        "`uvicorn Unit_factor_cms.asgi:application`, and compare e.g. "
+        "--endpoint login-full --endpoint login-async --endpoint 'GET /attendence/api/stats/' "
+        "--endpoint 'GET /attendence/api/stats/async/' on each. "
+        "The punch endpoint creates throwaway users in this project's database (deleted afterwards), "
+        "so the server must use the same database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--email', required=True, help="Login used for the login and authenticated endpoints.")
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help=f"{', '.join(LOGIN_PATHS)}, 'punch', or 'GET /path/' (repeatable). "
+                                 "Defaults to login and punch.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--label', default='', help="Printed with the results, e.g. 'pool' or 'conn-max-age'.")
+
+    def handle(self, *args, base_url, email, password, endpoints, requests, concurrency, label, **options):
+        self.base_url = base_url.rstrip('/')
+        self.credentials = json.dumps({'email': email, 'password': password}).encode()
+
+        status, body = self.request('POST', '/auth/api/login/?compact=1', self.credentials)
+        if status != 200:
+            raise CommandError(f"Login failed with HTTP {status}: {body[:200]}")
+        self.token = json.loads(body)['token']
+
+        self.stdout.write(f"{label or base_url}: {requests} requests per endpoint, concurrency {concurrency}")
+        self.stdout.write(f"{'endpoint':<40}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}  statuses")
+        for endpoint in endpoints or ['login', 'punch']:
+            call = self.endpoint_call(endpoint, requests)
+            try:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    results = list(pool.map(lambda i: self.timed(call, i), range(requests)))
+                elapsed = time.perf_counter() - started
+            finally:
+                if endpoint == 'punch':
+                    CustomUser.objects.filter(username__startswith=PUNCH_USER_PREFIX).delete()
+
+            latencies = [latency for latency, _ in results]
+            statuses = Counter(status for _, status in results)
+            self.stdout.write(
+                f"{endpoint:<40}{percentile(latencies, 50):>10.1f}{percentile(latencies, 99):>10.1f}"
+                f"{requests / elapsed:>10.1f}  {dict(statuses)}"
+            )
+
+    def endpoint_call(self, endpoint, requests):
+        """A callable taking the request number and returning ``(status, body)``."""
+        if endpoint in LOGIN_PATHS:
+            return lambda i: self.request('POST', LOGIN_PATHS[endpoint], self.credentials)
+        if endpoint == 'punch':
+            # One user per pair of requests, so every call is a real punch-in or punch-out
+            tokens = self.punch_tokens((requests + 1) // 2)
+            return lambda i: self.request('POST', '/attendence/api/punch/', b'{}', token=tokens[i // 2])
+        method, _, path = endpoint.partition(' ')
+        if not path:
+            raise CommandError(
+                f"Unknown endpoint {endpoint!r}; use {', '.join(LOGIN_PATHS)}, 'punch' or 'METHOD /path/'."
+            )
+        return lambda i: self.request(method.upper(), path, None, authenticated=True)
+
+    def punch_tokens(self, count):
+        """Create ``count`` users who haven't punched in today and return their token keys."""
+        run = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'{PUNCH_USER_PREFIX}{run}-{i}', email=f'{PUNCH_USER_PREFIX}{run}-{i}@example.com',
+                       password=password)
+            for i in range(count)
+        )
+        tokens = Token.objects.bulk_create(Token(key=Token.generate_key(), user=user) for user in users)
+        return [token.key for token in tokens]
+
+    def timed(self, call, i):
+        start = time.perf_counter()
+        status, _ = call(i)
+        return (time.perf_counter() - start) * 1000, status
+
+    def request(self, method, path, body, authenticated=False, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if authenticated or token:
+            headers['Authorization'] = f'Token {token or self.token}'
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except urllib.error.URLError as e:
+            return f'error: {e.reason}', b''
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ufcmsdb.outbox import MAX_ATTEMPTS, drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox in batches over one mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when the queue is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls when idle.")
+
+    def handle(self, *args, batch_size, max_attempts, loop, interval, **options):
+        try:
+            while True:
+                counts = drain_outbox(batch_size=batch_size, max_attempts=max_attempts)
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"Sent {counts['sent']}, retrying {counts['retrying']}, failed {counts['failed']}."
+                    )
+                if counts['sent'] + counts['retrying'] + counts['failed'] == batch_size:
+                    continue  # Full batch: more may be waiting
+                if not loop:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
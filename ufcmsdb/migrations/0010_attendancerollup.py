@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-17 15:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0009_alter_customuser_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month'), ('year', 'Year')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start'], name='attendance_rollup_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'period_start'), name='unique_attendance_rollup')],
+            },
+        ),
+    ]
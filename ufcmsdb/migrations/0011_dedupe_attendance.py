@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-17 15:47
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def merge_duplicate_attendance(apps, schema_editor):
+    """
+    Fold duplicate (user, date) rows created by racing punch-ins into the
+    oldest row before the unique constraint is added.
+    """
+    Attendance = apps.get_model('ufcmsdb', 'Attendance')
+    duplicates = (
+        Attendance.objects.values('user_id', 'date')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for duplicate in list(duplicates):
+        rows = list(Attendance.objects.filter(user_id=duplicate['user_id'], date=duplicate['date']).order_by('id'))
+        keep, extra = rows[0], rows[1:]
+        punch_ins = [row.punch_in_time for row in rows if row.punch_in_time]
+        punch_outs = [row.punch_out_time for row in rows if row.punch_out_time]
+        keep.punch_in_time = min(punch_ins) if punch_ins else None
+        keep.punch_out_time = max(punch_outs) if punch_outs else None
+        keep.total_hours_day = sum(row.total_hours_day for row in rows)
+        keep.save(update_fields=['punch_in_time', 'punch_out_time', 'total_hours_day'])
+        Attendance.objects.filter(id__in=[row.id for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0010_attendancerollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_attendance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-17 15:53
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_task_counters(apps, schema_editor):
+    Project = apps.get_model('ufcmsdb', 'Project')
+    projects = list(Project.objects.annotate(
+        total=Count('tasks'),
+        pending=Count('tasks', filter=Q(tasks__status='Pending')),
+        in_progress=Count('tasks', filter=Q(tasks__status='In Progress')),
+        completed=Count('tasks', filter=Q(tasks__status='Completed')),
+    ))
+    for project in projects:
+        project.total_tasks = project.total
+        project.pending_tasks = project.pending
+        project.in_progress_tasks = project.in_progress
+        project.completed_tasks = project.completed
+    Project.objects.bulk_update(
+        projects, ['total_tasks', 'pending_tasks', 'in_progress_tasks', 'completed_tasks'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0013_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_tasks',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_tasks',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='pending_tasks',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
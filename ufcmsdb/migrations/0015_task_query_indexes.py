@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-17 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0014_project_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', 'id'], name='task_due_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'Completed'), _negated=True), fields=['assigned_to', 'due_date', 'id'], name='task_open_assignee_due_idx'),
+        ),
+    ]
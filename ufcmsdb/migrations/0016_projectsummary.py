@@ -0,0 +1,70 @@
+# Generated by Django 5.1.5 on 2026-10-17 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _member(user):
+    return {
+        'id': user.id,
+        'name': f"{user.first_name} {user.last_name}",
+        'profile_pic': user.profile_pic.url if user.profile_pic else None,
+    }
+
+
+def backfill_summaries(apps, schema_editor):
+    Project = apps.get_model('ufcmsdb', 'Project')
+    ProjectSummary = apps.get_model('ufcmsdb', 'ProjectSummary')
+    summaries = []
+    for project in Project.objects.select_related('leader', 'created_by').prefetch_related('team_members'):
+        team = [_member(member) for member in project.team_members.all()]
+        summaries.append(ProjectSummary(
+            project=project,
+            name=project.name,
+            deadline=project.deadline,
+            description=project.description,
+            leader=_member(project.leader) if project.leader else None,
+            created_by={
+                'id': project.created_by.id,
+                'name': f"{project.created_by.first_name} {project.created_by.last_name}",
+            } if project.created_by else None,
+            team_members=team,
+            team_size=len(team),
+            total_tasks=project.total_tasks,
+            pending_tasks=project.pending_tasks,
+            in_progress_tasks=project.in_progress_tasks,
+            completed_tasks=project.completed_tasks,
+            created_at=project.created_at,
+            updated_at=project.updated_at,
+        ))
+    ProjectSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0015_task_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSummary',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='ufcmsdb.project')),
+                ('name', models.CharField(max_length=200)),
+                ('deadline', models.DateField()),
+                ('description', models.TextField(blank=True, null=True)),
+                ('leader', models.JSONField(null=True)),
+                ('created_by', models.JSONField(null=True)),
+                ('team_members', models.JSONField(default=list)),
+                ('team_size', models.IntegerField(default=0)),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('pending_tasks', models.IntegerField(default=0)),
+                ('in_progress_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
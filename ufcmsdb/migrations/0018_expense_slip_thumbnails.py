@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-17 16:03
+
+from django.db import migrations, models
+
+
+def queue_existing_slips(apps, schema_editor):
+    Expense = apps.get_model('ufcmsdb', 'Expense')
+    Expense.objects.exclude(expense_slip__isnull=True).exclude(expense_slip='').update(slip_status='Pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0017_expense_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='slip_status',
+            field=models.CharField(blank=True, choices=[('Pending', 'Pending'), ('Ready', 'Ready'), ('Failed', 'Failed')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='slip_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='expense_slips/thumbnails/'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('slip_status', 'Pending')), fields=['id'], name='expense_slip_pending_idx'),
+        ),
+        migrations.RunPython(queue_existing_slips, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0019_leaveledgerentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveResetRun',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('month', 'Month'), ('year', 'Year')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('users_updated', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start'), name='unique_leave_reset_run')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-17 16:07
+
+import django.contrib.postgres.indexes
+import ufcmsdb.expressions
+from django.db import migrations, models
+from django.db.models import F
+
+LEAVE_PERIOD_INDEX = django.contrib.postgres.indexes.GistIndex(
+    ufcmsdb.expressions.DateRange('leave_from', 'leave_to'),
+    condition=models.Q(('status', 'Rejected'), _negated=True),
+    name='leave_period_gist_idx',
+)
+
+
+def swap_reversed_periods(apps, schema_editor):
+    # Leaves used to be accepted with leave_to before leave_from; daterange() rejects
+    # those rows, so put the two dates the right way round first. SET uses the old
+    # values on both sides, so this swaps them.
+    Leave = apps.get_model('ufcmsdb', 'Leave')
+    Leave.objects.filter(leave_to__lt=F('leave_from')).update(leave_from=F('leave_to'), leave_to=F('leave_from'))
+
+
+def add_gist_index(apps, schema_editor):
+    # GiST needs PostgreSQL; other backends answer overlap queries with plain comparisons
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('ufcmsdb', 'Leave'), LEAVE_PERIOD_INDEX)
+
+
+def remove_gist_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('ufcmsdb', 'Leave'), LEAVE_PERIOD_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0020_leaveresetrun'),
+    ]
+
+    operations = [
+        migrations.RunPython(swap_reversed_periods, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='leave', index=LEAVE_PERIOD_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_gist_index, remove_gist_index),
+            ],
+        ),
+    ]
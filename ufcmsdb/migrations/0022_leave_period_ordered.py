@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-17 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ufcmsdb', '0021_leave_period_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='leave',
+            constraint=models.CheckConstraint(condition=models.Q(('leave_to__gte', models.F('leave_from'))), name='leave_period_ordered'),
+        ),
+    ]
@@ -1,9 +1,11 @@
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
 from datetime import date
 from django.contrib.auth.models import AbstractUser
 import uuid
 from django.utils.timezone import now
 import datetime
+from ufcmsdb.expressions import DateRange
 
 
 class Role(models.Model):
@@ -43,6 +45,12 @@ class CustomUser(AbstractUser):
     yearly_leave_balance = models.IntegerField(default=24) 
     created_by = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='created_users')  # Track the creator
     joining_date = models.DateField(default=datetime.date.today)  # Set default value to today's date
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['email'], name='customuser_email_idx'),  # Login and password reset lookups
+        ]
+
     def __str__(self):
         return self.username
 
@@ -72,9 +80,73 @@ class Leave(models.Model):
     leave_days = models.IntegerField(default=0)
     leave_balance = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status'], name='leave_user_status_idx'),
+            models.Index(fields=['status'], condition=models.Q(status='Pending'), name='leave_pending_idx'),
+            # Overlap queries (who is off between two dates); PostgreSQL only, see migration 0021
+            GistIndex(DateRange('leave_from', 'leave_to'), condition=~models.Q(status='Rejected'),
+                      name='leave_period_gist_idx'),
+        ]
+        constraints = [
+            # daterange() in leave_period_gist_idx fails on a reversed period
+            models.CheckConstraint(condition=models.Q(leave_to__gte=models.F('leave_from')), name='leave_period_ordered'),
+        ]
+
     def __str__(self):
         return f"{self.user.name} - {self.leave_type} - {self.status}"
         
+class LeaveLedgerEntry(models.Model):
+    """
+    Append-only record of leave debits and credits for one user.
+    The balance columns on CustomUser are the running total, updated in the
+    same transaction; each entry stores the balances it left behind.
+    Company-wide period resets are recorded in LeaveResetRun instead.
+    """
+    ENTRY_TYPES = [
+        ('Debit', 'Debit'),
+        ('Credit', 'Credit'),
+    ]
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='leave_ledger')
+    leave = models.ForeignKey(Leave, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
+    days = models.IntegerField()  # Always positive; entry_type gives the direction
+    monthly_balance = models.IntegerField()  # Balances after this entry
+    yearly_balance = models.IntegerField()
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='leave_ledger_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.entry_type} {self.days} - {self.note}"
+
+
+class LeaveResetRun(models.Model):
+    """One row per completed monthly or yearly balance reset; makes the reset job idempotent."""
+    PERIOD_CHOICES = [
+        ('month', 'Month'),
+        ('year', 'Year'),
+    ]
+    id = models.AutoField(primary_key=True)
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # First of the month or January 1st
+    users_updated = models.IntegerField(default=0)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start'], name='unique_leave_reset_run'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} - {self.users_updated} users"
+
 class Attendance(models.Model):
     id = models.AutoField(primary_key=True)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -87,9 +159,42 @@ class Attendance(models.Model):
     total_hours_week = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     total_hours_year = models.DecimalField(max_digits=5, decimal_places=2, default=0)
 
+    class Meta:
+        constraints = [
+            # One row per user per day; also serves (user, date) and (user, date range) lookups
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_attendance_user_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),  # Keyset pagination
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.date} - {self.status}"
 
+class AttendanceRollup(models.Model):
+    """Hours worked per user per week, month and year, kept current on punch-out."""
+    PERIOD_CHOICES = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+        ('year', 'Year'),
+    ]
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='attendance_rollups')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # Monday, first of month or January 1st
+    total_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'period_start'], name='unique_attendance_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start'], name='attendance_rollup_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.period} {self.period_start} - {self.total_hours}"
+
 class Expense(models.Model):
     id = models.AutoField(primary_key=True)
     date = models.DateField()
@@ -98,7 +203,21 @@ class Expense(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     expense_slip = models.ImageField(upload_to='expense_slips/', null=True, blank=True)
-    
+    slip_thumbnail = models.ImageField(upload_to='expense_slips/thumbnails/', null=True, blank=True)  # Made by manage.py make_slip_thumbnails
+    SLIP_STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Ready', 'Ready'),
+        ('Failed', 'Failed'),
+    ]
+    slip_status = models.CharField(max_length=10, choices=SLIP_STATUS_CHOICES, null=True, blank=True)  # Thumbnail state; null without a slip
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(slip_status='Pending'), name='expense_slip_pending_idx'),
+            models.Index(fields=['department', 'date'], name='expense_department_date_idx'),
+            models.Index(fields=['date', 'id'], name='expense_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.description} - {self.amount}"
 
@@ -109,12 +228,39 @@ class Project(models.Model):
     leader = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='led_projects')  # Project leader
     team_members = models.ManyToManyField(CustomUser, related_name='projects')  # All team members
     total_tasks = models.IntegerField(default=0)  # Total number of tasks in the project
+    pending_tasks = models.IntegerField(default=0)  # Task counters by status, kept in step by tasksapis.counters
+    in_progress_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
     description = models.TextField(null=True, blank=True)  # Project description (optional)
     created_at = models.DateTimeField(auto_now_add=True)  # Timestamp for project creation
     updated_at = models.DateTimeField(auto_now=True)  # Timestamp for last update
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_projects')  # Track the creator
     def __str__(self):
         return self.name
+
+
+class ProjectSummary(models.Model):
+    """
+    Read model for the project list: one row per project with the leader,
+    creator and team already rendered, kept in step by projectsapi.summaries.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    name = models.CharField(max_length=200)
+    deadline = models.DateField()
+    description = models.TextField(null=True, blank=True)
+    leader = models.JSONField(null=True)  # {'id', 'name', 'profile_pic'}
+    created_by = models.JSONField(null=True)  # {'id', 'name'}
+    team_members = models.JSONField(default=list)  # [{'id', 'name', 'profile_pic'}, ...]
+    team_size = models.IntegerField(default=0)
+    total_tasks = models.IntegerField(default=0)  # Counters move with Project's, via tasksapis.counters
+    pending_tasks = models.IntegerField(default=0)
+    in_progress_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
 class PasswordResetOTP(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
@@ -125,6 +271,33 @@ class PasswordResetOTP(models.Model):
     def __str__(self):
         return f"OTP for {self.email}"
 
+class OutboundEmail(models.Model):
+    """Email queued by a request and delivered later by ``manage.py send_queued_emails``."""
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    ]
+    id = models.AutoField(primary_key=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField()  # List of addresses
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)  # Pushed back exponentially after each failure
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='Pending'), name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
 class Task(models.Model):
     id = models.AutoField(primary_key=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
@@ -148,6 +321,15 @@ class Task(models.Model):
     updated_at = models.DateTimeField(auto_now=True)  # Timestamp for last update
     updated_by = models.ForeignKey(CustomUser, related_name='updated_tasks', on_delete=models.SET_NULL, null=True, blank=True)  # Task updated by
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'status', 'assigned_to'], name='task_project_status_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            models.Index(fields=['due_date', 'id'], name='task_due_date_id_idx'),
+            # "My open tasks": only unfinished rows, already in due-date order
+            models.Index(fields=['assigned_to', 'due_date', 'id'], condition=~models.Q(status='Completed'),
+                         name='task_open_assignee_due_idx'),
+        ]
 
     def __str__(self):
         return self.name
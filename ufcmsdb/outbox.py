@@ -0,0 +1,92 @@
+"""
+Database-backed email outbox.
+
+Requests call ``enqueue_email`` and return immediately; a worker
+(``manage.py send_queued_emails``) calls ``drain_outbox`` to deliver due
+messages in batches over a single connection, retrying failures with
+exponential backoff.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils.timezone import now
+
+from ufcmsdb.models import OutboundEmail
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30  # Delay after the first failure; doubles on each retry
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Queue a plain-text email for delivery by the outbox worker."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def _record_failure(message, error, max_attempts):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= max_attempts:
+        message.status = 'Failed'
+    else:
+        message.next_attempt_at = now() + timedelta(seconds=BACKOFF_SECONDS * 2 ** (message.attempts - 1))
+
+
+def drain_outbox(batch_size=50, max_attempts=MAX_ATTEMPTS, connection=None):
+    """
+    Send one batch of due messages over one mail connection.
+    Returns a dict with ``sent``, ``retrying`` and ``failed`` counts.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    workers can drain the same queue without sending a message twice.
+    """
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='Pending', next_attempt_at__lte=now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return counts
+
+        connection = connection or get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # Server unreachable: every message in the batch is retried later
+            for message in batch:
+                _record_failure(message, e, max_attempts)
+        else:
+            for message in batch:
+                try:
+                    EmailMessage(
+                        message.subject, message.body, message.from_email, message.recipients,
+                        connection=connection,
+                    ).send()
+                except Exception as e:
+                    _record_failure(message, e, max_attempts)
+                else:
+                    message.status = 'Sent'
+                    message.sent_at = now()
+            connection.close()
+
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+
+    for message in batch:
+        if message.status == 'Sent':
+            counts['sent'] += 1
+        elif message.status == 'Failed':
+            counts['failed'] += 1
+        else:
+            counts['retrying'] += 1
+    return counts
@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed ``cursor`` or ``limit`` query parameter."""
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row into an opaque cursor."""
+    raw = json.dumps(values, cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor, size, fields=None):
+    """
+    Decode a cursor produced by ``encode_cursor`` back into its values.
+    With ``fields`` (the model fields of the sort keys) each value is
+    converted with the field's ``to_python()``, so a tampered cursor is
+    rejected here instead of failing in the query.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidPageRequest("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest("Invalid cursor.")
+    if fields is None:
+        return values
+
+    coerced = []
+    for field, value in zip(fields, values):
+        # NULLs can't be compared, so no cursor value may be null
+        if value is None or isinstance(value, (list, dict)):
+            raise InvalidPageRequest("Invalid cursor.")
+        try:
+            coerced.append(field.to_python(value))
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidPageRequest("Invalid cursor.")
+    return coerced
+
+
+def page_size(request, default=DEFAULT_PAGE_SIZE):
+    """Read ``?limit=`` from the request, capped at ``MAX_PAGE_SIZE``."""
+    limit = request.GET.get('limit')
+    if not limit:
+        return default
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPageRequest("limit must be an integer.")
+    if limit < 1:
+        raise InvalidPageRequest("limit must be positive.")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _after(ordering, values):
+    """
+    Rows strictly after ``values`` in ``ordering``, e.g. for ('date', 'id'):
+    date >= d AND (date > d OR (date = d AND id > i)). The leading bound
+    lets the database range-scan an index on the sort columns.
+    """
+    names = [field.lstrip('-') for field in ordering]
+    lookups = ['lt' if field.startswith('-') else 'gt' for field in ordering]
+
+    condition = Q()
+    for i, (name, lookup) in enumerate(zip(names, lookups)):
+        clause = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_name, prev_value in zip(names[:i], values[:i]):
+            clause &= Q(**{prev_name: prev_value})
+        condition |= clause
+
+    return Q(**{f'{names[0]}__{lookups[0]}e': values[0]}) & condition
+
+
+def _sort_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``queryset`` sorted by
+    ``ordering``. The last ordering field must be unique (usually ``id``)
+    and, for ``values()`` querysets, every ordering field must be selected.
+    ``next_cursor`` is None on the last page.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        fields = [queryset.model._meta.get_field(field.lstrip('-')) for field in ordering]
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, len(ordering), fields)))
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([_sort_value(last, field.lstrip('-')) for field in ordering])
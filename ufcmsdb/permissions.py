@@ -0,0 +1,39 @@
+from ufcmsdb.models import Permission
+
+
+# Bumped whenever a role's permissions or a user's roles change. Cached sets
+# tagged with an older generation are recomputed on next access.
+_generation = 0
+
+
+def invalidate_permission_sets():
+    """Mark every cached permission set in this process as stale."""
+    global _generation
+    _generation += 1
+
+
+def get_permission_set(user):
+    """
+    Return the user's permissions as a frozenset of (module, action) pairs.
+    The set is loaded with one query and memoised on the user instance, so
+    every check made during the same request is a set lookup. It is not put
+    in the reference-data cache: with a per-process backend a revoked grant
+    would keep being honoured by the other workers.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    cached = getattr(user, '_permission_set', None)
+    if cached is not None and cached[0] == _generation:
+        return cached[1]
+
+    permissions = frozenset(
+        Permission.objects.filter(roles__users=user).values_list('module', 'action').distinct()
+    )
+    user._permission_set = (_generation, permissions)
+    return permissions
+
+
+def user_has_permission(user, action, module):
+    """Check if a user has a given permission on a module."""
+    return (module, action) in get_permission_set(user)
@@ -0,0 +1,239 @@
+"""
+Query budgets for every URL in ``Unit_factor_cms/urls.py``.
+
+``manage.py check_query_budgets`` seeds a realistic dataset, calls each
+endpoint in ``ENDPOINTS`` once as the all-permissions admin and fails when
+a call runs more queries than its budget, answers with an unexpected
+status, or a URL has no entry here. Budgets don't grow with the data, so
+an N+1 shows up as a count in the hundreds. GET endpoints are also timed
+and compared with a JSON baseline (``--update-baseline`` records one).
+``ufcmsdb/tests/test_query_budgets.py`` asserts the same budgets, one test
+per endpoint, against a smaller dataset under pytest.
+
+Everything runs in a transaction that is rolled back. The async views run
+their work on the request thread (``asyncapi.on_request_thread``) for the
+check, so they see the uncommitted rows and their queries are counted.
+"""
+import json
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+
+from ufcmsdb.asyncapi import on_request_thread
+from ufcmsdb.benchmarks import api_client, median_ms
+from ufcmsdb.models import (
+    CustomUser, Department, Designation, Expense, Leave, PasswordResetOTP, Role, Task,
+)
+
+Endpoint = namedtuple('Endpoint', 'route method budget kwargs query body expect')
+
+
+def endpoint(route, method, budget, kwargs=None, query='', body=None, expect=200):
+    """
+    ``kwargs`` and ``body`` are callables taking the seeded data; they run
+    before the call, so rows they create don't count against the budget.
+    ``query`` is appended to the URL as is.
+    """
+    return Endpoint(route, method, budget, kwargs, query, body, expect)
+
+
+def _throwaway_user(data):
+    return CustomUser.objects.create(username='budget-user', email='budget-user@example.com').id
+
+
+def _pending_leave(data):
+    person = data.users[1]
+    return Leave.objects.create(user=person, leave_type='Sick', leave_from=date.today(), leave_to=date.today(),
+                                status='Pending', reason='Budget check', leave_days=1).id
+
+
+def _reset_otp(data):
+    PasswordResetOTP.objects.update_or_create(email=data.users[2].email, defaults={'otp': '654321'})
+    return {'email': data.users[2].email, 'otp': '654321', 'new_password': 'benchmark'}
+
+
+def _first(model, **filters):
+    return model.objects.filter(**filters).order_by('id').values_list('id', flat=True).first()
+
+
+CREDENTIALS = lambda data: {'email': data.admin.email, 'password': 'benchmark'}  # noqa: E731
+
+# Called in this order: reads, then writes, then deletes, with logout last
+ENDPOINTS = [
+    # Reads
+    endpoint('roles/api/get-all/', 'get', 4),
+    endpoint('users/api/get-all/', 'get', 5),
+    endpoint('users/api/<int:user_id>/', 'get', 5, kwargs=lambda data: {'user_id': data.users[1].id}),
+    endpoint('users/api/get-all/async/', 'get', 5),
+    endpoint('users/api/<int:user_id>/async/', 'get', 5, kwargs=lambda data: {'user_id': data.users[1].id}),
+    endpoint('departments/api/get-all/', 'get', 2),
+    endpoint('departments/api/<int:department_id>/', 'get', 1,
+             kwargs=lambda data: {'department_id': data.departments[0].id}),
+    endpoint('designations/api/get-all/', 'get', 1),
+    endpoint('designations/api/<int:designation_id>/', 'get', 1,
+             kwargs=lambda data: {'designation_id': _first(Designation, department__in=data.departments)}),
+    endpoint('expense/api/get-all/', 'get', 2),
+    endpoint('expense/api/summary/', 'get', 1),
+    endpoint('auth/api/me/', 'get', 3),
+    endpoint('project/api/<int:project_id>/', 'get', 3, kwargs=lambda data: {'project_id': data.projects[0].id}),
+    endpoint('project/api/get-all/', 'get', 1),
+    endpoint('project/api/mine/', 'get', 2),
+    endpoint('attendence/api/stats/', 'get', 2),
+    endpoint('attendence/api/stats/async/', 'get', 2),
+    endpoint('attendence/api/get-all/', 'get', 2),
+    endpoint('leave/api/<int:user_id>/', 'get', 2, kwargs=lambda data: {'user_id': data.users[1].id}),
+    endpoint('leave/api/get-all/', 'get', 1),
+    endpoint('leave/api/availability/', 'get', 1,
+             query=f'date_from={date.today()}&date_to={date.today() + timedelta(days=6)}'),
+    endpoint('leave/api/balance/', 'get', 1),
+    endpoint('leave/api/balance/<int:user_id>/', 'get', 1, kwargs=lambda data: {'user_id': data.users[1].id}),
+    endpoint('task/api/<int:task_id>/', 'get', 3, kwargs=lambda data: {'task_id': _first(Task, project__in=data.projects)}),
+    endpoint('task/api/get-all/', 'get', 1),
+    endpoint('metrics/', 'get', 0),
+
+    # Writes
+    endpoint('auth/api/login/', 'post', 10, body=CREDENTIALS),
+    endpoint('auth/api/login/async/', 'post', 10, body=CREDENTIALS),
+    endpoint('api-token-auth/', 'post', 2, body=lambda data: {'username': data.admin.username, 'password': 'benchmark'}),
+    endpoint('auth/api/forgot-password/', 'post', 10, body=lambda data: {'email': data.users[2].email}),
+    endpoint('auth/api/reset-password/', 'post', 7, body=_reset_otp),
+    endpoint('roles/api/create/', 'post', 7, expect=201, body=lambda data: {
+        'name': 'Budget role', 'permissions': [{'module': 'leave', 'actions': ['read', 'create']}],
+    }),
+    endpoint('roles/api/<int:role_id>/edit/', 'post', 28, kwargs=lambda data: {'role_id': data.role.id}, body=lambda data: {
+        'name': data.role.name, 'permissions': [{'module': module, 'actions': ['create', 'read', 'update', 'delete']}
+                                                for module in ('task_management', 'project_management', 'finance_management',
+                                                               'attendance', 'leave')],
+    }),
+    endpoint('users/api/create/', 'post', 10, expect=201, body=lambda data: {
+        'first_name': 'Budget', 'email': 'budget-new@example.com', 'password': 'benchmark', 'age': 30,
+        'address': 'Somewhere', 'cnicno': '12345', 'role_id': data.role.id, 'username': 'budget-new',
+        'phone': '0300', 'department_id': data.departments[0].id, 'joining_date': str(date.today()),
+    }),
+    # A project member, so the summaries showing the user are re-rendered too
+    endpoint('users/api/<int:user_id>/edit/', 'post', 9,
+             kwargs=lambda data: {'user_id': _first(CustomUser, projects=data.projects[0])},
+             body=lambda data: {'first_name': 'Renamed', 'department_id': data.departments[1].id}),
+    endpoint('departments/api/create/', 'post', 2, expect=201, body=lambda data: {'name': 'Budget department'}),
+    endpoint('departments/api/<int:department_id>/edit/', 'post', 2,
+             kwargs=lambda data: {'department_id': data.departments[0].id},
+             body=lambda data: {'name': 'Budget department renamed'}),
+    endpoint('designations/api/create/', 'post', 2, expect=201,
+             body=lambda data: {'department_id': data.departments[0].id, 'name': 'Budget designation'}),
+    endpoint('designations/api/<int:designation_id>/edit/', 'post', 3,
+             kwargs=lambda data: {'designation_id': _first(Designation, department__in=data.departments)},
+             body=lambda data: {'name': 'Budget designation renamed', 'department_id': data.departments[0].id}),
+    endpoint('expense/api/create/', 'post', 4, expect=201, body=lambda data: {
+        'date': str(date.today()), 'amount': '12.50', 'description': 'Budget check',
+        'user': data.admin.id, 'department': data.departments[0].id,
+    }),
+    endpoint('project/api/create/', 'post', 13, expect=201, body=lambda data: {
+        'name': 'Budget project', 'deadline': str(date.today() + timedelta(days=30)), 'leader': data.admin.id,
+        'team_members': [person.id for person in data.users[:10]],
+    }),
+    endpoint('project/api/<int:project_id>/edit/', 'post', 19, kwargs=lambda data: {'project_id': data.projects[1].id},
+             body=lambda data: {'name': 'Budget project renamed', 'team_members': [person.id for person in data.users[:5]]}),
+    endpoint('attendence/api/punch/', 'post', 8),
+    endpoint('leave/api/apply/', 'post', 6, expect=201, body=lambda data: {
+        'leave_type': 'Casual', 'leave_from': str(date.today() + timedelta(days=60)),
+        'leave_to': str(date.today() + timedelta(days=60)), 'reason': 'Budget check',
+    }),
+    endpoint('leave/api/update-status/', 'post', 8,
+             body=lambda data: {'leave_id': _pending_leave(data), 'action': 'reject', 'approved_by': data.admin.id}),
+    endpoint('task/api/create/', 'post', 7, expect=201, body=lambda data: {
+        'project_id': data.projects[0].id, 'name': 'Budget task', 'assigned_to': data.users[1].id,
+        'due_date': str(date.today() + timedelta(days=7)),
+    }),
+    endpoint('task/api/update-status/', 'post', 7, body=lambda data: {
+        'task_id': _first(Task, project__in=data.projects), 'status': 'In Progress', 'updated_by': data.admin.id,
+    }),
+    endpoint('task/api/bulk-create/', 'post', 8, expect=201, body=lambda data: {'tasks': [
+        {'project_id': project.id, 'name': f'Budget bulk task {i}', 'assigned_to': data.users[i].id}
+        for i, project in enumerate(data.projects[:10])
+    ]}),
+    endpoint('task/api/bulk-update-status/', 'post', 6, body=lambda data: {'updates': [
+        {'task_id': task_id, 'status': 'Completed'}
+        for task_id in Task.objects.filter(project=data.projects[0]).order_by('id').values_list('id', flat=True)[:50]
+    ]}),
+
+    # Deletes, each of a row made for the purpose
+    endpoint('roles/api/<int:role_id>/delete/', 'delete', 4,
+             kwargs=lambda data: {'role_id': Role.objects.create(name='Budget doomed role').id}),
+    endpoint('users/api/<int:user_id>/delete/', 'delete', 21, kwargs=lambda data: {'user_id': _throwaway_user(data)}),
+    endpoint('departments/api/<int:department_id>/delete/', 'delete', 5,
+             kwargs=lambda data: {'department_id': Department.objects.create(name='Budget doomed department').id}),
+    endpoint('designations/api/<int:designation_id>/delete/', 'delete', 3, kwargs=lambda data: {
+        'designation_id': Designation.objects.create(
+            department=data.departments[0], department_name=data.departments[0].name, name='Budget doomed',
+        ).id,
+    }),
+    endpoint('expense/api/<int:expense_id>/delete/', 'delete', 2,
+             kwargs=lambda data: {'expense_id': _first(Expense, user=data.users[4])}),
+    endpoint('project/api/<int:project_id>/delete/', 'delete', 5, kwargs=lambda data: {'project_id': data.projects[-1].id}),
+    endpoint('task/api/<int:task_id>/delete/', 'delete', 6,
+             kwargs=lambda data: {'task_id': _first(Task, project=data.projects[2])}, expect=204),
+    endpoint('auth/api/logout/', 'post', 2),
+]
+
+# Served only with DEBUG on, straight from storage
+UNCHECKED_ROUTES = {'^media/(?P<path>.*)$'}
+
+
+def url_routes(resolver=None, prefix=''):
+    """Every route in the URLconf outside the admin, as its full pattern string."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if route != 'admin/':
+                yield from url_routes(pattern, route)
+        else:
+            yield route
+
+
+def url_for(route, kwargs):
+    return '/' + re.sub(r'<(?:\w+:)?(\w+)>', lambda match: str(kwargs[match[1]]), route)
+
+
+def endpoint_request(spec, data):
+    """
+    The path and ``Client`` keyword arguments for calling ``spec``. Runs its
+    ``kwargs`` and ``body`` callables, so call it before counting queries.
+    """
+    path = url_for(spec.route, spec.kwargs(data) if spec.kwargs else {})
+    if spec.query:
+        path = f'{path}?{spec.query}'
+    if not spec.body:
+        return path, {}
+    body = spec.body(data)
+    # The expense form is multipart; everything else takes JSON
+    if spec.route == 'expense/api/create/':
+        return path, {'data': body}
+    return path, {'data': json.dumps(body), 'content_type': 'application/json'}
+
+
+def check_endpoints(data, repeat):
+    """
+    Call every endpoint once. Returns a list of dicts with ``route``,
+    ``method``, ``status``, ``queries``, ``budget`` and, for GETs, ``ms``.
+    """
+    results = []
+    with api_client(data.admin) as client, on_request_thread():
+        for spec in ENDPOINTS:
+            path, args = endpoint_request(spec, data)
+            call = getattr(client, spec.method)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = call(path, **args)
+            result = {
+                'route': spec.route, 'method': spec.method.upper(), 'status': response.status_code,
+                'expect': spec.expect, 'queries': len(queries), 'budget': spec.budget, 'ms': None,
+            }
+            if spec.method == 'get' and response.status_code == spec.expect:
+                result['ms'] = median_ms(lambda: call(path, **args), repeat)
+            results.append(result)
+    return results
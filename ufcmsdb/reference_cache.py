@@ -0,0 +1,71 @@
+"""
+Read-through cache for reference data (departments, designations, roles
+and permissions) that changes a few times a month.
+
+Every namespace has a version stamp in the cache. Signals bump the stamp
+on save/delete, which orphans all entries built under the old one. With
+the default local-memory backend each worker process holds its own copy,
+so entries also expire after ``REFERENCE_DATA_CACHE_TIMEOUT`` seconds;
+configure a shared backend to make invalidation immediate everywhere.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from ufcmsdb.fastjson import dumps
+
+
+def _version_key(namespace):
+    return f'refdata:{namespace}:version'
+
+
+def namespace_version(namespace):
+    """Return ``{'version', 'modified'}`` for a namespace, creating it if needed."""
+    state = cache.get(_version_key(namespace))
+    if state is None:
+        state = {'version': time.time_ns(), 'modified': int(time.time())}
+        cache.add(_version_key(namespace), state, None)
+        state = cache.get(_version_key(namespace)) or state
+    return state
+
+
+def bump(namespace):
+    """Invalidate every cached entry of a namespace."""
+    cache.set(_version_key(namespace), {'version': time.time_ns(), 'modified': int(time.time())}, None)
+
+
+def cached_value(namespace, key, builder):
+    """Return ``builder()`` cached under the namespace's current version."""
+    cache_key = f"refdata:{namespace}:{namespace_version(namespace)['version']}:{key}"
+    value = cache.get(cache_key)
+    if value is None:
+        value = builder()
+        cache.set(cache_key, value, settings.REFERENCE_DATA_CACHE_TIMEOUT)
+    return value
+
+
+def _encoded(builder):
+    body = dumps(builder())
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def reference_response(request, namespace, key, builder):
+    """
+    JSON response for ``builder()`` served from the cache, with ``ETag`` and
+    ``Last-Modified`` headers. Matching conditional requests get a 304.
+    """
+    body, etag = cached_value(namespace, key, lambda: _encoded(builder))
+    last_modified = namespace_version(namespace)['modified']
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'  # Always revalidate; the 304 is cheap
+    return response
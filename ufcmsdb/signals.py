@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from projectsapi.summaries import USER_DISPLAY_FIELDS, projects_showing_user, refresh_summaries
+from ufcmsdb import reference_cache
+from ufcmsdb.authentication import invalidate_token, invalidate_user_tokens
+from ufcmsdb.models import CustomUser, Department, Designation, Permission, Project, Role
+from ufcmsdb.permissions import invalidate_permission_sets
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+@receiver(m2m_changed, sender=CustomUser.role.through)
+def role_permissions_changed(sender, action, **kwargs):
+    """Drop cached permission sets when role grants or user roles change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_permission_sets()
+        reference_cache.bump('roles')
+
+
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Permission)
+def role_deleted(sender, **kwargs):
+    """Deleting a role or permission removes grants without an m2m signal."""
+    invalidate_permission_sets()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def roles_changed(sender, **kwargs):
+    reference_cache.bump('roles')
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Designation)
+@receiver(post_delete, sender=Designation)
+def departments_changed(sender, **kwargs):
+    # Department listings embed their designations, and designations
+    # carry a copy of the department name, so both namespaces go together.
+    reference_cache.bump('departments')
+    reference_cache.bump('designations')
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, **kwargs):
+    refresh_summaries([instance.id])
+
+
+@receiver(m2m_changed, sender=Project.team_members.through)
+def project_team_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # user.projects.clear() sends no pk_set, so note the projects first
+        instance._cleared_project_ids = set(instance.projects.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            refresh_summaries([instance.id])
+        elif action == 'post_clear':
+            refresh_summaries(instance.__dict__.pop('_cleared_project_ids', set()))
+        else:
+            refresh_summaries(pk_set)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Re-render summaries that show the user's name or picture."""
+    if created or (update_fields is not None and not USER_DISPLAY_FIELDS & set(update_fields)):
+        return  # e.g. the last_login update on every login
+    project_ids = projects_showing_user(instance.id)
+    if project_ids:
+        refresh_summaries(project_ids)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def user_deleting(sender, instance, **kwargs):
+    # Leader and creator are nulled by a queryset update, which sends no signals
+    instance._summary_project_ids = projects_showing_user(instance.id)
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    project_ids = getattr(instance, '_summary_project_ids', None)
+    if project_ids:
+        refresh_summaries(project_ids)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Logout, password reset, expiry and user deletion all remove the token."""
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver(post_save, sender=CustomUser)
+def user_tokens_stale(sender, instance, created, **kwargs):
+    """Cached tokens carry a copy of the user row."""
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.id))
@@ -0,0 +1,46 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+from ufcmsdb.fastjson import dumps
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the row back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+def streaming_export(export_format, queryset, fields, filename):
+    """
+    Stream ``queryset.values(*fields)`` as CSV or newline-delimited JSON.
+    Rows are fetched with ``iterator(chunk_size=...)`` so memory stays flat
+    regardless of how many rows are exported.
+    """
+    rows = queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(_csv_lines(rows, fields), content_type='text/csv')
+        extension = 'csv'
+    else:
+        response = StreamingHttpResponse(_ndjson_lines(rows), content_type='application/x-ndjson')
+        extension = 'ndjson'
+
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
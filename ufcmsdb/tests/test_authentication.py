@@ -0,0 +1,62 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from ufcmsdb import authentication
+from ufcmsdb.authentication import CachedTokenAuthentication
+from ufcmsdb.models import CustomUser
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='employee', email='employee@example.com')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        authentication._local.clear()
+        self.addCleanup(authentication._local.clear)
+        cache.clear()
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+    def revoke_elsewhere(self):
+        """Delete the token as another worker would: this process's LRU isn't told."""
+        Token.objects.filter(key=self.token.key).delete()
+        authentication._local.clear()  # As if the local entry had aged out
+
+    def test_local_entry_answers_without_queries(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user.id, self.user.id)
+
+    def test_process_local_cache_is_not_used_as_shared_tier(self):
+        self.authenticate()
+        self.assertIsNone(cache.get(authentication._cache_key(self.token.key)))
+
+        self.revoke_elsewhere()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_shared_backend_serves_other_processes(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            self.authenticate()
+            authentication._local.clear()
+            with self.assertNumQueries(0):
+                user, _ = self.authenticate()
+            self.assertEqual(user.id, self.user.id)
+
+            # Revoking through the model evicts the shared entry for everyone
+            with self.captureOnCommitCallbacks(execute=True):
+                Token.objects.get(key=self.token.key).delete()
+            authentication._local.clear()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
@@ -0,0 +1,114 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import now
+
+from ufcmsdb.models import OutboundEmail
+from ufcmsdb.outbox import BACKOFF_SECONDS, drain_outbox, enqueue_email
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class FailingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP server said no')
+
+
+class BlockingBackend(locmem.EmailBackend):
+    """Holds the first send until ``release`` is set, so the batch's row locks stay held."""
+    sending = threading.Event()
+    release = threading.Event()
+
+    def send_messages(self, messages):
+        self.sending.set()
+        self.release.wait(10)
+        return super().send_messages(messages)
+
+
+def send_queued_emails(**options):
+    call_command('send_queued_emails', stdout=StringIO(), **options)
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM)
+class OutboxDeliveryTests(TestCase):
+
+    def test_queued_email_is_delivered_by_the_command(self):
+        with transaction.atomic():
+            enqueue_email('Password Reset OTP', 'Your OTP is 123456.', ['user@example.com'], 'noreply@example.com')
+        self.assertEqual(mail.outbox, [])  # Nothing is sent by the request itself
+
+        send_queued_emails()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Password Reset OTP')
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        message = OutboundEmail.objects.get()
+        self.assertEqual(message.status, 'Sent')
+        self.assertIsNotNone(message.sent_at)
+
+        send_queued_emails()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_sends_back_off_then_give_up(self):
+        message = enqueue_email('Subject', 'Body', ['user@example.com'])
+
+        with override_settings(EMAIL_BACKEND=f'{__name__}.FailingBackend'):
+            for attempt in range(1, 4):
+                started = now()
+                send_queued_emails(max_attempts=3)
+                message.refresh_from_db()
+                self.assertEqual(message.attempts, attempt)
+                self.assertIn('SMTP server said no', message.last_error)
+                if attempt < 3:
+                    self.assertEqual(message.status, 'Pending')
+                    delay = message.next_attempt_at - started
+                    self.assertGreaterEqual(delay, timedelta(seconds=BACKOFF_SECONDS * 2 ** (attempt - 1)))
+                    self.assertLess(delay, timedelta(seconds=BACKOFF_SECONDS * 2 ** attempt))
+
+                    # Not due yet: a second run leaves it alone
+                    send_queued_emails(max_attempts=3)
+                    message.refresh_from_db()
+                    self.assertEqual(message.attempts, attempt)
+
+                    OutboundEmail.objects.filter(id=message.id).update(next_attempt_at=now())
+
+        self.assertEqual(message.status, 'Failed')
+        send_queued_emails()
+        self.assertEqual(mail.outbox, [])
+
+
+@override_settings(EMAIL_BACKEND=f'{__name__}.BlockingBackend')
+class OutboxClaimTests(TransactionTestCase):
+
+    def test_rows_are_claimed_by_one_worker(self):
+        for i in range(3):
+            enqueue_email(f'Message {i}', 'Body', ['user@example.com'])
+        BlockingBackend.sending.clear()
+        BlockingBackend.release.clear()
+        results = {}
+
+        def worker():
+            try:
+                results['first'] = drain_outbox()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            self.assertTrue(BlockingBackend.sending.wait(10))
+            # The first worker still holds the batch: this one finds nothing to claim
+            self.assertEqual(drain_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+        finally:
+            BlockingBackend.release.set()
+            thread.join(10)
+
+        self.assertEqual(results['first'], {'sent': 3, 'retrying': 0, 'failed': 0})
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+        self.assertEqual(sorted(message.subject for message in mail.outbox), ['Message 0', 'Message 1', 'Message 2'])
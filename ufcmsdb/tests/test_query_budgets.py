@@ -0,0 +1,43 @@
+"""
+One test per endpoint in ``ufcmsdb.query_budgets.ENDPOINTS``: the call
+must answer with the expected status within its query budget. The data is
+seeded once per module inside a transaction that is rolled back at the
+end; each test rolls back its own writes.
+"""
+import pytest
+from django.db import transaction
+
+from ufcmsdb.asyncapi import on_request_thread
+from ufcmsdb.authentication import CachedTokenAuthentication
+from ufcmsdb.benchmarks import api_client, seed_dataset
+from ufcmsdb.query_budgets import ENDPOINTS, UNCHECKED_ROUTES, endpoint_request, url_routes
+
+
+@pytest.fixture(scope='module')
+def budget_data(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock(), transaction.atomic():
+        yield seed_dataset(users=60, days=10, projects=12, tasks=400, leaves_per_user=2, expenses_per_user=2)
+        transaction.set_rollback(True)
+
+
+@pytest.fixture(autouse=True)
+def debug_metrics(settings):
+    settings.DEBUG = True  # metrics/ needs no token with DEBUG on
+
+
+def test_every_route_has_a_budget():
+    budgeted = {spec.route for spec in ENDPOINTS}
+    assert [route for route in url_routes() if route not in budgeted | UNCHECKED_ROUTES] == []
+
+
+@pytest.mark.parametrize('spec', ENDPOINTS, ids=[f'{spec.method.upper()} /{spec.route}' for spec in ENDPOINTS])
+def test_endpoint_within_budget(spec, budget_data, db, django_assert_max_num_queries):
+    with api_client(budget_data.admin) as client, on_request_thread():
+        path, args = endpoint_request(spec, budget_data)
+        # Authenticate once first, so the count is the endpoint's own and not a token cache miss
+        CachedTokenAuthentication().authenticate_credentials(client.defaults['HTTP_AUTHORIZATION'].split()[1])
+
+        with django_assert_max_num_queries(spec.budget):
+            response = getattr(client, spec.method)(path, **args)
+
+    assert response.status_code == spec.expect, response.content[:500]
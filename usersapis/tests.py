@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ufcmsdb.models import CustomUser, Department, Designation, Project, Role
+
+# ?fields= value -> queries for one response: the users, plus one per prefetch
+FIELD_QUERIES = {
+    None: 5,
+    'name,email': 1,
+    'department,designation,created_by': 1,
+    'roles': 2,
+    'team_projects': 2,
+    'led_projects': 3,
+    'roles,team_projects,led_projects': 5,
+}
+
+
+class GetUserViewQueryCountTests(TestCase):
+    """GetUserView runs the same number of queries whatever the headcount."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Engineering')
+        cls.designation = Designation.objects.create(
+            department=cls.department, department_name=cls.department.name, name='Engineer'
+        )
+        cls.roles = [Role.objects.create(name=f'Role {i}') for i in range(2)]
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@example.com',
+                                              first_name='Ada', last_name='Admin')
+        cls.users = cls.add_users(0, 3)
+
+    @classmethod
+    def add_users(cls, start, count):
+        """Users ``start`` .. ``start + count - 1``, each leading a project and on two teams."""
+        users = []
+        for i in range(start, start + count):
+            user = CustomUser.objects.create(
+                username=f'user{i}', email=f'user{i}@example.com', first_name='User', last_name=str(i),
+                department=cls.department, designation=cls.designation, created_by=cls.admin,
+            )
+            user.role.set(cls.roles)
+            project = Project.objects.create(name=f'Project {i}', deadline=date.today() + timedelta(days=30),
+                                             leader=user)
+            project.team_members.set([user, cls.admin])
+            users.append(user)
+        return users
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path, fields):
+        response = self.client.get(path, {'fields': fields} if fields else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_query_count_is_constant(self):
+        for headcount, new_users in ((4, 0), (14, 10)):
+            self.add_users(headcount - new_users - 1, new_users)  # The admin is listed too
+            for fields, queries in FIELD_QUERIES.items():
+                with self.subTest(headcount=headcount, fields=fields):
+                    with self.assertNumQueries(queries):
+                        data = self.get('/users/api/get-all/', fields)
+                    self.assertEqual(len(data['users']), headcount)
+
+    def test_detail_query_count_is_constant(self):
+        for fields, queries in FIELD_QUERIES.items():
+            with self.subTest(fields=fields):
+                with self.assertNumQueries(queries):
+                    self.get(f'/users/api/{self.users[0].id}/', fields)
+
+    def test_created_by_name(self):
+        # The single-user response names the creator by first name, the directory by full name
+        detail = self.get(f'/users/api/{self.users[0].id}/', 'created_by')
+        self.assertEqual(detail['created_by'], {'id': self.admin.id, 'name': 'Ada'})
+
+        listing = self.get('/users/api/get-all/', 'created_by')
+        entry = next(user for user in listing['users'] if user['id'] == self.users[0].id)
+        self.assertEqual(entry['created_by'], {'id': self.admin.id, 'name': 'Ada Admin'})
+
+
+class UserCreateViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name='Engineer')
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create(self, **extra):
+        return self.client.post('/users/api/create/', {
+            'first_name': 'Sara', 'email': 'sara@example.com', 'password': 'secret', 'age': 30,
+            'address': 'Lahore', 'cnicno': 3520212345671, 'role_id': self.role.id, 'username': 'sara',
+            'phone': '03001234567', **extra,
+        }, format='json')
+
+    def test_joining_date(self):
+        response = self.create(joining_date='2026-03-01')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CustomUser.objects.get(username='sara').joining_date, date(2026, 3, 1))
+
+    def test_joining_date_defaults_to_today(self):
+        response = self.create()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CustomUser.objects.get(username='sara').joining_date, date.today())
+
+    def test_invalid_joining_date(self):
+        for value in ('2026-02-30', 'next week'):
+            with self.subTest(joining_date=value):
+                response = self.create(joining_date=value)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('joining_date', response.json()['error'])
+        self.assertFalse(CustomUser.objects.filter(username='sara').exists())
@@ -1,18 +1,23 @@
-from rest_framework.authentication import TokenAuthentication
+from ufcmsdb.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.http import JsonResponse
-from django.db.models import Prefetch
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.dateparse import parse_date
+import datetime
 import json
 import logging
 from ufcmsdb.models import CustomUser, Department, Designation, Role ,Project
 from django.contrib.auth.hashers import make_password
+from ufcmsdb.asyncapi import AsyncAPIView, gather, in_thread
+from ufcmsdb.fastjson import FastJSONResponse
+from ufcmsdb.pagination import InvalidPageRequest, keyset_page, page_size
 
 logger = logging.getLogger(__name__)
 
 class UserCreateView(APIView):
-    authentication_classes = [TokenAuthentication]  
+    authentication_classes = [CachedTokenAuthentication]  
     permission_classes = [IsAuthenticated]  
 
     def post(self, request):
@@ -37,6 +42,15 @@ class UserCreateView(APIView):
                 designation = Designation.objects.filter(id=data['designation_id']).first()
                 if not designation:
                     return JsonResponse({'error': 'Invalid designation ID'}, status=400)
+            # Optional; defaults to today like the model field
+            joining_date = datetime.date.today()
+            if data.get('joining_date'):
+                try:
+                    joining_date = parse_date(str(data['joining_date']))
+                except ValueError:  # Well formed but impossible, e.g. 2026-02-30
+                    joining_date = None
+                if not joining_date:
+                    return JsonResponse({'error': 'Invalid joining_date. Use YYYY-MM-DD.'}, status=400)
             if CustomUser.objects.filter(email=data['email']).exists():
                 return JsonResponse({'error': 'Email already exists'}, status=400)
             if CustomUser.objects.filter(username=data['username']).exists():
@@ -53,7 +67,7 @@ class UserCreateView(APIView):
                 cnicno=data['cnicno'],
                 username=data['username'],
                 created_by=request.user,
-                joinig_date = data['joining_date']
+                joining_date=joining_date
             )
             user.role.set([role])
             logger.info(f"User '{user.username}' created by: '{request.user.username}'")
@@ -83,132 +97,188 @@ class UserCreateView(APIView):
             logger.error(f"Error creating user: {str(e)}")
             return JsonResponse({'error': str(e)}, status=500)
 
+USER_FIELDS = (
+    'id', 'name', 'email', 'age', 'address', 'department', 'designation', 'roles', 'cnicno',
+    'phone', 'username', 'created_by', 'team_projects', 'led_projects', 'joining_date',
+)
+
+
+def parse_user_fields(request):
+    """
+    Fields requested through ``?fields=`` (comma separated), or every field.
+    Raises ValueError naming any unknown field.
+    """
+    requested = request.GET.get('fields')
+    if not requested:
+        return set(USER_FIELDS)
+    fields = {field.strip() for field in requested.split(',') if field.strip()}
+    unknown = fields - set(USER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields | {'id'}
+
+
+def user_directory_prefetches(fields):
+    """The prefetch lookups the requested fields need; they don't depend on each other."""
+    prefetches = []
+    if 'roles' in fields:
+        prefetches.append('role')
+    if 'team_projects' in fields:
+        prefetches.append(Prefetch('projects', queryset=Project.objects.select_related('leader')))
+    if 'led_projects' in fields:
+        members = CustomUser.objects.only('id', 'first_name', 'last_name')
+        prefetches.append(Prefetch('led_projects', queryset=Project.objects.prefetch_related(
+            Prefetch('team_members', queryset=members)
+        )))
+    return prefetches
+
+
+def user_directory_queryset(fields, prefetch=True):
+    """
+    Users with exactly the joins and prefetches the requested fields need.
+    The query count is fixed regardless of how many users are returned.
+    """
+    related = [name for name in ('department', 'designation', 'created_by') if name in fields]
+    users = CustomUser.objects.select_related(*related)
+    if prefetch:
+        users = users.prefetch_related(*user_directory_prefetches(fields))
+    return users
+
+
+def serialize_user(user, fields, detail=False):
+    """
+    Flatten a user loaded by ``user_directory_queryset`` into the requested fields.
+    The single-user response (``detail``) names ``created_by`` by first name
+    only, the directory by full name, as they always have.
+    """
+    data = {}
+    if 'id' in fields:
+        data['id'] = user.id
+    if 'name' in fields:
+        data['name'] = user.first_name
+    for field in ('email', 'age', 'address', 'cnicno', 'phone', 'username'):
+        if field in fields:
+            data[field] = getattr(user, field)
+    if 'department' in fields:
+        data['department'] = {'id': user.department.id, 'name': user.department.name} if user.department else None
+    if 'designation' in fields:
+        data['designation'] = {'id': user.designation.id, 'name': user.designation.name} if user.designation else None
+    if 'roles' in fields:
+        data['roles'] = [{'id': role.id, 'name': role.name} for role in user.role.all()]
+    if 'created_by' in fields:
+        data['created_by'] = {
+            'id': user.created_by.id,
+            'name': user.created_by.first_name if detail else f"{user.created_by.first_name} {user.created_by.last_name}"
+        } if user.created_by else None
+    if 'team_projects' in fields:
+        data['team_projects'] = [
+            {
+                'id': project.id,
+                'name': project.name,
+                'deadline': project.deadline,
+                'total_tasks': project.total_tasks,
+                'description': project.description,
+                'leader': {
+                    'id': project.leader.id,
+                    'name': f"{project.leader.first_name} {project.leader.last_name}"
+                } if project.leader else None
+            }
+            for project in user.projects.all()
+        ]
+    if 'led_projects' in fields:
+        data['led_projects'] = [
+            {
+                'id': project.id,
+                'name': project.name,
+                'deadline': project.deadline,
+                'total_tasks': project.total_tasks,
+                'description': project.description,
+                'team_members': [
+                    {'id': member.id, 'name': f"{member.first_name} {member.last_name}"}
+                    for member in project.team_members.all()
+                ]
+            }
+            for project in user.led_projects.all()
+        ]
+    if 'joining_date' in fields:
+        data['joining_date'] = user.joining_date
+    return data
+
+
 class GetUserView(APIView):
+    """
+    Return one user, or a page of the user directory ordered by ID.
+    ``?fields=`` limits the payload (and the queries) to the named fields;
+    list mode is paginated with ``limit`` and the returned ``next_cursor``.
+    """
     def get(self, request, user_id=None):
         try:
+            try:
+                fields = parse_user_fields(request)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+
+            users = user_directory_queryset(fields)
+
             if user_id:
-                user = CustomUser.objects.prefetch_related(
-                    'role', 'department', 'designation',
-                    'projects',
-                    Prefetch('led_projects', queryset=Project.objects.prefetch_related('team_members'))
-                ).get(id=user_id)
-
-                led_projects = [
-                    {
-                        'id': project.id,
-                        'name': project.name,
-                        'deadline': project.deadline,
-                        'total_tasks': project.total_tasks,
-                        'description': project.description,
-                        'team_members': [
-                            {'id': member.id, 'name': f"{member.first_name} {member.last_name}"}
-                            for member in project.team_members.all()
-                        ]
-                    }
-                    for project in user.led_projects.all()
-                ]
+                user = users.get(id=user_id)
+                return FastJSONResponse(serialize_user(user, fields, detail=True), status=200)
 
-                team_projects = [
-                    {
-                        'id': project.id,
-                        'name': project.name,
-                        'deadline': project.deadline,
-                        'total_tasks': project.total_tasks,
-                        'description': project.description,
-                        'leader': {
-                            'id': project.leader.id,
-                            'name': f"{project.leader.first_name} {project.leader.last_name}"
-                        } if project.leader else None
-                    }
-                    for project in user.projects.all()
-                ]
+            try:
+                page, next_cursor = keyset_page(
+                    users, ('id',), cursor=request.GET.get('cursor'), limit=page_size(request)
+                )
+            except InvalidPageRequest as e:
+                return JsonResponse({'error': str(e)}, status=400)
 
-                return JsonResponse({
-                    'id': user.id,
-                    'name': user.first_name,
-                    'email': user.email,
-                    'age': user.age,
-                    'address': user.address,
-                    'department': {'id': user.department.id, 'name': user.department.name} if user.department else None,
-                    'designation': {'id': user.designation.id, 'name': user.designation.name} if user.designation else None,
-                    'roles': [{'id': role.id, 'name': role.name} for role in user.role.all()],
-                    'cnicno': user.cnicno,
-                    'phone':user.phone,
-                    'username':user.username,
-
-                    'created_by': {
-                        'id': user.created_by.id,
-                        'name': user.created_by.first_name
-                    } if user.created_by else None,
-                    'team_projects': team_projects,
-                    'led_projects': led_projects,
-                    'joining_date': user.joining_date  # Add joining date here
-                }, status=200)
-
-            else:
-                users = CustomUser.objects.prefetch_related(
-                    'role', 'department', 'designation',
-                    'projects',
-                    Prefetch('led_projects', queryset=Project.objects.prefetch_related('team_members'))
-                ).all()
-
-                users_data = []
-                for user in users:
-                    led_projects = [
-                        {
-                            'id': project.id,
-                            'name': project.name,
-                            'deadline': project.deadline,
-                            'total_tasks': project.total_tasks,
-                            'description': project.description,
-                            'team_members': [
-                                {'id': member.id, 'name': f"{member.first_name} {member.last_name}"}
-                                for member in project.team_members.all()
-                            ]
-                        }
-                        for project in user.led_projects.all()
-                    ]
-
-                    team_projects = [
-                        {
-                            'id': project.id,
-                            'name': project.name,
-                            'deadline': project.deadline,
-                            'total_tasks': project.total_tasks,
-                            'description': project.description,
-                            'leader': {
-                                'id': project.leader.id,
-                                'name': f"{project.leader.first_name} {project.leader.last_name}"
-                            } if project.leader else None
-                        }
-                        for project in user.projects.all()
-                    ]
-
-                    users_data.append({
-                        'id': user.id,
-                        'name':user.first_name,
-                        'email': user.email,
-                        'age': user.age,
-                        'address': user.address,
-                        'department': {'id': user.department.id, 'name': user.department.name} if user.department else None,
-                        'designation': {'id': user.designation.id, 'name': user.designation.name} if user.designation else None,
-                        'roles': [{'id': role.id, 'name': role.name} for role in user.role.all()],
-                        'cnicno': user.cnicno,
-                        'phone':user.phone,
-                        'username':user.username,
-                        'created_by': {
-                            'id': user.created_by.id,
-                            'name': f"{user.created_by.first_name} {user.created_by.last_name}"
-                        } if user.created_by else None,
-                        'team_projects': team_projects,
-                        'led_projects': led_projects,
-                        'joining_date': user.joining_date  # Add joining date here
-                    })
-                return JsonResponse({'users': users_data}, status=200)
+            return FastJSONResponse({
+                'users': [serialize_user(user, fields) for user in page],
+                'next_cursor': next_cursor
+            }, status=200)
         except CustomUser.DoesNotExist:
             return JsonResponse({'error': 'User not found'}, status=404)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
+
+
+class AsyncGetUserView(AsyncAPIView):
+    """
+    ``GetUserView`` for ASGI servers. The users are loaded first, then the
+    prefetches for roles, team projects and led projects run concurrently.
+    """
+
+    async def get(self, request, user_id=None):
+        try:
+            fields = parse_user_fields(request)
+        except ValueError as e:
+            return FastJSONResponse({'error': str(e)}, status=400)
+
+        users = user_directory_queryset(fields, prefetch=False)
+        if user_id:
+            page = await in_thread(list, users.filter(id=user_id))
+            if not page:
+                return FastJSONResponse({'error': 'User not found'}, status=404)
+        else:
+            try:
+                page, next_cursor = await in_thread(
+                    keyset_page, users, ('id',), request.GET.get('cursor'), page_size(request)
+                )
+            except InvalidPageRequest as e:
+                return FastJSONResponse({'error': str(e)}, status=400)
+
+        # Each prefetch fills its own cache key; create the dicts first so the threads don't race to
+        for user in page:
+            user._prefetched_objects_cache = {}
+        await gather(*((prefetch_related_objects, page, lookup) for lookup in user_directory_prefetches(fields)))
+
+        if user_id:
+            return FastJSONResponse(serialize_user(page[0], fields, detail=True), status=200)
+        return FastJSONResponse({
+            'users': [serialize_user(user, fields) for user in page],
+            'next_cursor': next_cursor
+        }, status=200)
+
+
 class UpdateUserView(APIView):
     def post(self, request, user_id):
         try: